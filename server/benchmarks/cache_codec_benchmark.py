@@ -0,0 +1,81 @@
+"""
+Payload size and decode time of cached resolver pages: the plain JSON the
+caches used to store against the codecs in server.src.caching.codec.
+
+Pages are lists of topic dicts like the trending and search caches hold.
+Decode times include building the TopicType objects a resolver returns.
+
+Usage:
+    python -m server.benchmarks.cache_codec_benchmark --topics 50 --content-words 200
+"""
+import argparse
+import json
+import random
+import time
+from server.src.caching.codec import decode_cache_value, encode_cache_value
+from server.src.core.config import settings
+from server.src.graphql.schema import TopicType
+
+WORDS = [
+    "python", "rust", "golang", "docker", "kubernetes", "postgres", "redis", "graphql",
+    "the", "a", "is", "to", "and", "of", "how", "why", "error", "deploy", "cache", "index",
+]
+
+def generate_page(topics, content_words, seed=42):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": topic_id,
+            "title": " ".join(rng.choices(WORDS, k=6)),
+            "content": " ".join(rng.choices(WORDS, k=content_words)),
+            "user_id": rng.randint(1, 1000),
+            "created_at": f"2025-03-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00",
+            "is_locked": rng.random() < 0.1,
+        }
+        for topic_id in range(1, topics + 1)
+    ]
+
+def json_codec():
+    return lambda value: json.dumps(value).encode(), json.loads
+
+def configured_codec(name, compress_min_bytes):
+    def encode(value):
+        settings.CACHE_CODEC, settings.CACHE_COMPRESS_MIN_BYTES = name, compress_min_bytes
+        return encode_cache_value(value)
+    return encode, decode_cache_value
+
+def measure(encode, decode, page, repeat):
+    raw = encode(page)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        encode(page)
+    encode_time = (time.perf_counter() - start) / repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        [TopicType(**topic) for topic in decode(raw)]
+    decode_time = (time.perf_counter() - start) / repeat
+    return len(raw), encode_time, decode_time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--topics", type=int, default=50)
+    parser.add_argument("--content-words", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    page = generate_page(args.topics, args.content_words)
+    codecs = (
+        ("json (before)", json_codec()),
+        ("codec json", configured_codec("json", 0)),
+        ("codec json+zlib", configured_codec("json", 1)),
+        ("msgpack", configured_codec("msgpack", 0)),
+        ("msgpack+zlib", configured_codec("msgpack", 1)),
+    )
+    print(f"{args.topics} topics per page, {args.content_words} words of content each")
+    print(f"{'codec':<18}{'bytes':>10}{'encode us':>12}{'decode us':>12}")
+    for name, (encode, decode) in codecs:
+        size, encode_time, decode_time = measure(encode, decode, page, args.repeat)
+        print(f"{name:<18}{size:>10}{encode_time * 1e6:>12.1f}{decode_time * 1e6:>12.1f}")
+
+if __name__ == "__main__":
+    main()
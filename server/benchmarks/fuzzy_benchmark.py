@@ -0,0 +1,78 @@
+"""
+Latency benchmark for typo-tolerant prefix search (RadixTrie.fuzzy) against a
+brute-force scan that computes the edit distance to every title.
+
+Usage:
+    python -m server.benchmarks.fuzzy_benchmark --titles 1000000 --queries 500
+"""
+import argparse
+import random
+import statistics
+import time
+from server.benchmarks.trie_benchmark import generate_titles
+from server.src.utils.tries import RadixTrie
+
+def mistype(text, rng, edits):
+    chars = list(text)
+    for _ in range(edits):
+        position = rng.randrange(len(chars))
+        operation = rng.choice(("substitute", "delete", "insert"))
+        if operation == "substitute":
+            chars[position] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+        elif operation == "delete" and len(chars) > 1:
+            del chars[position]
+        else:
+            chars.insert(position, rng.choice("abcdefghijklmnopqrstuvwxyz"))
+    return "".join(chars)
+
+def prefix_distance(query, title):
+    # Smallest edit distance between query and any prefix of title
+    row = list(range(len(query) + 1))
+    best = row[-1]
+    for char in title:
+        new_row = [row[0] + 1]
+        for j in range(1, len(query) + 1):
+            new_row.append(min(new_row[j - 1] + 1, row[j] + 1, row[j - 1] + (query[j - 1] != char)))
+        row = new_row
+        best = min(best, row[-1])
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--titles", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--brute-force-queries", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    titles = generate_titles(args.titles)
+    trie = RadixTrie(rankings={"view_count": lambda t: t["view_count"]})
+    start = time.perf_counter()
+    trie.insert_many((title, {"id": i, "view_count": rng.randint(0, 1000)}) for i, title in enumerate(titles))
+    print(f"{args.titles} titles, build {time.perf_counter() - start:.1f}s")
+
+    print(f"{'edits':<7}{'mean ms':>10}{'p99 ms':>10}{'avg hits':>10}")
+    for max_distance in (1, 2):
+        queries = [mistype(rng.choice(titles)[: rng.randint(6, 14)].lower(), rng, max_distance) for _ in range(args.queries)]
+        latencies, hits = [], 0
+        for query in queries:
+            start = time.perf_counter()
+            hits += len(trie.fuzzy(query, max_distance, "view_count", args.limit))
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        print(
+            f"{max_distance:<7}{statistics.mean(latencies) * 1000:>10.3f}"
+            f"{latencies[int(len(latencies) * 0.99) - 1] * 1000:>10.3f}{hits / len(queries):>10.1f}"
+        )
+
+    if args.brute_force_queries:
+        lowered = [title.lower() for title in titles]
+        start = time.perf_counter()
+        for query in queries[: args.brute_force_queries]:
+            [title for title in lowered if prefix_distance(query, title[: len(query) + 2]) <= 2]
+        elapsed = (time.perf_counter() - start) / args.brute_force_queries
+        print(f"brute force, 2 edits: {elapsed * 1000:.1f} ms per query")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compare the in-process (trie + BM25) and Postgres (trigram + tsvector) search
+backends on the topics currently in DATABASE_URL.
+
+Usage:
+    python -m server.benchmarks.search_benchmark --queries 2000 --limit 10
+"""
+import argparse
+import random
+import statistics
+import time
+from server.src.db import session
+from server.src.db import search as db_search
+from server.src.db.models import Topic
+from server.src.search import topic_index
+from server.src.utils.inverted_index import tokenize
+
+def time_queries(run, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        run(query)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return statistics.mean(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    session.setup_db()
+    db_search.ensure_search_schema(session.engine)
+    db = session.SessionLocal()
+
+    titles = [title for (title,) in db.query(Topic.title)]
+    if not titles:
+        raise SystemExit("No topics in the database; populate it first.")
+    rng = random.Random(42)
+    prefixes = [rng.choice(titles)[: rng.randint(1, 8)] for _ in range(args.queries)]
+    words = [word for title in titles for word in tokenize(title)]
+    text_queries = [" ".join(rng.choices(words, k=rng.randint(1, 3))) for _ in range(args.queries)]
+
+    start = time.perf_counter()
+    topic_index.load_search_indexes()
+    print(f"{len(titles)} topics, in-process index build {time.perf_counter() - start:.2f}s")
+
+    cases = [
+        ("prefix", "trie", lambda q: topic_index.search_topics(q, "recency", args.limit), prefixes),
+        ("prefix", "sql", lambda q: db_search.search_topics_by_prefix(db, q, "recency", args.limit), prefixes),
+        ("full-text", "bm25", lambda q: topic_index.search_topic_text(q, args.limit), text_queries),
+        ("full-text", "sql", lambda q: db_search.search_topics_by_text(db, q, args.limit), text_queries),
+    ]
+    print(f"{'query':<12}{'engine':<8}{'mean ms':>10}{'p99 ms':>10}")
+    for kind, engine, run, queries in cases:
+        mean, p99 = time_queries(run, queries)
+        print(f"{kind:<12}{engine:<8}{mean * 1000:>10.3f}{p99 * 1000:>10.3f}")
+    db.close()
+
+if __name__ == "__main__":
+    main()
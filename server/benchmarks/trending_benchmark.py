@@ -0,0 +1,102 @@
+"""
+Trending score benchmark: the original per-row Python loop, run once per window,
+against the NumPy batch scorer scoring every window in one call.
+
+Both run over the same synthetic topics and hourly activity rows held in memory,
+so only the scoring is timed, not the database reads.
+
+Usage:
+    python -m server.benchmarks.trending_benchmark --topics 50000 --comments 1000000
+"""
+import argparse
+from collections import defaultdict
+import heapq
+import random
+import time
+import numpy as np
+from server.src.utils.trending_scores import score_windows, SECONDS_PER_DAY
+
+def generate_activity(topic_count, comment_count, days, seed=42):
+    """
+    Topics created over the last days, and comments on them bucketed by hour,
+    as (topic ids, creation times, activity rows sorted by time).
+    """
+    rng = random.Random(seed)
+    now = days * SECONDS_PER_DAY
+    created = [rng.uniform(0, now) for _ in range(topic_count)]
+    buckets = defaultdict(int)
+    for _ in range(comment_count):
+        topic = rng.randrange(topic_count)
+        at = rng.uniform(created[topic], now)
+        buckets[topic, at // 3600 * 3600] += 1
+    rows = sorted(((at, topic, count) for (topic, at), count in buckets.items()))
+    return list(range(1, topic_count + 1)), created, rows, now
+
+def loop_scores(topic_ids, created, rows, now, windows, max_topics):
+    """
+    The per-row scoring the resolver used to do in Python, once per window.
+    """
+    results = {}
+    for window in windows:
+        start = now - window * SECONDS_PER_DAY
+        recent = defaultdict(int)
+        total = defaultdict(int)
+        for at, topic, count in rows:
+            total[topic] += count
+            if at >= start:
+                recent[topic] += count
+        scores = []
+        for topic, topic_id in enumerate(topic_ids):
+            age_days = (now - created[topic]) // SECONDS_PER_DAY
+            recency = max(0, 1 - age_days / window)
+            scores.append((recent[topic] * 2 + total[topic] + recency * 3, topic_id))
+        results[window] = heapq.nlargest(max_topics, scores)
+    return results
+
+def batch_scores(arrays, now, windows, max_topics):
+    topic_ids, created, activity_topics, activity_times, activity_counts = arrays
+    return score_windows(topic_ids, created, activity_topics, activity_times, activity_counts,
+                         now, windows, max_topics)
+
+def time_call(function, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--topics", type=int, default=50_000)
+    parser.add_argument("--comments", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--windows", type=int, nargs="+", default=[1, 7, 30])
+    parser.add_argument("--max-topics", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    topic_ids, created, rows, now = generate_activity(args.topics, args.comments, args.days)
+    arrays = (
+        np.array(topic_ids, dtype=np.int64),
+        np.array(created, dtype=np.float64),
+        np.array([topic for _, topic, _ in rows], dtype=np.int64),
+        np.array([at for at, _, _ in rows], dtype=np.float64),
+        np.array([count for _, _, count in rows], dtype=np.int64),
+    )
+
+    loop_time, expected = time_call(
+        lambda: loop_scores(topic_ids, created, rows, now, args.windows, args.max_topics), args.repeat
+    )
+    batch_time, results = time_call(lambda: batch_scores(arrays, now, args.windows, args.max_topics), args.repeat)
+    for window in args.windows:
+        assert results[window][0].tolist() == [topic_id for _, topic_id in expected[window]], window
+
+    print(f"{args.topics} topics, {len(rows)} activity rows, windows {args.windows}, top {args.max_topics}")
+    print(f"{'scorer':<12}{'total ms':>12}{'per window ms':>16}")
+    for name, elapsed in (("loop", loop_time), ("numpy", batch_time)):
+        print(f"{name:<12}{elapsed * 1000:>12.1f}{elapsed * 1000 / len(args.windows):>16.1f}")
+    print(f"speedup: {loop_time / batch_time:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Memory and lookup benchmark for the topic search tries.
+
+Usage:
+    python -m server.benchmarks.trie_benchmark --titles 200000 --lookups 20000
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from server.src.utils.tries import Trie, RadixTrie
+
+WORDS = [
+    "python", "rust", "golang", "docker", "kubernetes", "postgres", "redis", "graphql",
+    "fastapi", "react", "testing", "performance", "async", "design", "patterns", "tips",
+    "beginner", "advanced", "guide", "question", "help", "error", "deploy", "cache",
+    "search", "index", "security", "auth", "streamlit", "rabbitmq", "queue", "forum",
+]
+
+def generate_titles(count, seed=42):
+    rng = random.Random(seed)
+    titles = set()
+    while len(titles) < count:
+        words = rng.choices(WORDS, k=rng.randint(2, 6))
+        titles.add(" ".join(words) + f" {rng.randint(0, 10_000)}")
+    return list(titles)
+
+def measure_build(factory, titles):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    index = factory(titles)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return index, elapsed, current
+
+def measure_lookups(index, prefixes):
+    start = time.perf_counter()
+    matched = 0
+    for prefix in prefixes:
+        matched += len(index.search(prefix))
+    elapsed = time.perf_counter() - start
+    return elapsed, matched
+
+def build_trie(titles):
+    trie = Trie()
+    for topic_id, title in enumerate(titles):
+        trie.insert(title, topic_id)
+    return trie
+
+def build_radix(titles):
+    trie = RadixTrie()
+    for topic_id, title in enumerate(titles):
+        trie.insert(title, topic_id)
+    return trie
+
+def build_frozen(titles):
+    return build_radix(titles).freeze()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--titles", type=int, default=200_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    args = parser.parse_args()
+
+    titles = generate_titles(args.titles)
+    rng = random.Random(7)
+    # Mix of short (broad) and long (selective) prefixes
+    prefixes = [rng.choice(titles)[: rng.randint(3, 20)] for _ in range(args.lookups)]
+
+    print(f"{args.titles} titles, {args.lookups} prefix lookups")
+    print(f"{'structure':<12}{'build s':>10}{'memory MB':>12}{'lookup us':>12}{'matches':>12}")
+    for name, factory in (("Trie", build_trie), ("RadixTrie", build_radix), ("FrozenTrie", build_frozen)):
+        index, build_time, memory = measure_build(factory, titles)
+        lookup_time, matched = measure_lookups(index, prefixes)
+        print(
+            f"{name:<12}{build_time:>10.2f}{memory / 1024 / 1024:>12.1f}"
+            f"{lookup_time / len(prefixes) * 1e6:>12.1f}{matched:>12}"
+        )
+        del index
+
+if __name__ == "__main__":
+    main()
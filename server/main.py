@@ -1,13 +1,53 @@
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from server.src.api.login import app as login_app
 from server.src.graphql.gql import app as graphql_app
+from server.src.search.topic_index import load_search_indexes, start_index_reconciler, refresh_invalidated_topics
+from server.src.db.search import ensure_search_schema
+from server.src.db import session
+from server.src.db.session import get_db
+from server.src.caching.trending import ensure_trending_scores
+from server.src.caching.invalidation import register_invalidation_handler, start_invalidation_listener
+from server.src.db.activity import ensure_topic_activity
+from server.src.db.availability import record_invalidated_names, reload_availability_filters
+from server.src.core.config import settings
 # from server.src.db.populate import populate_main
 # from server.src.rabbitmq.rmq import rmq_main
+# from server.src.caching.precompute import precompute_main
 # from server.src.rabbitmq.notification import example_notification_workflow
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.SEARCH_BACKEND == "sql":
+        session.setup_db()
+        ensure_search_schema(session.engine)
+    else:
+        # Build the search index once and keep it in sync in the background
+        load_search_indexes(use_snapshot=True)
+        start_index_reconciler()
+        # Apply topic changes made by other workers without waiting for the reconciler
+        register_invalidation_handler(refresh_invalidated_topics)
+    try:
+        # Backfills the comment activity rollup on first start; the precompute leader compacts it
+        ensure_topic_activity()
+    except Exception as e:
+        # Comments keep the rollup current; the next start retries the backfill
+        print(f"Error backfilling comment activity: {e}")
+    try:
+        with next(get_db()) as db:
+            ensure_trending_scores(db)
+    except Exception as e:
+        # Trending falls back to SQL until the sorted sets exist
+        print(f"Error building trending scores: {e}")
+    # Loads the availability filters on subscribing, and reloads them if events may have been missed
+    register_invalidation_handler(record_invalidated_names, reload_availability_filters)
+    # Evicts this worker's in-process caches when other workers change what they hold
+    start_invalidation_listener()
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,5 +65,6 @@ if __name__ == '__main__':
     uvicorn.run(app, host="0.0.0.0", port=8000)
     # populate_main()
     # rmq_main()
+    # precompute_main()
     # example_notification_workflow()
 
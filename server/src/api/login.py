@@ -1,12 +1,16 @@
+from typing import Optional
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from server.src.db.session import get_db
 from server.src.db import crud
+from server.src.db.availability import is_available, record_user_names, get_availability_stats
 from server.src.rabbitmq.notification import remove_user_notifications
 from server.src.caching.cleanup import clear_user_cache
+from server.src.caching.principal_cache import invalidate_principal
+from server.src.graphql.gql import collect_user_content, forget_user_content
 from server.src.utils.security import verify_password, create_access_token, decode_access_token
-from server.src.api.schemas import UserCreate, UserUpdate, UserResponse, Token
+from server.src.api.schemas import UserCreate, UserUpdate, UserResponse, Token, AvailabilityResponse
 from server.src.rabbitmq.rmq import publish_message
 from server.src.rabbitmq.schemas import NotificationMessage
 
@@ -34,6 +38,7 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Email already registered")
 
     new_user = crud.create_user(db=db, username=user.username, email=user.email, password=user.password)
+    record_user_names(new_user.username, new_user.email)
 
     # Publish a RabbitMQ notification
     message = NotificationMessage(user_id=new_user.id, message="New user registered")
@@ -55,7 +60,29 @@ def read_user_me(current_user: UserResponse = Depends(get_current_user)):
 
 @app.put("/users/me", response_model=UserResponse)
 def update_user_me(user_update: UserUpdate, db: Session = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
-    return crud.update_user(db=db, user_id=current_user.id, **user_update.dict(exclude_unset=True))
+    user = crud.update_user(db=db, user_id=current_user.id, **user_update.dict(exclude_unset=True))
+    invalidate_principal(current_user.id)
+    record_user_names(user_update.username, user_update.email)
+    return user
+
+@app.get("/availability", response_model=AvailabilityResponse)
+def check_availability(username: Optional[str] = None, email: Optional[str] = None):
+    """
+    Whether a username and/or email are still free, for validating a signup form as it is typed.
+    """
+    if username is None and email is None:
+        raise HTTPException(status_code=400, detail="Pass a username or an email")
+    return AvailabilityResponse(
+        username=is_available("username", username) if username is not None else None,
+        email=is_available("email", email) if email is not None else None,
+    )
+
+@app.get("/availability/stats")
+def availability_stats(current_user: UserResponse = Depends(get_current_user)):
+    """
+    Availability check counters and false positive rates, for signed-in users only.
+    """
+    return get_availability_stats()
 
 @app.delete("/users/me", response_model=UserResponse)
 def delete_user_me(db: Session = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
@@ -65,15 +92,21 @@ def delete_user_me(db: Session = Depends(get_db), current_user: UserResponse = D
     # Clear user-related cache from Redis
     clear_user_cache(current_user.id)
     
-    # Delete the user and all related data
+    # Delete the user and all related data, remembering what the cascade removes
+    content = collect_user_content(db, current_user.id)
     crud.delete_user(db=db, user_id=current_user.id)
+    forget_user_content(content)
+    # Requests authorized between the purge above and the delete may have cached the user again
+    invalidate_principal(current_user.id)
     return current_user
 
 @app.put("/users/me/password", response_model=UserResponse)
 def update_password(current_password: str, new_password: str, db: Session = Depends(get_db), current_user: UserResponse = Depends(get_current_user)):
     if not verify_password(current_password, current_user.password_hash):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
-    return crud.update_user_password(db=db, user_id=current_user.id, password=new_password)
+    user = crud.update_user_password(db=db, user_id=current_user.id, password=new_password)
+    invalidate_principal(current_user.id)
+    return user
 
 def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
     payload = decode_access_token(token)
@@ -25,6 +25,10 @@ class UserResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class AvailabilityResponse(BaseModel):
+    username: Optional[bool] = None
+    email: Optional[bool] = None
+
 class Token(BaseModel):
     access_token: str
     token_type: str
\ No newline at end of file
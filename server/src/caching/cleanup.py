@@ -1,15 +1,65 @@
 from server.src.caching.connector import get_redis_connection
 
+# Every cache key holding data for one user is recorded in that user's index set
+# when it is written, so clearing a user's cache deletes exactly those keys,
+# without scanning the keyspace. The set expires with the longest-lived key
+# recorded in it; members whose keys expired earlier are harmless, as deleting a
+# missing key is a no-op.
+
+USER_KEYS_KEY = "user:{user_id}:keys"
+UNLINK_BATCH_SIZE = 500
+
+# Read the index and delete its members and itself in one atomic step, so a key
+# tracked meanwhile cannot lose its index entry while staying in Redis. UNLINK
+# frees the memory in the background, so large values do not block Redis.
+PURGE_USER_KEYS_SCRIPT = """
+local keys = redis.call('SMEMBERS', KEYS[1])
+local batch = tonumber(ARGV[1])
+for i = 1, #keys, batch do
+    redis.call('UNLINK', unpack(keys, i, math.min(i + batch - 1, #keys)))
+end
+redis.call('UNLINK', KEYS[1])
+return #keys
+"""
+
+def user_keys_key(user_id: int):
+    return USER_KEYS_KEY.format(user_id=user_id)
+
+def track_user_key(pipe, user_id: int, key: str, ttl: int):
+    """
+    Queue the commands recording key, written with the given ttl, in the user's index set.
+    """
+    index = user_keys_key(user_id)
+    pipe.sadd(index, key)
+    # NX sets the first expiry, GT only ever extends it
+    pipe.expire(index, ttl, nx=True)
+    pipe.expire(index, ttl, gt=True)
+
+def cache_user_value(user_id: int, key: str, value, ttl: int):
+    """
+    SET key to value for ttl seconds and record it in the user's index set, in one round trip.
+    """
+    redis_client = get_redis_connection()
+    try:
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.set(key, value, ex=ttl)
+        track_user_key(pipe, user_id, key, ttl)
+        pipe.execute()
+    finally:
+        redis_client.close()
+
 def clear_user_cache(user_id: int):
     """
     Clear all Redis cache related to a specific user.
     """
     try:
         redis_client = get_redis_connection()
-        keys = redis_client.keys(f"user:{user_id}:*")
-        for key in keys:
-            redis_client.delete(key)
+        try:
+            purge = redis_client.register_script(PURGE_USER_KEYS_SCRIPT)
+            purge(keys=[user_keys_key(user_id)], args=[UNLINK_BATCH_SIZE])
+        finally:
+            redis_client.close()
         print(f"Cleared Redis cache for user {user_id}")
     except Exception as e:
         print(f"Error clearing Redis cache for user {user_id}: {e}")
-        raise
\ No newline at end of file
+        raise
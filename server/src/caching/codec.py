@@ -0,0 +1,69 @@
+import json
+import zlib
+from server.src.core.config import settings
+
+try:
+    import msgpack
+except ImportError:  # Cached values are written as JSON instead
+    msgpack = None
+
+# Binary encoding of cached resolver payloads.
+#
+# Every value starts with two header bytes: the schema version of the cached
+# payloads, then the codec it was written with. Bumping CACHE_SCHEMA_VERSION when
+# the shape of cached data changes turns every older value into a miss instead
+# of a crash, and values written before this module (plain JSON, which starts
+# with '{' or '[') are misses too. The codec byte lets workers configured with
+# different CACHE_CODEC settings read each other's values during a rollout.
+
+CACHE_SCHEMA_VERSION = 2  # 2: cached topics carry updated_at and view_count
+
+JSON = 0
+MSGPACK = 1
+COMPRESSED = 0x80  # Flag on the codec byte: the body is zlib-compressed
+
+class CacheFormatError(ValueError):
+    """
+    A cached value this code cannot read: another schema version, an unknown
+    codec or a corrupt body. Callers treat it as a cache miss.
+    """
+
+def _codec():
+    if settings.CACHE_CODEC == "msgpack" and msgpack is not None:
+        return MSGPACK
+    return JSON
+
+def encode_cache_value(value) -> bytes:
+    """
+    Serialize JSON-compatible data for the cache, compressing bodies of at least
+    CACHE_COMPRESS_MIN_BYTES (0 disables compression).
+    """
+    codec = _codec()
+    if codec == MSGPACK:
+        body = msgpack.packb(value, use_bin_type=True)
+    else:
+        body = json.dumps(value, separators=(",", ":")).encode()
+    threshold = settings.CACHE_COMPRESS_MIN_BYTES
+    if threshold and len(body) >= threshold:
+        compressed = zlib.compress(body, 1)
+        if len(compressed) < len(body):
+            codec, body = codec | COMPRESSED, compressed
+    return bytes((CACHE_SCHEMA_VERSION, codec)) + body
+
+def decode_cache_value(raw: bytes):
+    """
+    Inverse of encode_cache_value. Raises CacheFormatError for values it cannot read.
+    """
+    if len(raw) < 2 or raw[0] != CACHE_SCHEMA_VERSION:
+        raise CacheFormatError("cached value has another schema version")
+    codec, body = raw[1], raw[2:]
+    try:
+        if codec & COMPRESSED:
+            codec, body = codec & ~COMPRESSED, zlib.decompress(body)
+        if codec == MSGPACK and msgpack is not None:
+            return msgpack.unpackb(body, raw=False)
+        if codec == JSON:
+            return json.loads(body)
+    except Exception as e:
+        raise CacheFormatError(f"corrupt cached value: {e}") from e
+    raise CacheFormatError(f"unsupported cache codec {codec}")
@@ -1,17 +1,136 @@
+import threading
+import time
 import redis
+from redis.connection import BlockingConnectionPool
 from server.src.core.config import settings
 
+# One connection pool per process, shared by every client get_redis_connection
+# returns, so a request borrows an open connection instead of connecting and
+# disconnecting. Closing such a client only returns its connection to the pool.
+# When all REDIS_POOL_SIZE connections are busy, callers wait up to
+# REDIS_POOL_TIMEOUT_SECONDS for one to be released.
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """
+    A blocking pool that counts connections handed out, waits for a free
+    connection and failures to get one.
+    """
+    def reset(self):
+        # Also runs from __init__ and after a fork, when the counts start over
+        self._stats_lock = threading.Lock()
+        self._checked_out = set()
+        self._acquired = 0
+        self._waits = 0
+        self._wait_seconds = 0.0
+        self._errors = 0
+        super().reset()
+
+    def get_connection(self, command_name, *keys, **options):
+        # Every connection is checked out when the queue has neither idle connections nor free slots
+        waited = self.pool.empty()
+        start = time.perf_counter()
+        try:
+            connection = super().get_connection(command_name, *keys, **options)
+        except Exception:
+            with self._stats_lock:
+                self._errors += 1
+                if waited:
+                    self._waits += 1
+            raise
+        with self._stats_lock:
+            self._checked_out.add(id(connection))
+            self._acquired += 1
+            if waited:
+                self._waits += 1
+                self._wait_seconds += time.perf_counter() - start
+        return connection
+
+    def release(self, connection):
+        # Also called by get_connection for a connection that failed to connect
+        with self._stats_lock:
+            self._checked_out.discard(id(connection))
+        super().release(connection)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "max_connections": self.max_connections,
+                "created": len(self._connections),
+                "in_use": len(self._checked_out),
+                "acquired": self._acquired,
+                "waits": self._waits,
+                "wait_seconds": self._wait_seconds,
+                "errors": self._errors,
+            }
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_connection_pool():
+    """
+    The process-wide pool, created on first use from the REDIS_* settings.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = InstrumentedConnectionPool.from_url(
+                    settings.REDIS_URL,
+                    max_connections=settings.REDIS_POOL_SIZE,
+                    timeout=settings.REDIS_POOL_TIMEOUT_SECONDS,
+                    socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+                    socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+                    health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL_SECONDS,
+                )
+    return _pool
+
 def get_redis_connection():
     """
-    Establish a Redis connection using the URL from settings.
-    
+    Get a Redis client backed by the shared connection pool.
+
     Returns:
-        redis.Redis: A Redis client connection
+        redis.Redis: A Redis client; close() returns its connection to the pool
     """
     try:
-        # Use from_url to create Redis connection from the REDIS_URL
-        return redis.from_url(settings.REDIS_URL)
+        return redis.Redis(connection_pool=get_connection_pool())
     except Exception as e:
         # Add proper logging in a production environment
         print(f"Redis connection error: {e}")
-        raise
\ No newline at end of file
+        raise
+
+def get_redis_pool_stats():
+    """
+    Counters of this process's connection pool, for monitoring: connections
+    created and in use, how often callers had to wait for one and for how
+    long in total, and how often getting one failed.
+    """
+    return get_connection_pool().stats()
+
+def run_pipeline(queue, transaction=False):
+    """
+    Queue commands on a pipeline with queue(pipe) and send them in one round
+    trip on a pooled connection. Returns their results in order.
+    """
+    redis_client = get_redis_connection()
+    try:
+        pipe = redis_client.pipeline(transaction=transaction)
+        queue(pipe)
+        return pipe.execute()
+    finally:
+        redis_client.close()
+
+def get_many(keys, batch_size=500):
+    """
+    Values of many string keys as a list in key order, None for missing keys,
+    fetched with one MGET per batch_size keys, all in one round trip.
+    """
+    keys = list(keys)
+    if not keys:
+        return []
+
+    def queue(pipe):
+        for start in range(0, len(keys), batch_size):
+            pipe.mget(keys[start:start + batch_size])
+
+    batches = run_pipeline(queue)
+    return [value for batch in batches for value in batch]
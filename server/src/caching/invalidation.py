@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+import uuid
+from server.src.caching.connector import get_redis_connection
+from server.src.core.config import settings
+
+# Invalidation bus keeping the in-process caches of every worker coherent.
+#
+# A mutation publishes the tags it changed, such as "topic:42" or "user:7", on
+# CACHE_INVALIDATION_CHANNEL. Every worker subscribes on a background thread and
+# passes the tags of events from other processes to its registered handlers,
+# which evict their local entries; the publishing process has already done so.
+#
+# Pub/sub delivers at most once: events published while a worker is not
+# subscribed are lost. Handlers therefore also get a reset call whenever the
+# subscription is (re)established, and local caches keep a short TTL as a bound.
+
+_handlers = []  # (invalidate, reset) pairs
+_handlers_lock = threading.Lock()
+_listener = None
+_listener_lock = threading.Lock()
+
+def _new_origin():
+    global _origin
+    _origin = uuid.uuid4().hex
+
+_new_origin()
+# A forked worker must not ignore events published by its parent
+os.register_at_fork(after_in_child=_new_origin)
+
+def register_invalidation_handler(invalidate, reset=None):
+    """
+    Call invalidate(tags) with the tags of every event another process publishes,
+    and reset() whenever events may have been missed.
+    """
+    with _handlers_lock:
+        _handlers.append((invalidate, reset))
+
+def _message(tags):
+    return json.dumps({"origin": _origin, "tags": list(tags)}, separators=(",", ":"))
+
+def queue_invalidation(pipe, tags):
+    """
+    Queue the PUBLISH of an invalidation event on a pipeline, so it goes out in the
+    same round trip as the writes it accompanies.
+    """
+    pipe.publish(settings.CACHE_INVALIDATION_CHANNEL, _message(tags))
+
+def publish_invalidation(*tags):
+    """
+    Tell the other processes to drop their local entries for the tags.
+    """
+    if not tags:
+        return
+    try:
+        redis_client = get_redis_connection()
+        try:
+            redis_client.publish(settings.CACHE_INVALIDATION_CHANNEL, _message(tags))
+        finally:
+            redis_client.close()
+    except Exception as e:
+        print(f"Error publishing cache invalidation {tags}: {e}")
+
+def _call_handlers(index, *args):
+    with _handlers_lock:
+        handlers = [pair[index] for pair in _handlers if pair[index] is not None]
+    for handler in handlers:
+        try:
+            handler(*args)
+        except Exception as e:
+            print(f"Error handling cache invalidation: {e}")
+
+def _dispatch(data):
+    try:
+        event = json.loads(data)
+    except ValueError as e:
+        print(f"Ignoring malformed cache invalidation {data!r}: {e}")
+        return
+    if event.get("origin") != _origin and event.get("tags"):
+        _call_handlers(0, event["tags"])
+
+def _listen_forever(stop, retry_seconds):
+    while not stop.is_set():
+        redis_client = pubsub = None
+        try:
+            redis_client = get_redis_connection()
+            pubsub = redis_client.pubsub()
+            pubsub.subscribe(settings.CACHE_INVALIDATION_CHANNEL)
+            while not stop.is_set():
+                # Polls so that the thread notices stop; the wait is shorter than the socket timeout
+                message = pubsub.get_message(timeout=1.0)
+                if message is None:
+                    continue
+                if message["type"] == "subscribe":
+                    _call_handlers(1)
+                elif message["type"] == "message":
+                    _dispatch(message["data"])
+        except Exception as e:
+            print(f"Cache invalidation listener error, resubscribing: {e}")
+            stop.wait(retry_seconds)
+        finally:
+            if pubsub is not None:
+                pubsub.close()
+            if redis_client is not None:
+                redis_client.close()
+
+def start_invalidation_listener(stop=None, retry_seconds=1.0):
+    """
+    Start the daemon thread applying other processes' invalidations, once per process.
+
+    Args:
+        stop (threading.Event): Set it to end the thread.
+        retry_seconds (float): Pause before resubscribing after an error.
+    """
+    global _listener
+    with _listener_lock:
+        if _listener is None or not _listener.is_alive():
+            _listener = threading.Thread(
+                target=_listen_forever, args=(stop or threading.Event(), retry_seconds), daemon=True
+            )
+            _listener.start()
+        return _listener
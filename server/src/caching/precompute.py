@@ -0,0 +1,128 @@
+import threading
+import time
+import uuid
+from server.src.caching.connector import get_redis_connection
+from server.src.caching.stampede import prime_cached_values
+from server.src.core.config import settings
+from server.src.db.activity import compact_topic_activity
+from server.src.db.models import Topic
+from server.src.db.session import get_db
+from server.src.db import trending as db_trending
+from server.src.graphql.schema import topic_fields
+
+# Background precompute of expensive aggregates, so resolvers only read them.
+#
+# Run one worker per replica next to the API server:
+#
+#     python -m server.src.caching.precompute
+#
+# Every worker wakes up each PRECOMPUTE_INTERVAL_SECONDS, but only the holder of
+# a Redis lease does any work. The leader renews its lease on every run; if it
+# dies, the lease expires and the next worker to wake up takes over. Cached
+# values outlive several intervals, so a failover never leaves readers empty,
+# and a value that is missing anyway is still computed inline by the resolver.
+
+LEADER_KEY = "precompute:leader"
+TRENDING_CACHE_TTL_SECONDS = 3600
+
+# Extend the lease only while it still holds our token
+RENEW_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+def trending_cache_key(time_window, max_topics):
+    return f"trending_topics:{time_window}:{max_topics}"
+
+def precompute_trending_pages():
+    """
+    Score every window in TRENDING_BATCH_WINDOWS_DAYS in one pass and cache a page
+    for each size in TRENDING_BATCH_MAX_TOPICS. Returns the pages by cache key.
+    """
+    windows = settings.TRENDING_BATCH_WINDOWS_DAYS
+    sizes = settings.TRENDING_BATCH_MAX_TOPICS
+    with next(get_db()) as db:
+        ranked = db_trending.get_trending_topics_batch(db, windows, max(sizes))
+        topic_ids = {topic_id for rows in ranked.values() for topic_id, _ in rows}
+        topics = {topic.id: topic_fields(topic) for topic in db.query(Topic).filter(Topic.id.in_(topic_ids))}
+
+    pages = {}
+    for window, rows in ranked.items():
+        # Topics deleted since they were scored are dropped
+        page = [topics[topic_id] for topic_id, _ in rows if topic_id in topics]
+        for size in sizes:
+            pages[trending_cache_key(window, size)] = page[:size]
+    try:
+        prime_cached_values(pages, ttl=TRENDING_CACHE_TTL_SECONDS)
+    except Exception as e:
+        print(f"Error caching trending topics: {e}")
+    return pages
+
+def compact_activity():
+    with next(get_db()) as db:
+        compact_topic_activity(db)
+
+PRECOMPUTE_JOBS = (
+    ("trending pages", precompute_trending_pages),
+    ("activity compaction", compact_activity),
+)
+
+def hold_leadership(redis_client, token, lease_seconds):
+    """
+    Renew our lease, or take it if nobody holds it. Returns whether we are the leader.
+    """
+    lease_ms = int(lease_seconds * 1000)
+    if redis_client.register_script(RENEW_LEASE_SCRIPT)(keys=[LEADER_KEY], args=[token, lease_ms]):
+        return True
+    return bool(redis_client.set(LEADER_KEY, token, nx=True, px=lease_ms))
+
+def run_precompute_jobs():
+    for name, job in PRECOMPUTE_JOBS:
+        try:
+            job()
+        except Exception as e:
+            print(f"Error running precompute job {name}: {e}")
+
+def precompute_once(token, lease_seconds=None):
+    """
+    Run every job if this worker holds the lease. Returns whether it did.
+    """
+    lease_seconds = lease_seconds or settings.PRECOMPUTE_LEASE_SECONDS
+    redis_client = get_redis_connection()
+    try:
+        if not hold_leadership(redis_client, token, lease_seconds):
+            return False
+    finally:
+        redis_client.close()
+    run_precompute_jobs()
+    return True
+
+def _precompute_forever(interval, lease_seconds):
+    token = uuid.uuid4().hex
+    while True:
+        try:
+            precompute_once(token, lease_seconds)
+        except Exception as e:
+            print(f"Error in precompute scheduler: {e}")
+        time.sleep(interval)
+
+def start_precompute_scheduler(interval=None, lease_seconds=None):
+    """
+    Start the scheduler in a daemon thread of the current process.
+    """
+    interval = interval or settings.PRECOMPUTE_INTERVAL_SECONDS
+    lease_seconds = lease_seconds or settings.PRECOMPUTE_LEASE_SECONDS
+    thread = threading.Thread(target=_precompute_forever, args=(interval, lease_seconds), daemon=True)
+    thread.start()
+    return thread
+
+def precompute_main():
+    """
+    Run the scheduler in the foreground, as its own process.
+    """
+    _precompute_forever(settings.PRECOMPUTE_INTERVAL_SECONDS, settings.PRECOMPUTE_LEASE_SECONDS)
+
+if __name__ == "__main__":
+    precompute_main()
@@ -0,0 +1,151 @@
+from server.src.caching.cleanup import clear_user_cache, user_keys_key
+from server.src.caching.codec import CacheFormatError, decode_cache_value, encode_cache_value
+from server.src.caching.connector import get_redis_connection
+from server.src.caching.invalidation import publish_invalidation, register_invalidation_handler
+from server.src.caching.resolver_cache import LocalCache
+from server.src.core.config import settings
+
+# Cache of the authenticated user behind a token subject, so that resolvers
+# authorizing the same user many times per page do not each query the database.
+#
+# Entries are slim records, never ORM objects or password hashes, kept in a
+# local LRU in front of Redis like resolver results. The Redis entry is recorded
+# in the user's key index, so invalidate_principal finds it by user id even after
+# a username change, and the local copies are tagged user:<id> for the
+# invalidation bus.
+#
+# A miss is loaded from the database and then stored, so a load that read the
+# user before a change could store it after the change was invalidated. The
+# subject does not tell which user it belongs to until it is loaded, so like
+# local_principals Redis keeps one generation for all principals: readers take
+# it before loading, invalidate_principal increments it, and the store only
+# happens if it is unchanged. A load racing any invalidation is not stored.
+
+PRINCIPAL_KEY = "principal:{subject}"
+PRINCIPAL_GENERATION_KEY = "principal:generation"
+
+# SET the principal and record it in the user's key index, as cache_user_value
+# does, only if no invalidation happened since the reader took the generation
+STORE_PRINCIPAL_SCRIPT = """
+if (redis.call('GET', KEYS[1]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+redis.call('SADD', KEYS[3], KEYS[2])
+redis.call('EXPIRE', KEYS[3], ARGV[3], 'NX')
+redis.call('EXPIRE', KEYS[3], ARGV[3], 'GT')
+return 1
+"""
+
+class Principal:
+    """
+    The authenticated user as resolvers see it.
+    """
+    __slots__ = ("id", "username")
+
+    def __init__(self, id, username):
+        self.id = id
+        self.username = username
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username)
+
+local_principals = LocalCache(settings.RESOLVER_CACHE_LOCAL_SIZE)
+register_invalidation_handler(local_principals.invalidate, local_principals.clear)
+
+def principal_key(subject: str):
+    return PRINCIPAL_KEY.format(subject=subject)
+
+def _user_tag(user_id: int):
+    return f"user:{user_id}"
+
+def _read(key):
+    """
+    The cached Principal at key, or None, and the current principal generation.
+    """
+    redis_client = get_redis_connection()
+    try:
+        raw, generation = redis_client.mget([key, PRINCIPAL_GENERATION_KEY])
+    finally:
+        redis_client.close()
+    generation = int(generation or 0)
+    if raw is None:
+        return None, generation
+    try:
+        fields = decode_cache_value(raw)
+    except CacheFormatError:
+        return None, generation
+    return (Principal(**fields) if isinstance(fields, dict) else None), generation
+
+def _store(key, principal, generation, ttl):
+    """
+    Cache a loaded principal unless a principal was invalidated since generation was read.
+    """
+    redis_client = get_redis_connection()
+    try:
+        store = redis_client.register_script(STORE_PRINCIPAL_SCRIPT)
+        value = encode_cache_value({"id": principal.id, "username": principal.username})
+        return store(
+            keys=[PRINCIPAL_GENERATION_KEY, key, user_keys_key(principal.id)], args=[generation, value, ttl]
+        )
+    finally:
+        redis_client.close()
+
+def get_principal(subject: str, load):
+    """
+    The Principal for a token subject, from this process, Redis or, on a miss,
+    load(subject), which returns a Principal or None for unknown subjects.
+    Unknown subjects are not cached.
+    """
+    ttl = settings.PRINCIPAL_CACHE_TTL_SECONDS
+    if ttl <= 0:
+        return load(subject)
+    key = principal_key(subject)
+    cached = local_principals.get(key)
+    if cached is not None:
+        return cached[2]
+    generation = local_principals.generation
+
+    try:
+        principal, redis_generation = _read(key)
+    except Exception as e:
+        print(f"Error reading principal cache for {subject}: {e}")
+        principal = redis_generation = None
+    if principal is None:
+        principal = load(subject)
+        if principal is None:
+            return None
+        # Without the generation the store could not be checked, so it is skipped
+        if redis_generation is not None:
+            try:
+                _store(key, principal, redis_generation, ttl)
+            except Exception as e:
+                print(f"Error writing principal cache for {subject}: {e}")
+    local_principals.set(
+        key, principal, [_user_tag(principal.id)], min(ttl, settings.PRINCIPAL_CACHE_LOCAL_TTL_SECONDS), generation
+    )
+    return principal
+
+def invalidate_principal(user_id: int):
+    """
+    Drop the cached principal of a user everywhere, along with the rest of the
+    user's tracked cache entries. Call after the change to the user is committed.
+    """
+    tag = _user_tag(user_id)
+    local_principals.invalidate([tag])
+    try:
+        # Before the purge: a racing store either fails the generation check or is purged
+        redis_client = get_redis_connection()
+        try:
+            redis_client.incr(PRINCIPAL_GENERATION_KEY)
+        finally:
+            redis_client.close()
+    except Exception as e:
+        print(f"Error bumping principal generation: {e}")
+    try:
+        clear_user_cache(user_id)
+    except Exception:
+        # Already logged; the entry expires after PRINCIPAL_CACHE_TTL_SECONDS
+        pass
+    publish_invalidation(tag)
@@ -0,0 +1,206 @@
+from collections import OrderedDict
+import functools
+import hashlib
+import inspect
+import json
+import threading
+import time
+from server.src.caching.connector import get_redis_connection, run_pipeline
+from server.src.caching.cleanup import track_user_key
+from server.src.caching.codec import CacheFormatError, decode_cache_value, encode_cache_value
+from server.src.caching.invalidation import queue_invalidation, register_invalidation_handler
+from server.src.core.config import settings
+
+# Two-tier cache for read resolvers: a small LRU in each process in front of Redis.
+#
+# Every cached result depends on a few tags, such as "topics" or "topic:42", and
+# every tag has a version counter in Redis. A result is stored in Redis with the
+# versions of its tags as they were read before it was computed, and is a hit
+# only while they are still current; mutations INCR the tags they touch, as the
+# search cache does with topics:version. The versions are fetched in the same
+# round trip as the entry, so a hit costs one round trip.
+#
+# The local tier skips Redis entirely. Invalidations made in this process drop
+# local entries at once, those made elsewhere arrive over the invalidation bus;
+# entries still expire after RESOLVER_CACHE_LOCAL_TTL_SECONDS in case an event is lost.
+
+TAG_VERSION_KEY = "resolver_cache:tag:{tag}"
+ENTRY_KEY = "resolver_cache:{name}:{digest}"
+
+class LocalCache:
+    """
+    Thread-safe LRU of (value, tags) with a per-entry expiry.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()  # key -> (expires_at, tags, value)
+        self.generation = 0  # Bumped by every invalidation
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value, tags, ttl, generation=None):
+        """
+        Store a value, unless an invalidation happened since generation was read,
+        as the value may predate it.
+        """
+        if self.max_size <= 0 or ttl <= 0:
+            return
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            self.entries[key] = (time.monotonic() + ttl, frozenset(tags), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, tags):
+        tags = set(tags)
+        with self.lock:
+            self.generation += 1
+            for key in [key for key, (_, entry_tags, _) in self.entries.items() if entry_tags & tags]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+local_cache = LocalCache(settings.RESOLVER_CACHE_LOCAL_SIZE)
+register_invalidation_handler(local_cache.invalidate, local_cache.clear)
+
+def tag_version_key(tag):
+    return TAG_VERSION_KEY.format(tag=tag)
+
+def resolver_cache_key(name, arguments, user_id=None):
+    """
+    Key of one resolver call: the resolver name and a digest of its arguments
+    (and of the user, for per-user results), so long arguments stay short.
+    """
+    payload = json.dumps([user_id, arguments], sort_keys=True, default=str)
+    return ENTRY_KEY.format(name=name, digest=hashlib.sha1(payload.encode()).hexdigest())
+
+def invalidate_tags(*tags):
+    """
+    Drop every cached result depending on any of the tags, here, in Redis and in
+    the other processes. Call after the mutation that changes them is committed.
+    """
+    if not tags:
+        return
+    local_cache.invalidate(tags)
+    try:
+        redis_client = get_redis_connection()
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for tag in tags:
+                pipe.incr(tag_version_key(tag))
+            queue_invalidation(pipe, tags)
+            pipe.execute()
+        finally:
+            redis_client.close()
+    except Exception as e:
+        print(f"Error invalidating resolver cache tags {tags}: {e}")
+
+def _read(key, tags):
+    """
+    The Redis entry at key if it is still current, and the tag versions to store
+    a recomputed result with.
+    """
+    def queue(pipe):
+        pipe.get(key)
+        for tag in tags:
+            pipe.get(tag_version_key(tag))
+
+    raw, *versions = run_pipeline(queue)
+    versions = [int(version or 0) for version in versions]
+    if raw is not None:
+        try:
+            entry = decode_cache_value(raw)
+        except CacheFormatError:
+            entry = None
+        if isinstance(entry, dict) and entry.get("versions") == versions:
+            return entry, versions
+    return None, versions
+
+def _write(key, value, versions, ttl, user_id=None):
+    redis_client = get_redis_connection()
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.set(key, encode_cache_value({"versions": versions, "value": value}), ex=ttl)
+        if user_id is not None:
+            # Per-user results go when the user's cache is cleared
+            track_user_key(pipe, user_id, key, ttl)
+        pipe.execute()
+    finally:
+        redis_client.close()
+
+def cached_resolver(tags, dump, load, ttl=None, authenticate=None, per_user=False, name=None):
+    """
+    Cache a Strawberry resolver's results in the local LRU and in Redis.
+    Put it below @strawberry.field.
+
+    Args:
+        tags (callable): Called with the resolver's arguments by name, returns the
+            tags the result depends on, e.g. ["topic:42"].
+        dump (callable): Turns the resolver's return value into JSON-serializable data.
+        load (callable): Turns that data back into the value to return.
+        ttl (int): Seconds a result stays in Redis. Defaults to RESOLVER_CACHE_TTL_SECONDS.
+        authenticate (callable): Called with info before every lookup, hits
+            included; it should raise for unauthorized requests.
+        per_user (bool): Cache separately for each user, identified by the id of
+            what authenticate returns.
+        name (str): Name in the cache keys. Defaults to the function name.
+    """
+    def decorator(resolver):
+        signature = inspect.signature(resolver)
+        cache_name = name or resolver.__name__
+
+        @functools.wraps(resolver)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {
+                argument: value for argument, value in bound.arguments.items() if argument not in ("self", "info")
+            }
+            user = authenticate(bound.arguments["info"]) if authenticate else None
+            user_id = user.id if per_user else None
+            key = resolver_cache_key(cache_name, arguments, user_id)
+            dependencies = list(tags(**arguments))
+            entry_ttl = settings.RESOLVER_CACHE_TTL_SECONDS if ttl is None else ttl
+
+            cached = local_cache.get(key)
+            if cached is not None:
+                return load(cached[2])
+            generation = local_cache.generation
+
+            versions = None
+            try:
+                entry, versions = _read(key, dependencies)
+            except Exception as e:
+                print(f"Error reading resolver cache for {cache_name}: {e}")
+                entry = None
+            if entry is not None:
+                local_cache.set(
+                    key, entry["value"], dependencies, settings.RESOLVER_CACHE_LOCAL_TTL_SECONDS, generation
+                )
+                return load(entry["value"])
+
+            value = dump(resolver(*args, **kwargs))
+            if versions is not None:
+                try:
+                    _write(key, value, versions, entry_ttl, user_id)
+                except Exception as e:
+                    print(f"Error writing resolver cache for {cache_name}: {e}")
+                # Only kept locally when it could be stamped with the versions it was computed under
+                local_cache.set(key, value, dependencies, settings.RESOLVER_CACHE_LOCAL_TTL_SECONDS, generation)
+            return load(value)
+        return wrapper
+    return decorator
@@ -0,0 +1,124 @@
+import json
+from server.src.caching.connector import get_redis_connection
+from server.src.caching.codec import CacheFormatError, decode_cache_value, encode_cache_value
+from server.src.core.config import settings
+from server.src.utils.bitmap_index import normalize_tag
+
+# Cached search_topics pages. Every key embeds the current topics version, so a
+# topic mutation only has to INCR the counter: readers move on to fresh keys and
+# the old ones expire on their own, without scanning for them.
+#
+# Other workers apply the change to their own indexes only when its invalidation
+# event reaches them, and may cache pages from their stale indexes under the new
+# version until then. Mutations that bump the version therefore also publish
+# SEARCH_INDEX_TAG, and each worker bumps the version again once it has applied
+# the change, retiring whatever it cached meanwhile.
+
+TOPICS_VERSION_KEY = "topics:version"
+SEARCH_INDEX_TAG = "search_index"
+SEARCH_CACHE_STATS_KEY = "search_cache:stats"
+
+def normalize_search_query(query, mode):
+    """
+    Fold queries that always return the same results onto one cache key.
+    Matching is case-insensitive in every mode, and WORD mode also ignores spacing.
+    """
+    query = query.lower()
+    if mode == "word":
+        return " ".join(query.split())
+    return query
+
+def search_cache_key(version, query, mode, ranking, max_edits, limit, offset, tags=None, match_all_tags=True):
+    if mode != "fuzzy":
+        max_edits = 0
+    tag_filter = ""
+    if tags:
+        tag_filter = ("all" if match_all_tags else "any") + json.dumps(sorted({normalize_tag(name) for name in tags}))
+    return (
+        f"search:{version}:{mode}:{ranking}:{max_edits}:{limit}:{offset}:{tag_filter}:"
+        f"{normalize_search_query(query, mode)}"
+    )
+
+def cached_search(query, mode, ranking, max_edits, limit, offset, compute, tags=None, match_all_tags=True):
+    """
+    Return the cached results for a search page, or call compute() and cache what it returns.
+    compute must return JSON-serializable data; see server.src.caching.codec. Falls back to compute() if Redis is unavailable.
+    """
+    if settings.SEARCH_CACHE_TTL_SECONDS <= 0:
+        return compute()
+    try:
+        redis_client = get_redis_connection()
+    except Exception:
+        return compute()
+
+    try:
+        try:
+            version = int(redis_client.get(TOPICS_VERSION_KEY) or 0)
+            key = search_cache_key(version, query, mode, ranking, max_edits, limit, offset, tags, match_all_tags)
+            cached = redis_client.get(key)
+        except Exception as e:
+            print(f"Error reading search cache: {e}")
+            return compute()
+
+        if cached is not None:
+            try:
+                results = decode_cache_value(cached)
+            except CacheFormatError:
+                # Written by another schema version: recomputed and overwritten below
+                pass
+            else:
+                try:
+                    redis_client.hincrby(SEARCH_CACHE_STATS_KEY, "hits", 1)
+                except Exception as e:
+                    print(f"Error updating search cache stats: {e}")
+                return results
+
+        # Results computed against a version that is bumped meanwhile are stored
+        # under the old key, which no reader looks up any more
+        results = compute()
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.hincrby(SEARCH_CACHE_STATS_KEY, "misses", 1)
+            pipe.setex(key, settings.SEARCH_CACHE_TTL_SECONDS, encode_cache_value(results))
+            pipe.execute()
+        except Exception as e:
+            print(f"Error writing search cache: {e}")
+        return results
+    finally:
+        redis_client.close()
+
+def bump_topics_version():
+    """
+    Invalidate every cached search page. Call after a topic or tag change is
+    committed and applied to the search indexes, and publish SEARCH_INDEX_TAG
+    with its invalidation event.
+    """
+    try:
+        redis_client = get_redis_connection()
+        try:
+            redis_client.incr(TOPICS_VERSION_KEY)
+        finally:
+            redis_client.close()
+    except Exception as e:
+        print(f"Error bumping topics version: {e}")
+
+def get_search_cache_stats():
+    """
+    Hit and miss counts since the counters were last reset, for tuning SEARCH_CACHE_TTL_SECONDS.
+    """
+    redis_client = get_redis_connection()
+    try:
+        stats = redis_client.hgetall(SEARCH_CACHE_STATS_KEY)
+    finally:
+        redis_client.close()
+    hits = int(stats.get(b"hits", 0))
+    misses = int(stats.get(b"misses", 0))
+    total = hits + misses
+    return {"hits": hits, "misses": misses, "hit_rate": hits / total if total else 0.0}
+
+def reset_search_cache_stats():
+    redis_client = get_redis_connection()
+    try:
+        redis_client.delete(SEARCH_CACHE_STATS_KEY)
+    finally:
+        redis_client.close()
@@ -0,0 +1,168 @@
+import random
+import threading
+import time
+import uuid
+from server.src.caching.connector import get_redis_connection
+from server.src.caching.codec import CacheFormatError, decode_cache_value, encode_cache_value
+
+# Stampede protection for expensive cached values.
+#
+# Each value is stored with the time it should be refreshed. The first request
+# past that time takes a short Redis lock and recomputes in the background;
+# every other request, in this worker or another, keeps getting the current
+# value meanwhile. The refresh time is jittered ahead of the expiry so keys
+# written together do not all come due together, and the Redis key lives on
+# for stale_ttl past expiry so that a slow refresh never leaves a gap.
+# Only a cold key makes requests wait, and then just one of them computes.
+
+LOCK_SUFFIX = ":lock"
+WAIT_INTERVAL_SECONDS = 0.05
+
+# Delete the lock only if it still holds our token, so an expired lock that
+# another worker has since taken is never released by us
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+def _acquire_lock(redis_client, key, timeout):
+    token = uuid.uuid4().hex
+    if redis_client.set(key + LOCK_SUFFIX, token, nx=True, px=int(timeout * 1000)):
+        return token
+    return None
+
+def _release_lock(redis_client, key, token):
+    try:
+        redis_client.register_script(RELEASE_LOCK_SCRIPT)(keys=[key + LOCK_SUFFIX], args=[token])
+    except Exception as e:
+        # The lock expires on its own after lock_timeout
+        print(f"Error releasing cache lock for {key}: {e}")
+
+def _entry(value, ttl, refresh_ahead):
+    return encode_cache_value({
+        "value": value,
+        "refresh_at": time.time() + ttl - random.uniform(0, refresh_ahead * ttl),
+    })
+
+def _store(redis_client, key, value, ttl, stale_ttl, refresh_ahead):
+    redis_client.set(key, _entry(value, ttl, refresh_ahead), ex=int(ttl + stale_ttl))
+
+def _load(redis_client, key):
+    raw = redis_client.get(key)
+    if raw is None:
+        return None
+    try:
+        entry = decode_cache_value(raw)
+    except CacheFormatError:
+        # Written by plain SETEX caching before this module, or by another schema version
+        return None
+    return entry if isinstance(entry, dict) and "refresh_at" in entry else None
+
+def _refresh(key, compute, ttl, stale_ttl, refresh_ahead, token):
+    try:
+        redis_client = get_redis_connection()
+    except Exception as e:
+        print(f"Error refreshing cache key {key}: {e}")
+        return
+    try:
+        _store(redis_client, key, compute(), ttl, stale_ttl, refresh_ahead)
+    except Exception as e:
+        print(f"Error refreshing cache key {key}: {e}")
+    finally:
+        _release_lock(redis_client, key, token)
+        redis_client.close()
+
+def cached_compute(key, compute, ttl, stale_ttl=None, refresh_ahead=0.1, lock_timeout=30):
+    """
+    Return the cached value at key, computing it with compute() when missing.
+    compute must return JSON-serializable data; see server.src.caching.codec.
+
+    Args:
+        ttl (int): Seconds a value is fresh.
+        stale_ttl (int): Seconds a stale value may still be served while it is
+            being refreshed. Defaults to ttl.
+        refresh_ahead (float): Fraction of ttl before expiry within which the
+            refresh is randomly scheduled.
+        lock_timeout (int): Seconds before an abandoned refresh lock expires.
+            Requests for a cold key wait at most this long for another worker.
+    """
+    stale_ttl = ttl if stale_ttl is None else stale_ttl
+    try:
+        redis_client = get_redis_connection()
+    except Exception:
+        return compute()
+
+    try:
+        try:
+            entry = _load(redis_client, key)
+        except Exception as e:
+            print(f"Error reading cache key {key}: {e}")
+            return compute()
+
+        if entry is not None:
+            if time.time() >= entry["refresh_at"]:
+                try:
+                    token = _acquire_lock(redis_client, key, lock_timeout)
+                except Exception as e:
+                    print(f"Error locking cache key {key}: {e}")
+                    token = None
+                if token is not None:
+                    threading.Thread(
+                        target=_refresh,
+                        args=(key, compute, ttl, stale_ttl, refresh_ahead, token),
+                        daemon=True,
+                    ).start()
+            return entry["value"]
+
+        # Cold key: one request computes, the rest wait for its result
+        deadline = time.time() + lock_timeout
+        while True:
+            try:
+                token = _acquire_lock(redis_client, key, lock_timeout)
+            except Exception as e:
+                print(f"Error locking cache key {key}: {e}")
+                return compute()
+            if token is not None:
+                try:
+                    # Another request may have stored the value just before we got the lock
+                    entry = _load(redis_client, key)
+                    if entry is not None:
+                        return entry["value"]
+                    value = compute()
+                    try:
+                        _store(redis_client, key, value, ttl, stale_ttl, refresh_ahead)
+                    except Exception as e:
+                        print(f"Error writing cache key {key}: {e}")
+                    return value
+                finally:
+                    _release_lock(redis_client, key, token)
+            time.sleep(WAIT_INTERVAL_SECONDS)
+            try:
+                entry = _load(redis_client, key)
+            except Exception as e:
+                print(f"Error reading cache key {key}: {e}")
+                return compute()
+            if entry is not None:
+                return entry["value"]
+            if time.time() >= deadline:
+                # The lock holder is stuck; do not block this request any longer
+                return compute()
+    finally:
+        redis_client.close()
+
+def prime_cached_values(values, ttl, stale_ttl=None, refresh_ahead=0.1):
+    """
+    Store several values computed together, as cached_compute would have stored
+    each of them, in one round trip. values maps keys to JSON-serializable data.
+    """
+    stale_ttl = ttl if stale_ttl is None else stale_ttl
+    redis_client = get_redis_connection()
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for key, value in values.items():
+            pipe.set(key, _entry(value, ttl, refresh_ahead), ex=int(ttl + stale_ttl))
+        pipe.execute()
+    finally:
+        redis_client.close()
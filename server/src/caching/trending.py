@@ -0,0 +1,352 @@
+from collections import defaultdict
+from datetime import datetime
+import heapq
+import math
+from server.src.caching.cleanup import cache_user_value
+from server.src.caching.codec import CacheFormatError, decode_cache_value, encode_cache_value
+from server.src.caching.connector import get_redis_connection
+from server.src.core.config import settings
+from server.src.db.models import Topic, Comment, Tag, topic_tags
+from server.src.utils.bitmap_index import normalize_tag
+
+# Trending topics kept in Redis sorted sets, one per window in TRENDING_WINDOWS_DAYS.
+#
+# Each event (a topic being created, a comment being posted) adds weight * 2^(t / half_life)
+# to its topic's score, with the window as the half-life. Every score decays at the
+# same rate, so decay never changes the order and the scores never need rescoring;
+# only the growth of 2^(t / half_life) would overflow, which is why the sets store
+# the natural log of the score and the Lua script adds events with logaddexp.
+#
+# Each tag has its own sets, holding the same scores for just the topics carrying
+# it, updated by the same script call as the global sets. A personalized feed is
+# the global list merged with the lists of a few of the user's tags.
+
+TRENDING_KEY = "trending:{days}d"
+TAG_TRENDING_KEY = "trending:{days}d:tag:{tag}"
+# Tags that have sorted sets, so that a rebuild can drop the ones no longer in use
+TRENDING_TAGS_KEY = "trending:tags"
+# A user's feed tags, cached in the user's key index, and the version they must carry to be used
+USER_TAGS_KEY = "trending:user_tags:{user_id}"
+USER_TAGS_VERSION_KEY = "trending:user_tags:{user_id}:version"
+COMMENT_WEIGHT = 2  # Matches the weight of a recent comment in the SQL scoring
+TOPIC_WEIGHT = 3  # Matches the weight of a brand new topic in the SQL scoring
+# Scores are measured from here to keep the logs small
+SCORE_EPOCH = datetime(2025, 1, 1)
+
+# KEYS: the sorted sets to update. ARGV: member, +1 to add or -1 to remove an event,
+# then for each set in KEYS order the log of the event's contribution to it and the
+# number of members to trim it to. A topic trimmed out starts again from its next
+# event, which is all it would have been ranked on anyway.
+UPDATE_SCORE_SCRIPT = """
+local member = ARGV[1]
+local sign = tonumber(ARGV[2])
+for i, key in ipairs(KEYS) do
+    local delta = tonumber(ARGV[2 * i + 1])
+    local keep = tonumber(ARGV[2 * i + 2])
+    local current = redis.call('ZSCORE', key, member)
+    if sign > 0 then
+        if current then
+            current = tonumber(current)
+            local high = math.max(current, delta)
+            redis.call('ZADD', key, high + math.log(1 + math.exp(math.min(current, delta) - high)), member)
+        else
+            redis.call('ZADD', key, delta, member)
+        end
+        redis.call('ZREMRANGEBYRANK', key, 0, -keep - 1)
+    elseif current then
+        current = tonumber(current)
+        local remaining = 1 - math.exp(delta - current)
+        if remaining <= 1e-9 then
+            redis.call('ZREM', key, member)
+        else
+            redis.call('ZADD', key, current + math.log(remaining), member)
+        end
+    end
+end
+return 1
+"""
+
+def trending_key(days, tag=None):
+    if tag is not None:
+        return TAG_TRENDING_KEY.format(days=days, tag=normalize_tag(tag))
+    return TRENDING_KEY.format(days=days)
+
+def log_contribution(weight, at, days):
+    """
+    Natural log of weight * 2^((at - SCORE_EPOCH) / days).
+    """
+    elapsed_days = (at - SCORE_EPOCH).total_seconds() / 86400
+    return math.log(weight) + elapsed_days / days * math.log(2)
+
+def _update_score(topic_id, weight, at, sign, tags=()):
+    keys, args = [], [topic_id, sign]
+    for days in settings.TRENDING_WINDOWS_DAYS:
+        contribution = log_contribution(weight, at, days)
+        keys.append(trending_key(days))
+        args += [contribution, settings.TRENDING_MAX_TOPICS]
+        for tag in tags:
+            keys.append(trending_key(days, tag))
+            args += [contribution, settings.TRENDING_TAG_MAX_TOPICS]
+    try:
+        redis_client = get_redis_connection()
+        try:
+            redis_client.register_script(UPDATE_SCORE_SCRIPT)(keys=keys, args=args)
+        finally:
+            redis_client.close()
+    except Exception as e:
+        print(f"Error updating trending score for topic {topic_id}: {e}")
+
+def record_topic_created(topic):
+    _update_score(topic.id, TOPIC_WEIGHT, topic.created_at, 1)
+
+def record_comment_created(topic_id, created_at, tags=()):
+    """
+    Add a comment to its topic's score, globally and in the sets of the topic's tags.
+    """
+    _update_score(topic_id, COMMENT_WEIGHT, created_at, 1, tags)
+
+def record_comment_deleted(topic_id, created_at, tags=()):
+    """
+    Take back the contribution of a comment, using the timestamp it was scored with.
+    """
+    _update_score(topic_id, COMMENT_WEIGHT, created_at, -1, tags)
+
+def record_topic_retagged(topic_id, old_tags, new_tags):
+    """
+    Move a topic's scores from the sets of the tags it lost to those of the tags it gained.
+    """
+    old_tags = sorted({normalize_tag(tag) for tag in old_tags})
+    new_tags = {normalize_tag(tag) for tag in new_tags}
+    removed = set(old_tags) - new_tags
+    added = new_tags - set(old_tags)
+    if not removed and not added:
+        return
+    windows = settings.TRENDING_WINDOWS_DAYS
+    try:
+        redis_client = get_redis_connection()
+        try:
+            # A topic trimmed from the global set may still be in a tag's smaller one
+            pipe = redis_client.pipeline(transaction=False)
+            for days in windows:
+                for tag in [None] + old_tags:
+                    pipe.zscore(trending_key(days, tag), topic_id)
+            results = pipe.execute()
+
+            pipe = redis_client.pipeline(transaction=True)
+            for index, days in enumerate(windows):
+                window_results = results[index * (1 + len(old_tags)):(index + 1) * (1 + len(old_tags))]
+                score = next((score for score in window_results if score is not None), None)
+                for tag in removed:
+                    pipe.zrem(trending_key(days, tag), topic_id)
+                if score is not None:
+                    for tag in added:
+                        key = trending_key(days, tag)
+                        pipe.zadd(key, {topic_id: score})
+                        pipe.zremrangebyrank(key, 0, -settings.TRENDING_TAG_MAX_TOPICS - 1)
+            if added:
+                pipe.sadd(TRENDING_TAGS_KEY, *added)
+            pipe.execute()
+        finally:
+            redis_client.close()
+    except Exception as e:
+        print(f"Error moving trending scores of topic {topic_id} between tags: {e}")
+
+def forget_topic(topic_id, tags=()):
+    try:
+        redis_client = get_redis_connection()
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for days in settings.TRENDING_WINDOWS_DAYS:
+                pipe.zrem(trending_key(days), topic_id)
+                for tag in tags:
+                    pipe.zrem(trending_key(days, tag), topic_id)
+            pipe.execute()
+        finally:
+            redis_client.close()
+    except Exception as e:
+        print(f"Error removing topic {topic_id} from trending: {e}")
+
+def get_trending_topic_ids(days, count, tag=None):
+    """
+    Ids of the count highest scoring topics for a window, best first, optionally
+    only those carrying a tag. Returns None if the window is not tracked or its
+    sets have not been built.
+    """
+    if days not in settings.TRENDING_WINDOWS_DAYS:
+        return None
+    if count <= 0:
+        # ZREVRANGE 0 -1 would return the whole set
+        return []
+    redis_client = get_redis_connection()
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        # A tag without trending topics has no set; the global set shows the sets are built
+        pipe.exists(trending_key(days))
+        pipe.zrevrange(trending_key(days, tag), 0, count - 1)
+        exists, topic_ids = pipe.execute()
+    finally:
+        redis_client.close()
+    if not exists:
+        return None
+    return [int(topic_id) for topic_id in topic_ids]
+
+def get_personalized_trending_topic_ids(days, count, tags):
+    """
+    Ids of the count best topics for a window once the scores of topics carrying
+    any of the given tags are multiplied by TRENDING_PERSONAL_TAG_BOOST, best first.
+    Merges the top of the global set with the top of each tag's set, so topics
+    from the tags can rise into the feed from below the global top count.
+    Returns None if the window is not tracked or its sets have not been built.
+    """
+    if days not in settings.TRENDING_WINDOWS_DAYS:
+        return None
+    if count <= 0:
+        return []
+    tags = list(tags)
+    redis_client = get_redis_connection()
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.exists(trending_key(days))
+        for tag in [None] + tags:
+            pipe.zrevrange(trending_key(days, tag), 0, count - 1, withscores=True)
+        exists, overall, *per_tag = pipe.execute()
+    finally:
+        redis_client.close()
+    if not exists:
+        return None
+
+    # Scores are logs, so the boost adds
+    boost = math.log(settings.TRENDING_PERSONAL_TAG_BOOST)
+    scores = {int(topic_id): score for topic_id, score in overall}
+    for members in per_tag:
+        for topic_id, score in members:
+            scores[int(topic_id)] = score + boost
+    best = heapq.nlargest(count, scores.items(), key=lambda item: (item[1], item[0]))
+    return [topic_id for topic_id, _ in best]
+
+def _user_tags_keys(user_id):
+    return USER_TAGS_KEY.format(user_id=user_id), USER_TAGS_VERSION_KEY.format(user_id=user_id)
+
+def get_user_trending_tags(user_id, load):
+    """
+    The tags a user's personalized feed is boosted with, from Redis or, on a miss,
+    load(), so the aggregation over their subscriptions and topics runs once per
+    change rather than on every request. Entries are stored with the user's tag
+    version and used only while it is current: a load racing
+    forget_user_trending_tags cannot store what it read before the change.
+    """
+    key, version_key = _user_tags_keys(user_id)
+    version = None
+    try:
+        redis_client = get_redis_connection()
+        try:
+            raw, version = redis_client.mget([key, version_key])
+        finally:
+            redis_client.close()
+        version = int(version or 0)
+        try:
+            entry = decode_cache_value(raw) if raw is not None else None
+        except CacheFormatError:
+            entry = None
+        if isinstance(entry, dict) and entry.get("version") == version:
+            return entry["tags"]
+    except Exception as e:
+        print(f"Error reading trending tags of user {user_id}: {e}")
+
+    tags = list(load())
+    if version is not None:
+        try:
+            value = encode_cache_value({"version": version, "tags": tags})
+            cache_user_value(user_id, key, value, settings.TRENDING_PERSONAL_TAGS_TTL_SECONDS)
+        except Exception as e:
+            print(f"Error caching trending tags of user {user_id}: {e}")
+    return tags
+
+def forget_user_trending_tags(*user_ids):
+    """
+    Invalidate the cached feed tags of users whose subscriptions or topics
+    changed tags. Call after the change is committed.
+    """
+    if not user_ids:
+        return
+    try:
+        redis_client = get_redis_connection()
+        try:
+            # Like resolver tag versions the counters never expire: a reset could match an old entry again
+            pipe = redis_client.pipeline(transaction=False)
+            for user_id in user_ids:
+                pipe.incr(_user_tags_keys(user_id)[1])
+            pipe.execute()
+        finally:
+            redis_client.close()
+    except Exception as e:
+        print(f"Error invalidating trending tags of users {user_ids}: {e}")
+
+def _logaddexp(a, b):
+    if a is None:
+        return b
+    high = max(a, b)
+    return high + math.log1p(math.exp(min(a, b) - high))
+
+def rebuild_trending_scores(db):
+    """
+    Recompute every window's sorted sets, global and per tag, from the topics and
+    comments tables in one pass over each, then swap the new sets in atomically.
+    """
+    windows = settings.TRENDING_WINDOWS_DAYS
+    scores = {days: {} for days in windows}
+
+    def add(topic_id, weight, at):
+        for days in windows:
+            window_scores = scores[days]
+            window_scores[topic_id] = _logaddexp(window_scores.get(topic_id), log_contribution(weight, at, days))
+
+    for topic_id, created_at in db.query(Topic.id, Topic.created_at).yield_per(5000):
+        add(topic_id, TOPIC_WEIGHT, created_at)
+    for topic_id, created_at in db.query(Comment.topic_id, Comment.created_at).yield_per(5000):
+        add(topic_id, COMMENT_WEIGHT, created_at)
+
+    tagged = defaultdict(list)
+    for topic_id, name in db.query(topic_tags.c.topic_id, Tag.name).join(Tag, Tag.id == topic_tags.c.tag_id):
+        tagged[normalize_tag(name)].append(topic_id)
+
+    def replace(pipe, key, window_scores, topic_ids, keep):
+        candidates = ((topic_id, window_scores[topic_id]) for topic_id in topic_ids)
+        top = heapq.nlargest(keep, candidates, key=lambda item: item[1])
+        if top:
+            pipe.delete(f"{key}:rebuild")
+            pipe.zadd(f"{key}:rebuild", dict(top))
+            pipe.rename(f"{key}:rebuild", key)
+        else:
+            # Redis has no empty sets: readers fall back to SQL until the first event
+            pipe.delete(key)
+
+    redis_client = get_redis_connection()
+    try:
+        stale_tags = {tag.decode() for tag in redis_client.smembers(TRENDING_TAGS_KEY)} - set(tagged)
+        pipe = redis_client.pipeline(transaction=True)
+        for days in windows:
+            window_scores = scores[days]
+            replace(pipe, trending_key(days), window_scores, window_scores, settings.TRENDING_MAX_TOPICS)
+            for tag, topic_ids in tagged.items():
+                replace(pipe, trending_key(days, tag), window_scores, topic_ids, settings.TRENDING_TAG_MAX_TOPICS)
+            for tag in stale_tags:
+                pipe.delete(trending_key(days, tag))
+        pipe.delete(TRENDING_TAGS_KEY)
+        if tagged:
+            pipe.sadd(TRENDING_TAGS_KEY, *tagged)
+        pipe.execute()
+    finally:
+        redis_client.close()
+
+def ensure_trending_scores(db):
+    """
+    Build the sorted sets if any window is missing, e.g. on first deploy or after a Redis flush.
+    """
+    redis_client = get_redis_connection()
+    try:
+        built = redis_client.exists(*[trending_key(days) for days in settings.TRENDING_WINDOWS_DAYS])
+    finally:
+        redis_client.close()
+    if built < len(settings.TRENDING_WINDOWS_DAYS):
+        rebuild_trending_scores(db)
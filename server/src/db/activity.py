@@ -0,0 +1,180 @@
+from datetime import datetime, timedelta
+from sqlalchemy import DateTime, delete, event, func, insert, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import FunctionElement
+from server.src.db.models import Comment, TopicActivityHourly
+from server.src.db.session import get_db
+from server.src.core.config import settings
+
+# Comments per topic per hour, so time-window counts sum a few hundred buckets
+# per topic instead of scanning comments. The rollup is kept current by the
+# Comment mapper events below, inside the transaction that writes the comment.
+# compact_topic_activity merges buckets older than ACTIVITY_COMPACT_AFTER_DAYS
+# into one bucket per day, and backfill_topic_activity rebuilds it from scratch.
+#
+# Counts are exact for windows starting on an hour boundary within the hourly
+# range, and to the day beyond it.
+#
+# Backfill and compaction rewrite many buckets from a read of the others, so two
+# of them running at once would double count. On Postgres each takes a
+# transaction-level advisory lock first; every API worker backfills an empty
+# rollup at startup, and the precompute leader compacts.
+
+activity = TopicActivityHourly.__table__
+# Key of the advisory lock serializing backfill and compaction: "topicact" in ASCII
+ROLLUP_LOCK_ID = 0x746f706963616374
+
+class time_bucket(FunctionElement):
+    """
+    A timestamp truncated to the start of its unit; see hour_start and day_start.
+    """
+    type = DateTime()
+    unit = None
+
+class hour_start(time_bucket):
+    unit = "hour"
+    inherit_cache = True
+
+class day_start(time_bucket):
+    unit = "day"
+    inherit_cache = True
+
+@compiles(time_bucket)
+def _time_bucket(element, compiler, **kw):
+    # The unit is rendered inline so that equal buckets are equal expressions for GROUP BY
+    return f"date_trunc('{element.unit}', {compiler.process(element.clauses, **kw)})"
+
+@compiles(time_bucket, "sqlite")
+def _time_bucket_sqlite(element, compiler, **kw):
+    # Same text format SQLAlchemy stores DateTime values in, so buckets compare equal
+    formats = {"hour": "%Y-%m-%d %H:00:00.000000", "day": "%Y-%m-%d 00:00:00.000000"}
+    return f"strftime('{formats[element.unit]}', {compiler.process(element.clauses, **kw)})"
+
+def hour_bucket(timestamp: datetime) -> datetime:
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+def _upsert(connection):
+    """
+    INSERT ... ON CONFLICT for the rollup, adding to the existing count.
+    """
+    dialect_insert = sqlite.insert if connection.dialect.name == "sqlite" else postgresql.insert
+    return dialect_insert(activity)
+
+def _add_to_bucket(statement):
+    return statement.on_conflict_do_update(
+        index_elements=[activity.c.topic_id, activity.c.bucket],
+        set_={"comment_count": activity.c.comment_count + statement.excluded.comment_count},
+    )
+
+@event.listens_for(Comment, "after_insert")
+def _count_inserted_comment(mapper, connection, comment):
+    statement = _upsert(connection).values(
+        topic_id=comment.topic_id, bucket=hour_bucket(comment.created_at), comment_count=1
+    )
+    connection.execute(_add_to_bucket(statement))
+
+@event.listens_for(Comment, "after_delete")
+def _count_deleted_comment(mapper, connection, comment):
+    # The comment's hour may have been merged into its day since; that is then
+    # the latest bucket at or before it
+    bucket = (
+        select(func.max(activity.c.bucket))
+        .where(activity.c.topic_id == comment.topic_id, activity.c.bucket <= comment.created_at)
+        .scalar_subquery()
+    )
+    connection.execute(
+        update(activity)
+        .where(activity.c.topic_id == comment.topic_id, activity.c.bucket == bucket)
+        .values(comment_count=activity.c.comment_count - 1)
+    )
+    connection.execute(
+        delete(activity).where(activity.c.topic_id == comment.topic_id, activity.c.comment_count <= 0)
+    )
+
+def delete_topic_activity(db: Session, topic_id: int):
+    """
+    Drop a topic's buckets. Needed when its comments are removed with a bulk
+    delete, which skips the mapper events.
+    """
+    db.execute(delete(activity).where(activity.c.topic_id == topic_id))
+
+def comment_counts_since(since: datetime):
+    """
+    Per-topic comment counts over the rollup, as a (topic_id, comment_count)
+    subquery. since is rounded down to its hour; None counts everything.
+    """
+    query = select(activity.c.topic_id, func.sum(activity.c.comment_count).label("comment_count"))
+    if since is not None:
+        query = query.where(activity.c.bucket >= hour_bucket(since))
+    return query.group_by(activity.c.topic_id).subquery()
+
+def _lock_rollup(db: Session):
+    """
+    Wait for any other backfill or compaction to commit. The lock is released
+    with the current transaction. SQLite serializes writers by itself.
+    """
+    if db.connection().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ROLLUP_LOCK_ID})
+
+def backfill_topic_activity(db: Session, if_empty=False):
+    """
+    Rebuild the rollup from the comments table in one aggregate pass. With
+    if_empty, only if it has no buckets, as when another worker got there first.
+    """
+    _lock_rollup(db)
+    if if_empty and db.query(TopicActivityHourly).first() is not None:
+        db.rollback()
+        return
+    db.execute(delete(activity))
+    hour = hour_start(Comment.created_at)
+    db.execute(
+        insert(activity).from_select(
+            ["topic_id", "bucket", "comment_count"],
+            select(Comment.topic_id, hour, func.count(Comment.id)).group_by(Comment.topic_id, hour),
+        )
+    )
+    db.commit()
+
+def compact_topic_activity(db: Session, older_than_days: int = None):
+    """
+    Merge hourly buckets older than the cutoff into one bucket per day.
+    Safe to run repeatedly; day buckets are left as they are.
+    """
+    older_than_days = settings.ACTIVITY_COMPACT_AFTER_DAYS if older_than_days is None else older_than_days
+    _lock_rollup(db)
+    cutoff = hour_bucket(datetime.now() - timedelta(days=older_than_days)).replace(hour=0)
+    day = day_start(activity.c.bucket)
+    hourly = (activity.c.bucket < cutoff, activity.c.bucket != day)
+    statement = _upsert(db.connection()).from_select(
+        ["topic_id", "bucket", "comment_count"],
+        select(activity.c.topic_id, day, func.sum(activity.c.comment_count))
+        .where(*hourly)
+        .group_by(activity.c.topic_id, day),
+    )
+    db.execute(_add_to_bucket(statement))
+    db.execute(delete(activity).where(*hourly))
+    db.commit()
+
+def ensure_topic_activity():
+    """
+    Backfill the rollup if it is empty, as on first start. Safe to run from every worker at once.
+    """
+    with next(get_db()) as db:
+        backfill_topic_activity(db, if_empty=True)
+
+def activity_main(backfill=False):
+    """
+    Run as a periodic job: backfill when asked to (or when the rollup is empty), then compact.
+    """
+    db = next(get_db())
+    try:
+        backfill_topic_activity(db, if_empty=not backfill)
+        compact_topic_activity(db)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    import sys
+    activity_main(backfill="--backfill" in sys.argv)
@@ -0,0 +1,146 @@
+import threading
+from sqlalchemy import func
+from server.src.caching.invalidation import publish_invalidation
+from server.src.db.models import User
+from server.src.db.session import get_db
+from server.src.utils.bloom_filter import BloomFilter
+from server.src.core.config import settings
+
+# Username and email availability checks for the signup form, answered from
+# in-process Bloom filters of the names in use. A name the filter has never seen
+# is available without touching the database; only possible matches are looked
+# up, and those that turn out free are counted as false positives.
+#
+# New names are added here and published on the invalidation bus as
+# "username:<name>" and "email:<address>" tags, so every worker's filters see
+# them. When events may have been missed the filters are rebuilt from the
+# database; the first subscription of the bus listener loads them at startup.
+# Names freed by updates or deletions stay in the filters until the next
+# rebuild and only cost a lookup.
+
+FIELDS = {"username": User.username, "email": User.email}
+
+_filters = None  # field -> BloomFilter
+_load_lock = threading.Lock()
+_filters_lock = threading.Lock()
+# Names recorded while a rebuild is in flight, added to the new filters before they are swapped in
+_pending_names = None
+_stats_lock = threading.Lock()
+_stats = {field: {"checks": 0, "filter_negatives": 0, "database_checks": 0, "false_positives": 0} for field in FIELDS}
+
+def load_availability_filters(if_missing=False):
+    """
+    Build the filters from the users table and swap them in, sized for twice the
+    current users so that signups do not degrade them before the next rebuild.
+    With if_missing, do nothing if another caller has loaded them meanwhile.
+    """
+    global _filters, _pending_names
+
+    with _load_lock:
+        if if_missing and _filters is not None:
+            return
+        with _filters_lock:
+            _pending_names = []
+        try:
+            with next(get_db()) as db:
+                user_count = db.query(func.count(User.id)).scalar() or 0
+                capacity = max(settings.AVAILABILITY_BLOOM_MIN_CAPACITY, 2 * user_count)
+                filters = {
+                    field: BloomFilter(capacity, settings.AVAILABILITY_BLOOM_FALSE_POSITIVE_RATE) for field in FIELDS
+                }
+                for username, email in db.query(User.username, User.email).yield_per(1000):
+                    filters["username"].add(username)
+                    filters["email"].add(email)
+        except Exception:
+            with _filters_lock:
+                _pending_names = None
+            raise
+        with _filters_lock:
+            for field, value in _pending_names:
+                filters[field].add(value)
+            _pending_names = None
+            _filters = filters
+
+def ensure_availability_filters_loaded():
+    """
+    Build the filters on first use if the bus listener has not loaded them yet.
+    """
+    if _filters is None:
+        load_availability_filters(if_missing=True)
+
+def reload_availability_filters():
+    """
+    Invalidation bus reset handler: rebuild the filters, as names may have been missed.
+    """
+    try:
+        load_availability_filters()
+    except Exception as e:
+        print(f"Error loading availability filters: {e}")
+
+def _add_names(names):
+    with _filters_lock:
+        if _filters is not None:
+            for field, value in names:
+                _filters[field].add(value)
+        if _pending_names is not None:
+            _pending_names.extend(names)
+
+def record_user_names(username=None, email=None):
+    """
+    Mark a username and email as taken, here and in the other workers. Call after
+    the user is committed.
+    """
+    names = [(field, value) for field, value in (("username", username), ("email", email)) if value]
+    _add_names(names)
+    publish_invalidation(*(f"{field}:{value}" for field, value in names))
+
+def record_invalidated_names(tags):
+    """
+    Invalidation bus handler: add the names published by other workers.
+    """
+    names = []
+    for tag in tags:
+        field, _, value = tag.partition(":")
+        if field in FIELDS and value:
+            names.append((field, value))
+    _add_names(names)
+
+def _count(field, *counters):
+    with _stats_lock:
+        for counter in counters:
+            _stats[field][counter] += 1
+
+def is_available(field: str, value: str) -> bool:
+    """
+    Whether no user has this username or email. Queries the database only when
+    the filter reports a possible match.
+    """
+    ensure_availability_filters_loaded()
+    if value not in _filters[field]:
+        _count(field, "checks", "filter_negatives")
+        return True
+    with next(get_db()) as db:
+        taken = db.query(User.id).filter(FIELDS[field] == value).first() is not None
+    if taken:
+        _count(field, "checks", "database_checks")
+    else:
+        _count(field, "checks", "database_checks", "false_positives")
+    return not taken
+
+def get_availability_stats():
+    """
+    Per field: checks answered, those the filter answered alone, database
+    lookups, and lookups that found the name free. The observed false positive
+    rate is the share of free names the filter reported as possibly taken, to
+    compare with the rate estimated from how full the filter is.
+    """
+    with _stats_lock:
+        stats = {field: dict(counters) for field, counters in _stats.items()}
+    filters = _filters
+    for field, counters in stats.items():
+        free = counters["filter_negatives"] + counters["false_positives"]
+        counters["observed_false_positive_rate"] = counters["false_positives"] / free if free else 0.0
+        counters["estimated_false_positive_rate"] = (
+            filters[field].estimated_false_positive_rate() if filters is not None else None
+        )
+    return stats
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Table, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from server.src.db.session import Base
@@ -110,3 +110,14 @@ topic_tags = Table(
     extend_existing=True
 )
 
+class TopicActivityHourly(Base):
+    __tablename__ = 'topic_activity_hourly'
+    __table_args__ = (
+        Index('ix_topic_activity_hourly_bucket', 'bucket'),
+        {'extend_existing': True},
+    )
+    
+    # Comments per topic per hour; buckets older than ACTIVITY_COMPACT_AFTER_DAYS are merged into days
+    topic_id = Column(Integer, ForeignKey('topics.id', ondelete='CASCADE'), primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    comment_count = Column(Integer, nullable=False, default=0)
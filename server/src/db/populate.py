@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from server.src.db.session import get_db
 from server.src.db.models import User, Topic, Comment, Notification, UserTopicSubscription, Tag
+from server.src.db.activity import backfill_topic_activity
 from server.src.utils.security import hash_password
 from datetime import datetime, timezone
 
@@ -123,4 +124,5 @@ def add_example_data(db: Session):
 def populate_main():
     db = next(get_db())
     add_example_data(db)
+    backfill_topic_activity(db)
     db.close()
\ No newline at end of file
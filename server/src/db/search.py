@@ -0,0 +1,206 @@
+from sqlalchemy import func, literal_column, select, text
+from sqlalchemy.orm import Session
+from server.src.db.models import Topic, Comment, Tag, topic_tags
+from server.src.utils.inverted_index import tokenize
+from server.src.utils.bitmap_index import normalize_tag
+from server.src.core.config import settings
+
+# Database-native topic search for the "sql" SEARCH_BACKEND.
+# The tsvector column is generated by Postgres and deliberately left off the Topic
+# model, so deployments on the in-process backend never need it.
+#
+# Fuzzy search follows the in-process trie: a title matches when it starts with
+# something within max_edits edits (Levenshtein, from fuzzystrmatch) of the query.
+
+SEARCH_SCHEMA_STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS fuzzystrmatch",
+    """
+    ALTER TABLE topics ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_topics_search_vector ON topics USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_topics_title_trgm ON topics USING GIN (lower(title) gin_trgm_ops)",
+]
+
+search_vector = literal_column("topics.search_vector")
+
+def ensure_search_schema(engine):
+    """
+    Create the generated tsvector column, its GIN index and the trigram title index,
+    and enable the extensions they and fuzzy search rely on.
+    Safe to run on every startup.
+    """
+    with engine.begin() as connection:
+        for statement in SEARCH_SCHEMA_STATEMENTS:
+            connection.execute(text(statement))
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _ranking_order(ranking: str):
+    if ranking == "view_count":
+        return func.coalesce(Topic.view_count, 0).desc()
+    if ranking == "comment_count":
+        comment_count = (
+            select(func.count(Comment.id))
+            .where(Comment.topic_id == Topic.id)
+            .scalar_subquery()
+        )
+        return comment_count.desc()
+    return Topic.created_at.desc()
+
+def _tag_conditions(tags, match_all=True):
+    """
+    Filter conditions restricting topics to those carrying all (or any) of the tags.
+    """
+    if not tags:
+        return []
+    names = {normalize_tag(name) for name in tags}
+    tagged = (
+        select(topic_tags.c.topic_id)
+        .join(Tag, Tag.id == topic_tags.c.tag_id)
+        .where(func.lower(Tag.name).in_(names))
+    )
+    if match_all:
+        tagged = tagged.group_by(topic_tags.c.topic_id).having(func.count(func.distinct(Tag.id)) == len(names))
+    return [Topic.id.in_(tagged)]
+
+def _clamp_edits(max_edits):
+    return max(1, min(max_edits, settings.SEARCH_MAX_EDITS))
+
+def _prefix_distance(query: str, max_edits: int):
+    """
+    Edit distance from query to the closest prefix of the lowercased title, or
+    more than max_edits when none is that close. Only prefixes whose length is
+    within max_edits of the query's can be, so only those are compared.
+    """
+    query = query.lower()
+    title = func.lower(Topic.title)
+    lengths = range(max(0, len(query) - max_edits), len(query) + max_edits + 1)
+    distances = [func.levenshtein_less_equal(query, func.substr(title, 1, length), max_edits) for length in lengths]
+    return func.least(*distances) if len(distances) > 1 else distances[0]
+
+def _title_conditions(query: str, mode: str, max_edits: int = 1):
+    """
+    Title conditions for a search mode, served by the trigram index except for
+    fuzzy matching. None if the query cannot match anything.
+    """
+    title = func.lower(Topic.title)
+    if mode == "fuzzy":
+        max_edits = _clamp_edits(max_edits)
+        return [_prefix_distance(query, max_edits) <= max_edits]
+    if mode == "substring":
+        return [title.like("%" + _escape_like(query.lower()) + "%", escape="\\")]
+    if mode == "word":
+        # Tokens are plain word characters, so they are safe inside the pattern
+        return [title.op("~")(r"\m" + term) for term in set(tokenize(query))] or None
+    return [title.like(_escape_like(query.lower()) + "%", escape="\\")]
+
+def search_topics_by_prefix(db: Session, prefix: str, ranking: str, limit: int, offset: int = 0,
+                            tags=None, match_all_tags=True):
+    """
+    Topics whose title starts with prefix (case-insensitive), served by the trigram index.
+    """
+    return (
+        db.query(Topic)
+        .filter(*_title_conditions(prefix, "prefix"), *_tag_conditions(tags, match_all_tags))
+        .order_by(_ranking_order(ranking), Topic.id.desc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+
+def search_topics_by_title_match(db: Session, query: str, mode: str, ranking: str, limit: int, offset: int = 0,
+                                 tags=None, match_all_tags=True):
+    """
+    Topics matching query anywhere in the title, served by the trigram index.
+    mode "substring" matches the whole query; "word" requires every term to start a title word.
+    """
+    conditions = _title_conditions(query, mode)
+    if conditions is None:
+        return []
+    return (
+        db.query(Topic)
+        .filter(*conditions, *_tag_conditions(tags, match_all_tags))
+        .order_by(_ranking_order(ranking), Topic.id.desc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+
+def search_topics_by_similarity(db: Session, query: str, limit: int, offset: int = 0,
+                                tags=None, match_all_tags=True, ranking: str = "recency", max_edits: int = 1):
+    """
+    Typo-tolerant prefix search: titles starting with something within max_edits
+    edits of query, closest edit distance first and then by the given ranking.
+    """
+    max_edits = _clamp_edits(max_edits)
+    return (
+        db.query(Topic)
+        .filter(*_title_conditions(query, "fuzzy", max_edits), *_tag_conditions(tags, match_all_tags))
+        .order_by(_prefix_distance(query, max_edits), _ranking_order(ranking), Topic.id.desc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+
+def search_topics_by_text(db: Session, query: str, limit: int, offset: int = 0,
+                          tags=None, match_all_tags=True):
+    """
+    Full-text search over titles and content, ordered by ts_rank.
+    """
+    ts_query = func.websearch_to_tsquery("english", query)
+    rank = func.ts_rank(search_vector, ts_query)
+    return (
+        db.query(Topic)
+        .filter(search_vector.op("@@")(ts_query), *_tag_conditions(tags, match_all_tags))
+        .order_by(rank.desc(), Topic.id.desc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+
+def search_topics_by_tags(db: Session, tags, match_all: bool, ranking: str, limit: int, offset: int = 0):
+    """
+    Topics carrying all (or any) of the tags.
+    """
+    if not tags:
+        return []
+    return (
+        db.query(Topic)
+        .filter(*_tag_conditions(tags, match_all))
+        .order_by(_ranking_order(ranking), Topic.id.desc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+
+def count_topics_per_tag(db: Session, tags=None, match_all=True, query=None, mode="prefix", max_edits=1,
+                         limit=None):
+    """
+    Facet counts: (tag name, topic count) pairs over the topics passing the tag
+    filter and, if a query is given, matching it. Most used first.
+    """
+    conditions = _tag_conditions(tags, match_all)
+    if query is not None:
+        title_conditions = _title_conditions(query, mode, max_edits)
+        if title_conditions is None:
+            return []
+        conditions += title_conditions
+    name = func.lower(Tag.name)
+    facets = (
+        db.query(name, func.count(topic_tags.c.topic_id))
+        .select_from(topic_tags)
+        .join(Tag, Tag.id == topic_tags.c.tag_id)
+        .group_by(name)
+        .order_by(func.count(topic_tags.c.topic_id).desc(), name)
+    )
+    if conditions:
+        facets = facets.filter(topic_tags.c.topic_id.in_(select(Topic.id).where(*conditions)))
+    if limit is not None:
+        facets = facets.limit(limit)
+    return [(tag_name, count) for tag_name, count in facets]
@@ -4,7 +4,7 @@ from server.src.db.session import engine
 def check_tables_exist():
     inspector = inspect(engine)
     tables = inspector.get_table_names()
-    expected_tables = ['users', 'topics', 'comments', 'notifications', 'user_topic_subscriptions', 'tags', 'topic_tags']
+    expected_tables = ['users', 'topics', 'comments', 'notifications', 'user_topic_subscriptions', 'tags', 'topic_tags', 'topic_activity_hourly']
     
     for table in expected_tables:
         if table in tables:
@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import Integer, case, func, literal, select, union_all
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import FunctionElement
+from server.src.db.models import Topic, Tag, UserTopicSubscription, topic_tags
+from server.src.db.activity import activity, comment_counts_since, hour_bucket
+from server.src.utils.bitmap_index import normalize_tag
+from server.src.utils.trending_scores import score_windows
+
+# Trending scores computed in the database from the topic_activity_hourly rollup,
+# ordered and limited there, so only the top rows reach Python. The window start
+# is rounded down to the hour the rollup is bucketed by.
+#
+#   score = 2 * comments in the window
+#         + 1 * all comments
+#         + 3 * max(0, 1 - whole days since the topic was created / window)
+
+RECENT_COMMENT_WEIGHT = 2
+TOTAL_COMMENT_WEIGHT = 1
+RECENCY_WEIGHT = 3
+# Naive timestamps become seconds from here for the batch scorer
+EPOCH = datetime(1970, 1, 1)
+
+class whole_days_between(FunctionElement):
+    """
+    floor((later - earlier) in days), like timedelta.days.
+    """
+    type = Integer()
+    inherit_cache = True
+
+@compiles(whole_days_between)
+def _whole_days_between(element, compiler, **kw):
+    later, earlier = (compiler.process(argument, **kw) for argument in element.clauses)
+    return f"floor(extract(epoch from ({later} - {earlier})) / 86400)"
+
+@compiles(whole_days_between, "sqlite")
+def _whole_days_between_sqlite(element, compiler, **kw):
+    later, earlier = (compiler.process(argument, **kw) for argument in element.clauses)
+    days = f"(julianday({later}) - julianday({earlier}))"
+    # CAST truncates towards zero; step down for negative fractions to floor
+    return f"(CAST({days} AS INTEGER) - ({days} < CAST({days} AS INTEGER)))"
+
+def trending_score(time_window: int, now: datetime, recent_comments, total_comments):
+    """
+    The trending score of a Topic row as a SQL expression, given per-topic
+    comment count subqueries for the window and for all time, outer-joined to topics.
+    """
+    # A float divisor keeps integer division from rounding the fraction away
+    age_fraction = whole_days_between(literal(now), Topic.created_at) / float(time_window)
+    recency = case((age_fraction < 1, 1 - age_fraction), else_=0)
+    return (
+        func.coalesce(recent_comments.c.comment_count, 0) * RECENT_COMMENT_WEIGHT
+        + func.coalesce(total_comments.c.comment_count, 0) * TOTAL_COMMENT_WEIGHT
+        + recency * RECENCY_WEIGHT
+    )
+
+def get_trending_topics(db: Session, time_window: int, max_topics: int, now: datetime = None, tag: str = None):
+    """
+    The max_topics highest scoring topics as (topic, score) pairs, best first,
+    ties broken by newest id. tag restricts them to the topics carrying that tag.
+    """
+    now = now or datetime.now()
+    recent_comments = comment_counts_since(now - timedelta(days=time_window))
+    total_comments = comment_counts_since(None)
+    score = trending_score(time_window, now, recent_comments, total_comments).label("trending_score")
+    query = (
+        db.query(Topic, score)
+        .outerjoin(recent_comments, recent_comments.c.topic_id == Topic.id)
+        .outerjoin(total_comments, total_comments.c.topic_id == Topic.id)
+    )
+    if tag is not None:
+        query = query.filter(Topic.tags.any(func.lower(Tag.name) == normalize_tag(tag)))
+    return query.order_by(score.desc(), Topic.id.desc()).limit(max_topics).all()
+
+def get_user_trending_tags(db: Session, user_id: int, limit: int):
+    """
+    The normalized names of the tags most used by the topics a user subscribes to
+    or started, most used first; the tags their personalized trending feed is boosted with.
+    """
+    user_topics = union_all(
+        select(UserTopicSubscription.topic_id.label("topic_id")).where(UserTopicSubscription.user_id == user_id),
+        select(Topic.id.label("topic_id")).where(Topic.user_id == user_id),
+    ).subquery()
+    name = func.lower(Tag.name)
+    return db.scalars(
+        select(name)
+        .join(topic_tags, topic_tags.c.tag_id == Tag.id)
+        .join(user_topics, user_topics.c.topic_id == topic_tags.c.topic_id)
+        .group_by(name)
+        .order_by(func.count(topic_tags.c.topic_id).desc(), name)
+        .limit(limit)
+    ).all()
+
+def _seconds(timestamps):
+    return np.fromiter(((t - EPOCH).total_seconds() for t in timestamps), dtype=np.float64)
+
+def get_trending_topics_batch(db: Session, time_windows: list[int], max_topics: int, now: datetime = None):
+    """
+    The scores of get_trending_topics for several windows from one read of the
+    topics and the rollup, as {window: [(topic_id, score)]}, best first.
+    Scoring runs over NumPy arrays; see server.src.utils.trending_scores.
+    """
+    now = now or datetime.now()
+    topics = db.execute(select(Topic.id, Topic.created_at).order_by(Topic.id)).all()
+    rows = db.execute(
+        select(activity.c.topic_id, activity.c.bucket, activity.c.comment_count).order_by(activity.c.bucket)
+    ).all()
+
+    topic_ids = np.fromiter((topic_id for topic_id, _ in topics), dtype=np.int64, count=len(topics))
+    topic_created = _seconds(created_at for _, created_at in topics)
+    # Rows of topics deleted since they were read are dropped
+    row_topic_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    positions = np.searchsorted(topic_ids, row_topic_ids)
+    known = positions < len(topic_ids)
+    known[known] = topic_ids[positions[known]] == row_topic_ids[known]
+    activity_times = _seconds(row[1] for row in rows)[known]
+    activity_counts = np.fromiter((row[2] for row in rows), dtype=np.int64, count=len(rows))[known]
+
+    window_starts = {
+        window: (hour_bucket(now - timedelta(days=window)) - EPOCH).total_seconds() for window in time_windows
+    }
+    results = score_windows(
+        topic_ids, topic_created, positions[known], activity_times, activity_counts,
+        (now - EPOCH).total_seconds(), time_windows, max_topics, window_starts,
+    )
+    return {
+        window: list(zip(ids.tolist(), scores.tolist())) for window, (ids, scores) in results.items()
+    }
@@ -1,48 +1,49 @@
-from datetime import datetime, timedelta
-import heapq
-import json
-from sqlalchemy import func
+from typing import Optional
 import strawberry
+from sqlalchemy import func
 from strawberry.asgi import GraphQL
 from fastapi import HTTPException
-from server.src.graphql.schema import TopicType, UserType, CommentType, TagType, NotificationType
-from server.src.db.models import Topic, Comment, User, Notification
+from server.src.graphql.schema import (
+    TopicType, CommentType, NotificationType, SearchRanking, SearchMode, TagFacetType,
+    RedisPoolStatsType, SearchCacheStatsType,
+    topic_fields, comment_fields
+)
+from server.src.db.models import Topic, Comment, User, Notification, Tag, UserTopicSubscription
 from server.src.db.session import get_db
-from server.src.api.login import get_current_user  
-from server.src.utils.tries import Trie
+from server.src.db import search as db_search
+from server.src.db import trending as db_trending
+from server.src.db.activity import delete_topic_activity
+from server.src.db import crud
 from server.src.rabbitmq.notification import create_notification
-from server.src.caching.connector import get_redis_connection
-
-topic_trie = Trie()
-
-def load_topics_into_trie():
-    """
-    Load topics from the database into the Trie.
-    """
-    db = next(get_db())
-    topics = db.query(Topic).all()
-    for topic in topics:
-        topic_trie.insert(
-            topic.title,
-            {
-                "id": topic.id,
-                "title": topic.title,
-                "content": topic.content,
-                "user_id": topic.user_id,
-                "created_at": topic.created_at.isoformat(),
-                "is_locked": topic.is_locked  # Include is_locked
-            },
-        )
-    db.close()
+from server.src.caching.search_cache import (
+    SEARCH_INDEX_TAG, cached_search, bump_topics_version, get_search_cache_stats
+)
+from server.src.caching.stampede import cached_compute
+from server.src.caching.connector import get_redis_pool_stats
+from server.src.caching.resolver_cache import cached_resolver, invalidate_tags
+from server.src.caching.principal_cache import Principal, get_principal
+from server.src.caching.precompute import (
+    TRENDING_CACHE_TTL_SECONDS, trending_cache_key, precompute_trending_pages
+)
+from server.src.caching.trending import (
+    get_trending_topic_ids, get_personalized_trending_topic_ids, get_user_trending_tags, forget_user_trending_tags,
+    record_topic_created, record_comment_created, record_comment_deleted, record_topic_retagged, forget_topic
+)
+from server.src.search.topic_index import (
+    search_topics, fuzzy_search_topics, search_topic_titles, search_topic_text,
+    list_topics_by_tags, tag_facets,
+    index_topic, unindex_topic, adjust_topic_comment_count, retag_topic
+)
+from server.src.utils.bitmap_index import normalize_tag
+from server.src.utils.security import decode_access_token
+from server.src.core.config import settings
 
-def search_topics(query):
-    """
-    Search for topics in the Trie.
-    """
-    load_topics_into_trie()
-    return topic_trie.search(query)
+def _load_principal(username):
+    with next(get_db()) as db:
+        user = crud.get_user_by_username(db, username=username)
+        return Principal.from_user(user) if user else None
 
-def get_user_from_context(info) -> UserType:
+def get_user_from_context(info) -> Principal:
     """Extract user from FastAPI request context."""
     request = info.context["request"]
     token = request.headers.get("Authorization")
@@ -50,80 +51,177 @@ def get_user_from_context(info) -> UserType:
         raise HTTPException(status_code=401, detail="Missing or invalid token")
     
     token = token.split("Bearer ")[1]
-    with next(get_db()) as db:
-        user = get_current_user(db, token)
-        return user
+    payload = decode_access_token(token)
+    if payload is None or payload.get("sub") is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    # The token is verified on every request; only the user lookup is cached
+    user = get_principal(payload["sub"], _load_principal)
+    if user is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user
     
-def _compute_trending_topics(user, time_window, max_topics):
+def _page_bounds(limit, offset):
+    return max(0, min(limit, settings.SEARCH_MAX_LIMIT)), max(0, offset)
+
+def _hydrate_topics(db, topic_ids):
+    """
+    Load a page of topics found by the search indexes with a single query, keeping the ranked order.
+    Topics deleted since they were indexed are dropped.
+    """
+    if not topic_ids:
+        return []
+    topics = {topic.id: topic for topic in db.query(Topic).filter(Topic.id.in_(topic_ids))}
+    return [topics[topic_id] for topic_id in topic_ids if topic_id in topics]
+
+def _search_topic_page(prefix, mode, rank_by, max_edits, limit, offset, tags, match_all_tags):
+    if settings.SEARCH_BACKEND == "sql":
+        with next(get_db()) as db:
+            if mode == SearchMode.FUZZY:
+                topics = db_search.search_topics_by_similarity(
+                    db, prefix, limit, offset, tags, match_all_tags, rank_by.value, max_edits
+                )
+            elif mode in (SearchMode.WORD, SearchMode.SUBSTRING):
+                topics = db_search.search_topics_by_title_match(
+                    db, prefix, mode.value, rank_by.value, limit, offset, tags, match_all_tags
+                )
+            else:
+                topics = db_search.search_topics_by_prefix(db, prefix, rank_by.value, limit, offset, tags, match_all_tags)
+            return [topic_fields(topic) for topic in topics]
+
+    if mode == SearchMode.FUZZY:
+        topic_ids = fuzzy_search_topics(prefix, max_edits, rank_by.value, limit, offset, tags, match_all_tags)
+    elif mode in (SearchMode.WORD, SearchMode.SUBSTRING):
+        topic_ids = search_topic_titles(prefix, mode.value, rank_by.value, limit, offset, tags, match_all_tags)
+    else:
+        topic_ids = search_topics(prefix, rank_by.value, limit, offset, tags, match_all_tags)
+    with next(get_db()) as db:
+        return [topic_fields(topic) for topic in _hydrate_topics(db, topic_ids)]
+
+def _compute_trending_topics(user, time_window, max_topics, tag=None):
     """
     Core logic for computing trending topics.
-    Extracted to a separate function to improve readability and reusability.
+    Scoring, ordering and the limit all run in the database; see server.src.db.trending.
     """
     db = next(get_db())
     
     try:
-        # Calculate the date threshold for the time window
-        time_threshold = datetime.now() - timedelta(days=time_window)
-        
-        # Subquery to get comment counts for each topic within the time window
-        recent_comment_counts = (
-            db.query(Comment.topic_id, func.count(Comment.id).label('recent_comment_count'))
-            .filter(Comment.created_at >= time_threshold)
-            .group_by(Comment.topic_id)
-            .subquery()
-        )
-            
-        # Subquery to get total comment counts for each topic
-        total_comment_counts = (
-            db.query(Comment.topic_id, func.count(Comment.id).label('total_comment_count'))
-            .group_by(Comment.topic_id)
-            .subquery()
-        )
-            
-        # Main query to get topics with comment metrics
-        trending_query = (
-            db.query(
-                Topic, 
-                recent_comment_counts.c.recent_comment_count,
-                total_comment_counts.c.total_comment_count
-            )
-            .outerjoin(recent_comment_counts, Topic.id == recent_comment_counts.c.topic_id)
-            .outerjoin(total_comment_counts, Topic.id == total_comment_counts.c.topic_id)
-            .all()
-        )
-            
-        # Create a min-heap to store top trending topics
-        trending_heap = []
-        
-        for topic, recent_comments, total_comments in trending_query:
-            # Scoring logic
-            recent_comment_weight = recent_comments or 0
-            total_comment_weight = total_comments or 0
-            recency_weight = max(0, 1 - (datetime.now() - topic.created_at).days / time_window)
-            
-            # Trending score calculation
-            trending_score = (
-                recent_comment_weight * 2 +  # Higher weight for recent comments
-                total_comment_weight * 1 +   # Lower weight for total comments
-                recency_weight * 3           # Higher weight for recent topics
-            )
-            
-            # Use heapq to maintain top trending topics
-            if len(trending_heap) < max_topics:
-                heapq.heappush(trending_heap, (trending_score, topic.id, topic))
-            else:
-                # If heap is full, push and pop to keep only top max_topics
-                heapq.heappushpop(trending_heap, (trending_score, topic.id, topic))
-        
-        # Sort the heap in descending order of trending score
-        trending_topics = sorted(trending_heap, reverse=True)
-        
-        # Extract and return topics
-        return [topic for _, _, topic in trending_topics]
+        return [topic for topic, _ in db_trending.get_trending_topics(db, time_window, max_topics, tag=tag)]
     
     finally:
         db.close()    
 
+# Dependency tags of cached resolver results; see server.src.caching.resolver_cache.
+# "topics" covers every list or lookup of topics, topic:<id> and user:<id> the
+# comments on a topic and by a user.
+TOPICS_TAG = "topics"
+
+def _topic_tag(topic_id):
+    return f"topic:{topic_id}"
+
+def _user_tag(user_id):
+    return f"user:{user_id}"
+
+def _topic_followers(db, topic_id, owner_id):
+    """
+    The users whose personalized trending tags include a topic's: its owner and subscribers.
+    """
+    subscribers = db.query(UserTopicSubscription.user_id).filter_by(topic_id=topic_id)
+    return {owner_id} | {user_id for (user_id,) in subscribers}
+
+def collect_user_content(db, user_id):
+    """
+    Read what deleting a user takes with it, for forget_user_content once the
+    delete is committed: the user's topics with their tags, commenters and the
+    subscribers whose feed tags they fed, and the user's comments on other topics.
+    """
+    topics = db.query(Topic).filter_by(user_id=user_id).all()
+    topic_tag_names = {topic.id: [tag.name for tag in topic.tags] for topic in topics}
+    follower_ids = set()
+    for topic in topics:
+        if topic_tag_names[topic.id]:
+            follower_ids |= _topic_followers(db, topic.id, user_id) - {user_id}
+    commenter_ids = set()
+    if topic_tag_names:
+        commenter_ids = {
+            commenter_id for (commenter_id,) in
+            db.query(Comment.user_id).filter(Comment.topic_id.in_(list(topic_tag_names))).distinct()
+        }
+    comments = []
+    other_tag_names = {}
+    other_comments = db.query(Comment).filter(
+        Comment.user_id == user_id, Comment.topic_id.notin_(list(topic_tag_names))
+    )
+    for comment in other_comments:
+        if comment.topic_id not in other_tag_names:
+            other_tag_names[comment.topic_id] = [tag.name for tag in comment.topic.tags]
+        comments.append((comment.topic_id, comment.created_at, other_tag_names[comment.topic_id]))
+    return {
+        "user_id": user_id, "topics": topic_tag_names, "commenter_ids": commenter_ids, "comments": comments,
+        "follower_ids": follower_ids,
+    }
+
+def forget_user_content(content):
+    """
+    Drop a deleted user's topics and comments from the search indexes, the
+    trending sets and the resolver and search caches, as the topic and comment
+    delete mutations do, here and in the other processes.
+    """
+    for topic_id, tag_names in content["topics"].items():
+        unindex_topic(topic_id)
+        forget_topic(topic_id, tag_names)
+    for topic_id, created_at, tag_names in content["comments"]:
+        adjust_topic_comment_count(topic_id, -1)
+        record_comment_deleted(topic_id, created_at, tag_names)
+    forget_user_trending_tags(*content["follower_ids"])
+    tags = {_user_tag(content["user_id"])} | set(map(_user_tag, content["commenter_ids"]))
+    tags |= {_topic_tag(topic_id) for topic_id in content["topics"]}
+    tags |= {_topic_tag(topic_id) for topic_id, _, _ in content["comments"]}
+    if content["topics"]:
+        bump_topics_version()
+        tags |= {TOPICS_TAG, SEARCH_INDEX_TAG}
+    invalidate_tags(*sorted(tags))
+
+# These resolvers used to return ORM rows, whose datetimes Strawberry renders with str()
+def _dump_topic(topic):
+    return topic_fields(topic, timestamp=str)
+
+def _dump_comment(comment):
+    return comment_fields(comment, timestamp=str)
+
+def _load_topics(rows):
+    return [TopicType(**row) for row in rows]
+
+def _load_comments(rows):
+    return [CommentType(**row) for row in rows]
+
+def _read_trending_ids(read):
+    try:
+        return read()
+    except Exception as e:
+        print(f"Error reading trending topics from Redis: {e}")
+        return None
+
+def _trending_limit(max_topics):
+    return max(0, min(max_topics, settings.TRENDING_MAX_TOPICS))
+
+def _trending_topic_page(user, time_window, max_topics):
+    # Cached for an hour, refreshed ahead of expiry by a single worker
+    key = trending_cache_key(time_window, max_topics)
+    precomputed = (
+        time_window in settings.TRENDING_BATCH_WINDOWS_DAYS and max_topics in settings.TRENDING_BATCH_MAX_TOPICS
+    )
+    if precomputed:
+        # The background worker keeps these pages warm, so this is normally a cache read
+        compute = lambda: precompute_trending_pages()[key]
+    else:
+        topic_ids = _read_trending_ids(lambda: get_trending_topic_ids(time_window, max_topics))
+        if topic_ids is not None:
+            with next(get_db()) as db:
+                return _hydrate_topics(db, topic_ids)
+        compute = lambda: [topic_fields(topic) for topic in _compute_trending_topics(user, time_window, max_topics)]
+    cached_topics = cached_compute(key, compute, ttl=TRENDING_CACHE_TTL_SECONDS)
+    return [TopicType(**topic) for topic in cached_topics]
+
 @strawberry.type
 class Query:
     @strawberry.field
@@ -148,6 +246,12 @@ class Query:
         # return f"Hello, {user.username}!"
 
     @strawberry.field
+    @cached_resolver(
+        tags=lambda: [TOPICS_TAG],
+        dump=lambda topics: [_dump_topic(topic) for topic in topics],
+        load=_load_topics,
+        authenticate=get_user_from_context,
+    )
     def get_all_topics(self, info) -> list[TopicType]:
         user = get_user_from_context(info)
         db = next(get_db())
@@ -158,6 +262,12 @@ class Query:
             db.close()
 
     @strawberry.field
+    @cached_resolver(
+        tags=lambda title: [TOPICS_TAG],
+        dump=lambda topic: _dump_topic(topic) if topic else None,
+        load=lambda row: TopicType(**row) if row else None,
+        authenticate=get_user_from_context,
+    )
     def get_topic_by_name(self, title: str, info) -> TopicType:
         user = get_user_from_context(info)
         db = next(get_db())
@@ -168,24 +278,125 @@ class Query:
             db.close()
 
     @strawberry.field
-    def search_topics(self, prefix: str, info) -> list[TagType]:
+    def search_topics(self,
+                      prefix: str,
+                      info,
+                      limit: int = 10,
+                      offset: int = 0,
+                      rank_by: SearchRanking = SearchRanking.RECENCY,
+                      mode: SearchMode = SearchMode.PREFIX,
+                      max_edits: int = 1,
+                      tags: Optional[list[str]] = None,
+                      match_all_tags: bool = True) -> list[TopicType]:
         """
-        Search for topics using a Trie.
+        Search for topics by title prefix, using a Trie or Postgres depending on SEARCH_BACKEND.
+
+        Args:
+            limit (int): Maximum number of topics to return. Capped at SEARCH_MAX_LIMIT.
+            offset (int): Number of ranked topics to skip, for pagination.
+            rank_by (SearchRanking): Ordering of the results. Default is newest first.
+            mode (SearchMode): PREFIX for exact prefixes, FUZZY to tolerate typos,
+                WORD to match the start of any title word (all terms must match),
+                SUBSTRING to match anywhere in the title.
+            max_edits (int): Typos tolerated in FUZZY mode, 1 or 2. FUZZY results are
+                ordered by edit distance first, then by rank_by.
+            tags (list[str]): Only return topics carrying these tags.
+            match_all_tags (bool): Require every tag (default) rather than any of them.
+
+        Pages are cached in Redis for SEARCH_CACHE_TTL_SECONDS, until the next topic change.
         """
-        results = search_topics(prefix)
-        return [
-            TagType(
-                id=t["id"],
-                title=t["title"],
-                content=t["content"],
-                user_id=t["user_id"],
-                created_at=t["created_at"],
-                is_locked=t["is_locked"]
-            )
-            for t in results
-        ]    
+        limit, offset = _page_bounds(limit, offset)
+        max_edits = max(1, min(max_edits, settings.SEARCH_MAX_EDITS))
+        results = cached_search(
+            prefix, mode.value, rank_by.value, max_edits, limit, offset,
+            lambda: _search_topic_page(prefix, mode, rank_by, max_edits, limit, offset, tags, match_all_tags),
+            tags, match_all_tags
+        )
+        return [TopicType(**t) for t in results]
+
+    @strawberry.field
+    def search_topics_full_text(self,
+                                query: str,
+                                info,
+                                limit: int = 10,
+                                offset: int = 0,
+                                tags: Optional[list[str]] = None,
+                                match_all_tags: bool = True) -> list[TopicType]:
+        """
+        Full-text search over topic titles and content, ranked with BM25
+        (or ts_rank when SEARCH_BACKEND is "sql").
+
+        Args:
+            limit (int): Maximum number of topics to return. Capped at SEARCH_MAX_LIMIT.
+            offset (int): Number of ranked topics to skip, for pagination.
+            tags (list[str]): Only return topics carrying these tags.
+            match_all_tags (bool): Require every tag (default) rather than any of them.
+        """
+        if settings.SEARCH_BACKEND == "sql":
+            limit, offset = _page_bounds(limit, offset)
+            db = next(get_db())
+            try:
+                return db_search.search_topics_by_text(db, query, limit, offset, tags, match_all_tags)
+            finally:
+                db.close()
+
+        topic_ids = search_topic_text(query, limit, offset, tags, match_all_tags)
+        db = next(get_db())
+        try:
+            return _hydrate_topics(db, topic_ids)
+        finally:
+            db.close()
+
+    @strawberry.field
+    def get_topics_by_tags(self,
+                           tags: list[str],
+                           info,
+                           match_all: bool = True,
+                           rank_by: SearchRanking = SearchRanking.RECENCY,
+                           limit: int = 10,
+                           offset: int = 0) -> list[TopicType]:
+        """
+        List topics carrying the given tags.
+
+        Args:
+            match_all (bool): Require every tag (default) rather than any of them.
+            rank_by (SearchRanking): Ordering of the results. Default is newest first.
+            limit (int): Maximum number of topics to return. Capped at SEARCH_MAX_LIMIT.
+            offset (int): Number of ranked topics to skip, for pagination.
+        """
+        limit, offset = _page_bounds(limit, offset)
+        with next(get_db()) as db:
+            if settings.SEARCH_BACKEND == "sql":
+                return db_search.search_topics_by_tags(db, tags, match_all, rank_by.value, limit, offset)
+            return _hydrate_topics(db, list_topics_by_tags(tags, match_all, rank_by.value, limit, offset))
+
+    @strawberry.field
+    def get_tag_facets(self,
+                       info,
+                       tags: Optional[list[str]] = None,
+                       match_all_tags: bool = True,
+                       query: Optional[str] = None,
+                       mode: SearchMode = SearchMode.PREFIX,
+                       max_edits: int = 1,
+                       limit: int = 20) -> list[TagFacetType]:
+        """
+        Count topics per tag, most used first, for building tag filters.
+
+        Args:
+            tags (list[str]): Only count topics carrying these tags.
+            match_all_tags (bool): Require every tag (default) rather than any of them.
+            query (str): Only count topics matching this search, as in searchTopics.
+            mode (SearchMode): How query is matched against titles.
+            limit (int): Maximum number of tags to return. Capped at SEARCH_MAX_LIMIT.
+        """
+        limit, _ = _page_bounds(limit, 0)
+        if settings.SEARCH_BACKEND == "sql":
+            with next(get_db()) as db:
+                facets = db_search.count_topics_per_tag(db, tags, match_all_tags, query, mode.value, max_edits, limit)
+        else:
+            facets = tag_facets(tags, match_all_tags, query, mode.value, max_edits, limit)
+        return [TagFacetType(name=name, count=count) for name, count in facets]
 
-    
     @strawberry.field
     def get_topics_by_user(self, info) -> list[TopicType]:
         user = get_user_from_context(info)
@@ -197,6 +408,12 @@ class Query:
             db.close()
 
     @strawberry.field
+    @cached_resolver(
+        tags=lambda topic_id: [_topic_tag(topic_id)],
+        dump=lambda comments: [_dump_comment(comment) for comment in comments],
+        load=_load_comments,
+        authenticate=get_user_from_context,
+    )
     def get_comments_by_topic_id(self, topic_id: int, info) -> list[CommentType]:
         user = get_user_from_context(info)
         db = next(get_db())
@@ -207,6 +424,11 @@ class Query:
             db.close()
 
     @strawberry.field
+    @cached_resolver(
+        tags=lambda user_id: [_user_tag(user_id)],
+        dump=lambda comments: [_dump_comment(comment) for comment in comments],
+        load=_load_comments,
+    )
     def get_comments_by_user_id(self, user_id: int, info) -> list[CommentType]:
         """
         Retrieve all comments made by a specific user.
@@ -225,62 +447,106 @@ class Query:
                             max_topics: int = 10) -> list[TopicType]:
         """
         Retrieve trending topics with Redis caching.
+
+        Pages for the windows and sizes in TRENDING_BATCH_* are precomputed by the
+        background worker in server.src.caching.precompute and only computed here if
+        missing. Other windows listed in TRENDING_WINDOWS_DAYS are read from
+        incrementally maintained Redis sorted sets; the rest are scored in SQL and cached.
         
         Args:
             time_window (int): Number of days to consider for trending topics. Default is 7 days.
-            max_topics (int): Maximum number of trending topics to return. Default is 10.
+            max_topics (int): Maximum number of trending topics to return. Default is 10, capped at TRENDING_MAX_TOPICS.
         """
         user = get_user_from_context(info)
-        
-        # Try to get Redis connection
-        try:
-            redis_client = get_redis_connection()
-        except Exception:
-            # Fallback to computing without caching if Redis is unavailable
-            # Log this in a production environment
-            return _compute_trending_topics(user, time_window, max_topics)
-        
-        # Create a unique cache key based on parameters
-        cache_key = f"trending_topics:{time_window}:{max_topics}"
-        
-        try:
-            # Try to fetch from Redis cache first
-            cached_trending_topics = redis_client.get(cache_key)
-            if cached_trending_topics:
-                # Deserialize cached topics
-                cached_topics = json.loads(cached_trending_topics)
-                return [TopicType(**topic) for topic in cached_topics]
-            
-            # If not in cache, compute trending topics
-            result_topics = _compute_trending_topics(user, time_window, max_topics)
-            
-            # Serialize topics for caching (convert to dict)
-            serializable_topics = [
-                {
-                    "id": topic.id, 
-                    "title": topic.title, 
-                    "content": topic.content,
-                    "user_id": topic.user_id,
-                    "created_at": topic.created_at.isoformat(),
-                    "is_locked": topic.is_locked
-                } for topic in result_topics
-            ]
-            
-            # Cache the results in Redis with an expiration (e.g., 1 hour)
-            redis_client.setex(
-                cache_key, 
-                3600,  # 1 hour cache expiration 
-                json.dumps(serializable_topics)
+        max_topics = _trending_limit(max_topics)
+        if not max_topics:
+            return []
+        return _trending_topic_page(user, time_window, max_topics)
+
+    @strawberry.field
+    def get_trending_topics_by_tag(self,
+                                   tag: str,
+                                   info,
+                                   time_window: int = 7,
+                                   max_topics: int = 10) -> list[TopicType]:
+        """
+        Retrieve the trending topics carrying a tag.
+
+        Windows listed in TRENDING_WINDOWS_DAYS are read from the tag's Redis sorted
+        sets; other windows are scored in SQL and cached.
+
+        Args:
+            tag (str): Tag name, matched case-insensitively.
+            time_window (int): Number of days to consider for trending topics. Default is 7 days.
+            max_topics (int): Maximum number of trending topics to return. Default is 10, capped at TRENDING_MAX_TOPICS.
+        """
+        user = get_user_from_context(info)
+        max_topics = _trending_limit(max_topics)
+        if not max_topics:
+            return []
+        tag = normalize_tag(tag)
+        topic_ids = _read_trending_ids(lambda: get_trending_topic_ids(time_window, max_topics, tag))
+        if topic_ids is not None:
+            with next(get_db()) as db:
+                return _hydrate_topics(db, topic_ids)
+
+        cached_topics = cached_compute(
+            f"{trending_cache_key(time_window, max_topics)}:tag:{tag}",
+            lambda: [topic_fields(topic) for topic in _compute_trending_topics(user, time_window, max_topics, tag)],
+            ttl=TRENDING_CACHE_TTL_SECONDS,
+        )
+        return [TopicType(**topic) for topic in cached_topics]
+
+    @strawberry.field
+    def get_personalized_trending_topics(self,
+                                         info,
+                                         time_window: int = 7,
+                                         max_topics: int = 10) -> list[TopicType]:
+        """
+        Retrieve trending topics for the current user, boosting topics that carry
+        the tags of the topics they subscribe to or started.
+
+        The feed merges the global and per-tag Redis sorted sets; windows not listed
+        in TRENDING_WINDOWS_DAYS, and users without tags, get the global list. The
+        user's tags are cached until their topics or subscribed topics are retagged.
+
+        Args:
+            time_window (int): Number of days to consider for trending topics. Default is 7 days.
+            max_topics (int): Maximum number of trending topics to return. Default is 10, capped at TRENDING_MAX_TOPICS.
+        """
+        user = get_user_from_context(info)
+        max_topics = _trending_limit(max_topics)
+        if not max_topics:
+            return []
+        with next(get_db()) as db:
+            tags = get_user_trending_tags(
+                user.id, lambda: db_trending.get_user_trending_tags(db, user.id, settings.TRENDING_PERSONAL_MAX_TAGS)
             )
-            
-            return result_topics
-        
-        finally:
-            # Ensure Redis connection is closed
-            if redis_client:
-                redis_client.close()
+            if tags:
+                topic_ids = _read_trending_ids(
+                    lambda: get_personalized_trending_topic_ids(time_window, max_topics, tags)
+                )
+                if topic_ids is not None:
+                    return _hydrate_topics(db, topic_ids)
+        return _trending_topic_page(user, time_window, max_topics)
 
     
+    @strawberry.field
+    def get_redis_pool_stats(self, info) -> RedisPoolStatsType:
+        """
+        Redis connection pool counters of the worker process serving the request.
+        """
+        get_user_from_context(info)
+        return RedisPoolStatsType(**get_redis_pool_stats())
+
+    @strawberry.field
+    def get_search_cache_stats(self, info) -> SearchCacheStatsType:
+        """
+        Search cache hit and miss counts across all workers, for tuning SEARCH_CACHE_TTL_SECONDS.
+        """
+        get_user_from_context(info)
+        return SearchCacheStatsType(**get_search_cache_stats())
+
     @strawberry.field
     def get_user_notifications(self, info) -> list[NotificationType]:
         """
@@ -320,6 +586,10 @@ class Mutation:
 
             db.commit()  # Commit the session to persist the topic
             db.refresh(topic)  # Refresh the topic to bind it to the session
+            index_topic(topic)
+            bump_topics_version()
+            record_topic_created(topic)
+            invalidate_tags(TOPICS_TAG, SEARCH_INDEX_TAG, _topic_tag(topic.id))
 
             return topic
 
@@ -332,8 +602,15 @@ class Mutation:
                 if not topic:
                     raise HTTPException(status_code=404, detail="Topic not found or unauthorized")
                 
+                tag_names = [tag.name for tag in topic.tags]
+                commenter_ids = [
+                    user_id for (user_id,) in db.query(Comment.user_id).filter_by(topic_id=topic_id).distinct()
+                ]
+                follower_ids = _topic_followers(db, topic_id, user.id) if tag_names else set()
                 # Optional: Delete associated comments first
                 db.query(Comment).filter_by(topic_id=topic_id).delete()
+                # The bulk delete skips the mapper events that maintain the activity rollup
+                delete_topic_activity(db, topic_id)
                 
                 # Create a notification about topic deletion
                 create_notification(
@@ -346,6 +623,11 @@ class Mutation:
                 
                 db.delete(topic)
                 db.commit()
+                unindex_topic(topic_id)
+                bump_topics_version()
+                forget_topic(topic_id, tag_names)
+                forget_user_trending_tags(*follower_ids)
+                invalidate_tags(TOPICS_TAG, SEARCH_INDEX_TAG, _topic_tag(topic_id), *map(_user_tag, commenter_ids))
                 
                 return True
         except Exception as e:
@@ -365,9 +647,42 @@ class Mutation:
                 topic.content = content
                 db.commit()  # Commit the changes to persist them in the database
                 db.refresh(topic)  # Refresh the topic to reflect the updated state
+                index_topic(topic)
+                bump_topics_version()
+                invalidate_tags(TOPICS_TAG, SEARCH_INDEX_TAG, _topic_tag(topic.id))
                 return topic
             raise HTTPException(status_code=404, detail="Topic not found or unauthorized")
         
+    @strawberry.field
+    def set_topic_tags(self, topic_id: int, tags: list[str], info) -> list[str]:
+        """
+        Replace the tags of one of the current user's topics, creating tags that do not exist yet.
+        Returns the topic's tag names.
+        """
+        user = get_user_from_context(info)
+        names = sorted({normalize_tag(name) for name in tags if name.strip()})
+        with next(get_db()) as db:
+            topic = db.query(Topic).filter_by(id=topic_id, user_id=user.id).first()
+            if not topic:
+                raise HTTPException(status_code=404, detail="Topic not found or unauthorized")
+
+            old_names = [tag.name for tag in topic.tags]
+            # Tags stored before names were normalized may differ in case; reuse them rather
+            # than add a second row per name, preferring the oldest when several match
+            existing = {}
+            if names:
+                for tag in db.query(Tag).filter(func.lower(Tag.name).in_(names)).order_by(Tag.id):
+                    existing.setdefault(tag.name.lower(), tag)
+            topic.tags = [existing.get(name) or Tag(name=name) for name in names]
+            follower_ids = _topic_followers(db, topic_id, user.id)
+            db.commit()
+            retag_topic(topic_id, names)
+            bump_topics_version()
+            record_topic_retagged(topic_id, old_names, names)
+            forget_user_trending_tags(*follower_ids)
+            invalidate_tags(SEARCH_INDEX_TAG, _topic_tag(topic_id))
+            return names
+
     @strawberry.field
     def create_comment(self, topic_id: int, content: str, info) -> CommentType:
         user = get_user_from_context(info)
@@ -390,6 +705,10 @@ class Mutation:
 
             db.commit()
             db.refresh(comment)
+            if topic:
+                adjust_topic_comment_count(topic.id, 1)
+                record_comment_created(topic.id, comment.created_at, [tag.name for tag in topic.tags])
+            invalidate_tags(_topic_tag(topic_id), _user_tag(user.id))
             
             return comment
 
@@ -408,8 +727,13 @@ class Mutation:
         with next(get_db()) as db:
             comment = db.query(Comment).filter_by(id=comment_id, user_id=user.id).first()
             if comment:
+                topic_id, created_at = comment.topic_id, comment.created_at
+                tag_names = [tag.name for tag in comment.topic.tags]
                 db.delete(comment)
                 db.commit()
+                adjust_topic_comment_count(topic_id, -1)
+                record_comment_deleted(topic_id, created_at, tag_names)
+                invalidate_tags(_topic_tag(topic_id), _user_tag(user.id))
                 return True
             return False
 
@@ -422,6 +746,7 @@ class Mutation:
                 comment.content = content
                 db.commit()  # Commit the changes to persist them in the database
                 db.refresh(comment)  # Refresh the comment to reflect the updated state
+                invalidate_tags(_topic_tag(comment.topic_id), _user_tag(user.id))
                 return comment
             raise HTTPException(status_code=404, detail="Comment not found or unauthorized")
         
@@ -1,4 +1,6 @@
+from datetime import datetime
 import strawberry
+from enum import Enum
 
 @strawberry.type
 class UserType:
@@ -22,6 +24,25 @@ class TopicType:
     view_count: int = 0
     is_locked: bool
 
+def _format_time(value, timestamp):
+    return timestamp(value) if value is not None else None
+
+def topic_fields(topic, timestamp=datetime.isoformat):
+    """
+    A Topic row as TopicType keyword arguments, in a form that can be cached as JSON.
+    timestamp formats its datetimes.
+    """
+    return {
+        "id": topic.id,
+        "title": topic.title,
+        "content": topic.content,
+        "user_id": topic.user_id,
+        "created_at": timestamp(topic.created_at),
+        "updated_at": _format_time(topic.updated_at, timestamp),
+        "view_count": topic.view_count or 0,
+        "is_locked": topic.is_locked
+    }
+
 @strawberry.type
 class CommentType:
     id: int
@@ -32,6 +53,21 @@ class CommentType:
     updated_at: str
     parent_id: int
 
+def comment_fields(comment, timestamp=datetime.isoformat):
+    """
+    A Comment row as CommentType keyword arguments, in a form that can be cached as JSON.
+    timestamp formats its datetimes.
+    """
+    return {
+        "id": comment.id,
+        "topic_id": comment.topic_id,
+        "content": comment.content,
+        "user_id": comment.user_id,
+        "created_at": timestamp(comment.created_at),
+        "updated_at": _format_time(comment.updated_at, timestamp),
+        "parent_id": comment.parent_id
+    }
+
 @strawberry.type
 class NotificationType:
     id: int
@@ -50,15 +86,36 @@ class UserTopicSubscriptionType:
     subscribed_at: str
     notification_preference: str
 
-@strawberry.type
-class TagType:
-    id: int
-    title: str
-    content: str
-    user_id: int
-    created_at: str
-    is_locked: bool
+@strawberry.enum
+class SearchRanking(Enum):
+    RECENCY = "recency"
+    VIEW_COUNT = "view_count"
+    COMMENT_COUNT = "comment_count"
 
+@strawberry.enum
+class SearchMode(Enum):
+    PREFIX = "prefix"
+    FUZZY = "fuzzy"  # Prefix match tolerating up to max_edits typos
+    WORD = "word"  # Every query term is a prefix of some word in the title
+    SUBSTRING = "substring"  # Query appears anywhere in the title
 
+@strawberry.type
+class TagFacetType:
+    name: str
+    count: int
 
-    
\ No newline at end of file
+@strawberry.type
+class RedisPoolStatsType:
+    max_connections: int
+    created: int
+    in_use: int
+    acquired: int
+    waits: int
+    wait_seconds: float
+    errors: int
+
+@strawberry.type
+class SearchCacheStatsType:
+    hits: int
+    misses: int
+    hit_rate: float
@@ -0,0 +1,118 @@
+from array import array
+import json
+import mmap
+import os
+import struct
+from server.src.utils.inverted_index import read_column, write_column
+
+# Compact columnar snapshot of the indexed topic entries, so workers can start
+# without scanning the topics table. The file is memory-mapped when read: the
+# numeric columns are zero-copy views, and the pages live in the OS page cache
+# shared by every worker on the host.
+#
+# Layout (little-endian; big-endian hosts read byte-swapped copies, not views):
+#   header    magic, format version, metadata length, record count
+#   metadata  JSON (high-water marks), padded to 8 bytes
+#   columns   id, view_count, comment_count as int64, created_at as float64
+#             (seconds since the epoch), count + 1 title offsets as uint64
+#   strings   UTF-8 blob of the titles
+
+MAGIC = b"TPCS"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sHIQ")
+INT_FIELDS = ("id", "view_count", "comment_count")
+
+def _pad(length):
+    return (-length) % 8
+
+def write_topic_snapshot(path, records, metadata):
+    """
+    Write topic records (dicts of id, title, created_at, view_count and
+    comment_count) to path, replacing any existing snapshot atomically.
+    """
+    columns = {field: array("q") for field in INT_FIELDS}
+    created_at = array("d")
+    offsets = array("Q", [0])
+    blob = bytearray()
+    for record in records:
+        for field in INT_FIELDS:
+            columns[field].append(record[field] or 0)
+        created_at.append(record["created_at"])
+        blob += record["title"].encode("utf-8")
+        offsets.append(len(blob))
+
+    encoded_metadata = json.dumps(metadata).encode("utf-8")
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(encoded_metadata), len(created_at)))
+        f.write(encoded_metadata + b"\0" * _pad(HEADER.size + len(encoded_metadata)))
+        for field in INT_FIELDS:
+            write_column(f, columns[field])
+        write_column(f, created_at)
+        write_column(f, offsets)
+        f.write(blob)
+    os.replace(temp_path, path)
+
+class TopicSnapshot:
+    """
+    Read-only view over a snapshot file written by write_topic_snapshot.
+    """
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, metadata_length, count = HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"Unsupported search snapshot format in {path}")
+            view = memoryview(self._mmap)
+            position = HEADER.size
+            self.metadata = json.loads(bytes(view[position:position + metadata_length]))
+            position += metadata_length + _pad(HEADER.size + metadata_length)
+
+            self.count = count
+            self._columns = {}
+            for field in INT_FIELDS:
+                self._columns[field] = read_column(view, position, "q", count)
+                position += 8 * count
+            self._created_at = read_column(view, position, "d", count)
+            position += 8 * count
+            self._offsets = read_column(view, position, "Q", count + 1)
+            position += 8 * (count + 1)
+            self._strings = view[position:]
+        except Exception:
+            self.close()
+            raise
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        ids = self._columns["id"]
+        view_counts = self._columns["view_count"]
+        comment_counts = self._columns["comment_count"]
+        created_at = self._created_at
+        offsets = self._offsets
+        strings = self._strings
+        for i in range(self.count):
+            yield {
+                "id": ids[i],
+                "title": str(strings[offsets[i]:offsets[i + 1]], "utf-8"),
+                "created_at": created_at[i],
+                "view_count": view_counts[i],
+                "comment_count": comment_counts[i],
+            }
+
+    def close(self):
+        # Views must be released before the map can be closed
+        for name in ("_columns", "_created_at", "_offsets", "_strings"):
+            value = self.__dict__.pop(name, None)
+            for view in (value.values() if isinstance(value, dict) else [value]):
+                if isinstance(view, memoryview):
+                    view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
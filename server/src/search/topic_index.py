@@ -0,0 +1,586 @@
+from datetime import datetime
+import heapq
+from operator import attrgetter
+import os
+import socket
+import threading
+import time
+from sqlalchemy import func, or_
+from server.src.db.models import Topic, Comment, Tag, topic_tags
+from server.src.db.session import get_db
+from server.src.utils.tries import RadixTrie
+from server.src.utils.inverted_index import InvertedIndex
+from server.src.utils.ngram_index import NGramIndex
+from server.src.utils.bitmap_index import Bitmap, TagBitmapIndex
+from server.src.search.snapshot import TopicSnapshot, write_topic_snapshot
+from server.src.caching.connector import get_redis_connection
+from server.src.caching.search_cache import SEARCH_INDEX_TAG, bump_topics_version
+from server.src.core.config import settings
+
+# In-process search indexes over topics, built once per worker and kept in sync by the GraphQL mutations.
+# The indexes hold topic ids and ranking fields only; callers load the page they return from the database.
+
+EPOCH = datetime(1970, 1, 1)
+
+class TopicEntry:
+    """
+    What the indexes keep per topic: its id and the fields results are ranked by.
+    """
+    __slots__ = ("id", "created_at", "view_count", "comment_count")
+
+    def __init__(self, id, created_at, view_count, comment_count):
+        self.id = id
+        self.created_at = created_at  # Seconds since EPOCH, naive like the column
+        self.view_count = view_count
+        self.comment_count = comment_count
+
+    @classmethod
+    def from_topic(cls, topic, comment_count=0):
+        return cls(topic.id, (topic.created_at - EPOCH).total_seconds(), topic.view_count or 0, comment_count)
+
+# Scoring functions for ranked search, keyed by SearchRanking value (higher is better)
+SEARCH_RANKINGS = {
+    "recency": attrgetter("created_at"),
+    "view_count": attrgetter("view_count"),
+    "comment_count": attrgetter("comment_count"),
+}
+
+class SearchIndexes:
+    """
+    The in-process indexes over topics, built and swapped in as a unit.
+    """
+    def __init__(self, text=None):
+        self.trie = RadixTrie(rankings=SEARCH_RANKINGS, top_k=settings.SEARCH_TOP_K, identity=attrgetter("id"))
+        self.text = text if text is not None else InvertedIndex()
+        self.titles = NGramIndex()
+        self.tags = TagBitmapIndex()
+        self.entries = {}  # topic id -> TopicEntry
+
+    def register(self, entry, title):
+        """
+        Record a topic in the title index and entry map during a bulk build.
+        Returns the (title, entry) pair for RadixTrie.insert_many.
+        """
+        self.titles.add(entry.id, title)
+        self.entries[entry.id] = entry
+        return title, entry
+
+    def add_topic(self, entry, title, content=None):
+        """
+        Index or re-index a topic. Passing content also refreshes its full-text entry.
+        """
+        previous_title = self.titles.titles.get(entry.id)
+        if previous_title is not None and previous_title != title.lower():
+            self.trie.delete(previous_title, entry.id)
+        self.trie.insert(title, entry)
+        if previous_title != title.lower():
+            self.titles.add(entry.id, title)
+        self.entries[entry.id] = entry
+        if content is not None:
+            self.text.add(entry.id, title, content)
+
+    def remove_topic(self, topic_id):
+        title = self.titles.titles.get(topic_id)
+        if title is not None:
+            self.trie.delete(title, topic_id)
+            self.titles.remove(topic_id)
+        self.text.remove(topic_id)
+        self.tags.remove_topic(topic_id)
+        self.entries.pop(topic_id, None)
+
+    def ranked(self, topic_ids, ranking, limit, offset=0):
+        """
+        Page through topic ids from the title index, best first by the given ranking.
+        """
+        entries = [self.entries[topic_id] for topic_id in topic_ids if topic_id in self.entries]
+        return heapq.nlargest(offset + limit, entries, key=SEARCH_RANKINGS[ranking])[offset:]
+
+indexes = SearchIndexes()
+_indexes_loaded = False
+# Watermarks of the last load or reconcile; changes past them have not been read
+_index_metadata = None
+# Guards the live indexes: writers update them in place, so readers hold it as well
+_index_lock = threading.Lock()
+# Serializes whole loads, so two of them never reset each other's pending operations
+_load_lock = threading.Lock()
+# Index operations applied while a rebuild is in flight, replayed onto the new indexes before they are swapped in
+_pending_index_ops = None
+
+def _snapshot_paths():
+    directory = settings.SEARCH_SNAPSHOT_DIR
+    if not directory:
+        return None
+    return os.path.join(directory, "topics.snapshot"), os.path.join(directory, "text_index.snapshot")
+
+# Workers share SEARCH_SNAPSHOT_DIR: the first to set this key writes the snapshots,
+# and nobody else does until it expires a reconcile interval later
+SNAPSHOT_WRITER_KEY = "search:snapshot:writer"
+
+def _claim_snapshot_write():
+    try:
+        redis_client = get_redis_connection()
+        try:
+            writer = f"{socket.gethostname()}:{os.getpid()}"
+            return bool(redis_client.set(
+                SNAPSHOT_WRITER_KEY, writer, nx=True, ex=settings.SEARCH_RECONCILE_INTERVAL_SECONDS
+            ))
+        finally:
+            redis_client.close()
+    except Exception as e:
+        print(f"Error claiming the search snapshot write: {e}")
+        return False
+
+def _save_snapshots(metadata):
+    """
+    Write the live indexes to SEARCH_SNAPSHOT_DIR, if this worker is the one
+    writing them this interval. Index updates wait while they are written.
+    """
+    paths = _snapshot_paths()
+    if paths is None or not _claim_snapshot_write():
+        return
+    topics_path, text_path = paths
+    try:
+        os.makedirs(settings.SEARCH_SNAPSHOT_DIR, exist_ok=True)
+        with _index_lock:
+            current = indexes
+            titles = current.titles.titles
+            records = (
+                {
+                    "id": entry.id,
+                    "title": titles[entry.id],
+                    "created_at": entry.created_at,
+                    "view_count": entry.view_count,
+                    "comment_count": entry.comment_count,
+                }
+                for entry in current.entries.values()
+            )
+            current.text.metadata = dict(metadata)
+            current.text.save(text_path)
+            write_topic_snapshot(topics_path, records, metadata)
+    except Exception as e:
+        print(f"Error saving search snapshots to {settings.SEARCH_SNAPSHOT_DIR}: {e}")
+
+def _index_high_water_marks(db):
+    """
+    Watermarks recorded with a snapshot: anything past them must be replayed on load.
+    """
+    latest_update, max_topic_id = db.query(func.max(Topic.updated_at), func.max(Topic.id)).one()
+    return {
+        "updated_at": latest_update.isoformat() if latest_update else None,
+        "max_topic_id": max_topic_id or 0,
+    }
+
+def _changed_since(previous):
+    """
+    Filter for the topics created or updated since the given watermarks were read.
+    """
+    changed = Topic.id > previous["max_topic_id"]
+    if previous["updated_at"]:
+        changed = or_(
+            changed,
+            Topic.updated_at >= datetime.fromisoformat(previous["updated_at"]),
+            Topic.updated_at.is_(None),
+        )
+    return changed
+
+def _load_tag_index(db):
+    rows = db.query(topic_tags.c.topic_id, Tag.name).join(Tag, Tag.id == topic_tags.c.tag_id)
+    return TagBitmapIndex.from_pairs(rows)
+
+def _build_from_database(db):
+    new_indexes = SearchIndexes()
+    # Read the watermarks first so that concurrent writes land after them and get replayed
+    metadata = _index_high_water_marks(db)
+    comment_counts = dict(
+        db.query(Comment.topic_id, func.count(Comment.id)).group_by(Comment.topic_id).all()
+    )
+
+    def trie_items():
+        for topic in db.query(Topic).yield_per(1000):
+            new_indexes.text.add(topic.id, topic.title, topic.content)
+            yield new_indexes.register(TopicEntry.from_topic(topic, comment_counts.get(topic.id, 0)), topic.title)
+
+    new_indexes.trie.insert_many(trie_items())
+    new_indexes.tags = _load_tag_index(db)
+    return new_indexes, metadata
+
+def _build_from_snapshot(db):
+    """
+    Restore the indexes from the on-disk snapshots and replay topics created,
+    updated, deleted or commented on since they were written. Returns None if
+    there is no usable snapshot.
+    """
+    paths = _snapshot_paths()
+    if paths is None or not all(os.path.exists(path) for path in paths):
+        return None
+    topics_path, text_path = paths
+    try:
+        snapshot = TopicSnapshot(topics_path)
+    except Exception as e:
+        print(f"Error loading search snapshot {topics_path}: {e}")
+        return None
+
+    with snapshot:
+        text_index = InvertedIndex.load(text_path)
+        if text_index is None or text_index.metadata != snapshot.metadata:
+            # The two files were not written by the same pass
+            return None
+        previous = snapshot.metadata
+        metadata = _index_high_water_marks(db)
+
+        changed = {topic.id: topic for topic in db.query(Topic).filter(_changed_since(previous))}
+        live_ids = {topic_id for (topic_id,) in db.query(Topic.id)}
+        # Deleted comments leave no trace to replay from, so every count is taken
+        # afresh with one aggregate query, as in a full build
+        comment_counts = dict(
+            db.query(Comment.topic_id, func.count(Comment.id)).group_by(Comment.topic_id).all()
+        )
+
+        new_indexes = SearchIndexes(text=text_index)
+
+        def trie_items():
+            for record in snapshot:
+                topic_id = record["id"]
+                if topic_id not in live_ids or topic_id in changed:
+                    continue
+                entry = TopicEntry(topic_id, record["created_at"], record["view_count"], comment_counts.get(topic_id, 0))
+                yield new_indexes.register(entry, record["title"])
+            for topic in changed.values():
+                yield new_indexes.register(TopicEntry.from_topic(topic, comment_counts.get(topic.id, 0)), topic.title)
+
+        new_indexes.trie.insert_many(trie_items())
+
+    # Tag assignments are not part of the snapshot: one pass over topic_tags is cheap
+    new_indexes.tags = _load_tag_index(db)
+    for doc_id in [doc_id for doc_id in text_index.doc_lengths if doc_id not in live_ids]:
+        text_index.remove(doc_id)
+    for topic in changed.values():
+        text_index.add(topic.id, topic.title, topic.content)
+    text_index.metadata = metadata
+    return new_indexes, metadata
+
+def load_search_indexes(use_snapshot=False, if_missing=False):
+    """
+    Build fresh search indexes and swap them in for the current ones.
+    Used at startup; afterwards reconcile_search_indexes catches up incrementally.
+
+    With use_snapshot, the indexes are restored from SEARCH_SNAPSHOT_DIR and only
+    topics changed since the snapshot are read from the database. A full rebuild
+    from the database writes a new snapshot. With if_missing, do nothing if
+    another caller has loaded them meanwhile.
+    """
+    with _load_lock:
+        if if_missing and _indexes_loaded:
+            return
+        _load_search_indexes(use_snapshot)
+
+def _load_search_indexes(use_snapshot):
+    global indexes, _indexes_loaded, _index_metadata, _pending_index_ops
+
+    with _index_lock:
+        _pending_index_ops = []
+
+    db = next(get_db())
+    try:
+        built = _build_from_snapshot(db) if use_snapshot else None
+        from_database = built is None
+        if from_database:
+            built = _build_from_database(db)
+    except Exception:
+        with _index_lock:
+            _pending_index_ops = None
+        raise
+    finally:
+        db.close()
+    new_indexes, metadata = built
+
+    with _index_lock:
+        for op in _pending_index_ops:
+            op(new_indexes)
+        _pending_index_ops = None
+        indexes = new_indexes
+        _indexes_loaded = True
+        _index_metadata = metadata
+
+    if from_database:
+        _save_snapshots(metadata)
+
+def ensure_search_indexes_loaded():
+    """
+    Build the indexes on first use if the startup hook did not run.
+    """
+    if not _indexes_loaded:
+        load_search_indexes(use_snapshot=True, if_missing=True)
+
+def _apply_index_op(op):
+    with _index_lock:
+        # Before the first load there is nothing to update: the load reads the committed change itself
+        if _indexes_loaded:
+            op(indexes)
+        if _pending_index_ops is not None:
+            _pending_index_ops.append(op)
+
+def index_topic(topic):
+    """
+    Add a topic to the indexes, re-keying it in the Trie if the title changed.
+    """
+    topic_id, title, content = topic.id, topic.title, topic.content
+    existing = indexes.entries.get(topic_id)
+    entry = TopicEntry.from_topic(topic, existing.comment_count if existing else 0)
+    _apply_index_op(lambda target: target.add_topic(entry, title, content))
+
+def unindex_topic(topic_id):
+    """
+    Remove a topic from the indexes.
+    """
+    _apply_index_op(lambda target: target.remove_topic(topic_id))
+
+def adjust_topic_comment_count(topic_id, delta):
+    """
+    Update the comment count used for ranking without touching the database.
+    """
+    def op(target):
+        existing = target.entries.get(topic_id)
+        if existing is not None:
+            entry = TopicEntry(existing.id, existing.created_at, existing.view_count, max(0, existing.comment_count + delta))
+            target.add_topic(entry, target.titles.titles[topic_id])
+
+    _apply_index_op(op)
+
+def retag_topic(topic_id, tag_names):
+    """
+    Replace the tags of a topic in the tag index.
+    """
+    tag_names = list(tag_names)
+    _apply_index_op(lambda target: target.tags.set_topic_tags(topic_id, tag_names))
+
+def _read_topics(db, topic_ids):
+    """
+    The (entry, title, content) records and tag names of the topics that still exist.
+    """
+    topics = db.query(Topic).filter(Topic.id.in_(topic_ids)).all()
+    comment_counts = dict(
+        db.query(Comment.topic_id, func.count(Comment.id))
+        .filter(Comment.topic_id.in_(topic_ids))
+        .group_by(Comment.topic_id)
+        .all()
+    )
+    tag_names = {}
+    rows = (
+        db.query(topic_tags.c.topic_id, Tag.name)
+        .join(Tag, Tag.id == topic_tags.c.tag_id)
+        .filter(topic_tags.c.topic_id.in_(topic_ids))
+    )
+    for topic_id, name in rows:
+        tag_names.setdefault(topic_id, []).append(name)
+    records = [
+        (TopicEntry.from_topic(topic, comment_counts.get(topic.id, 0)), topic.title, topic.content)
+        for topic in topics
+    ]
+    return records, tag_names
+
+def _refresh_op(topic_ids, records, tag_names):
+    def op(target):
+        for entry, title, content in records:
+            target.add_topic(entry, title, content)
+            target.tags.set_topic_tags(entry.id, tag_names.get(entry.id, []))
+        for topic_id in topic_ids - {entry.id for entry, _, _ in records}:
+            target.remove_topic(topic_id)
+
+    return op
+
+def refresh_topics(topic_ids):
+    """
+    Re-read topics from the database and re-index them, or remove those that
+    no longer exist. Applies changes committed by other processes.
+    """
+    topic_ids = set(topic_ids)
+    if not topic_ids:
+        return
+    db = next(get_db())
+    try:
+        records, tag_names = _read_topics(db, topic_ids)
+    finally:
+        db.close()
+    _apply_index_op(_refresh_op(topic_ids, records, tag_names))
+
+def refresh_invalidated_topics(tags):
+    """
+    Invalidation bus handler: refresh the topics named by "topic:<id>" tags.
+    Search pages this worker cached before the refresh are retired afterwards.
+    """
+    prefix = "topic:"
+    refresh_topics(int(tag[len(prefix):]) for tag in tags if tag.startswith(prefix) and tag[len(prefix):].isdigit())
+    if SEARCH_INDEX_TAG in tags:
+        bump_topics_version()
+
+def reconcile_search_indexes():
+    """
+    Catch up with changes made outside this process whose invalidation events
+    were missed. Only topics created or updated since the last load or reconcile
+    are read in full; deletions, comment counts and tag assignments are compared
+    through id, count and tag queries. Then write the snapshots, if this worker
+    is the one writing them this interval.
+    """
+    global _index_metadata, _pending_index_ops
+
+    ensure_search_indexes_loaded()
+    with _load_lock:
+        # Operations applied while the database is read are replayed on top of what was read, as in a load
+        with _index_lock:
+            _pending_index_ops = []
+        db = next(get_db())
+        try:
+            metadata = _index_high_water_marks(db)
+            changed_ids = {topic_id for (topic_id,) in db.query(Topic.id).filter(_changed_since(_index_metadata))}
+            records, tag_names = _read_topics(db, changed_ids) if changed_ids else ([], {})
+            live_ids = {topic_id for (topic_id,) in db.query(Topic.id)}
+            comment_counts = dict(
+                db.query(Comment.topic_id, func.count(Comment.id)).group_by(Comment.topic_id).all()
+            )
+            tags = _load_tag_index(db)
+        except Exception:
+            with _index_lock:
+                _pending_index_ops = None
+            raise
+        finally:
+            db.close()
+
+        refresh = _refresh_op(changed_ids, records, tag_names)
+        with _index_lock:
+            current = indexes
+            for topic_id in [topic_id for topic_id in current.entries if topic_id not in live_ids]:
+                current.remove_topic(topic_id)
+            current.tags = tags
+            refresh(current)
+            for topic_id, entry in list(current.entries.items()):
+                comment_count = comment_counts.get(topic_id, 0)
+                if entry.comment_count != comment_count:
+                    entry = TopicEntry(entry.id, entry.created_at, entry.view_count, comment_count)
+                    current.add_topic(entry, current.titles.titles[topic_id])
+            for op in _pending_index_ops:
+                op(current)
+            _pending_index_ops = None
+            _index_metadata = metadata
+    _save_snapshots(metadata)
+
+def _reconcile_indexes_forever(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            reconcile_search_indexes()
+        except Exception as e:
+            print(f"Error reconciling search indexes: {e}")
+
+def start_index_reconciler(interval=None):
+    """
+    Start a daemon thread that periodically reconciles the indexes with the
+    database, picking up any changes made outside of this process.
+    """
+    interval = interval or settings.SEARCH_RECONCILE_INTERVAL_SECONDS
+    thread = threading.Thread(target=_reconcile_indexes_forever, args=(interval,), daemon=True)
+    thread.start()
+    return thread
+
+def _tag_matches(current, tags, match_all):
+    """
+    Bitmap of the topics passing a tag filter, or None when there is no filter.
+    """
+    return current.tags.match(tags, match_all) if tags else None
+
+def search_topics(query, ranking="recency", limit=10, offset=0, tags=None, match_all_tags=True):
+    """
+    Search for topics in the Trie, best first by the given ranking, optionally
+    restricted to topics carrying all (or any) of the given tags.
+    Returns topic ids.
+    """
+    ensure_search_indexes_loaded()
+    limit = max(0, min(limit, settings.SEARCH_MAX_LIMIT))
+    with _index_lock:
+        current = indexes
+        tagged = _tag_matches(current, tags, match_all_tags)
+        accept = (lambda entry: entry.id in tagged) if tagged is not None else None
+        return [entry.id for entry in current.trie.top(query, ranking, limit, max(0, offset), accept)]
+
+def fuzzy_search_topics(query, max_edits=1, ranking="recency", limit=10, offset=0, tags=None, match_all_tags=True):
+    """
+    Typo-tolerant prefix search, closest edit distance first and then by the given ranking.
+    Returns topic ids.
+    """
+    ensure_search_indexes_loaded()
+    limit = max(0, min(limit, settings.SEARCH_MAX_LIMIT))
+    max_edits = max(1, min(max_edits, settings.SEARCH_MAX_EDITS))
+    with _index_lock:
+        current = indexes
+        tagged = _tag_matches(current, tags, match_all_tags)
+        accept = (lambda entry: entry.id in tagged) if tagged is not None else None
+        return [entry.id for _, entry in current.trie.fuzzy(query, max_edits, ranking, limit, max(0, offset), accept)]
+
+def search_topic_text(query, limit=10, offset=0, tags=None, match_all_tags=True):
+    """
+    Full-text search over topic titles and content.
+    Returns topic ids, best BM25 match first.
+    """
+    ensure_search_indexes_loaded()
+    limit = max(0, min(limit, settings.SEARCH_MAX_LIMIT))
+    with _index_lock:
+        current = indexes
+        tagged = _tag_matches(current, tags, match_all_tags)
+        accept = tagged.__contains__ if tagged is not None else None
+        return [doc_id for doc_id, _ in current.text.search(query, limit, max(0, offset), accept)]
+
+def _title_matches(current, query, mode):
+    if mode == "substring":
+        return current.titles.substring(query)
+    return current.titles.word_prefix(query)
+
+def search_topic_titles(query, mode, ranking="recency", limit=10, offset=0, tags=None, match_all_tags=True):
+    """
+    Match anywhere in the title rather than from its first character.
+    mode is "word" (every query term prefixes some title word) or "substring".
+    Returns topic ids.
+    """
+    ensure_search_indexes_loaded()
+    limit = max(0, min(limit, settings.SEARCH_MAX_LIMIT))
+    with _index_lock:
+        current = indexes
+        topic_ids = _title_matches(current, query, mode)
+        tagged = _tag_matches(current, tags, match_all_tags)
+        if tagged is not None:
+            topic_ids = [topic_id for topic_id in topic_ids if topic_id in tagged]
+        return [entry.id for entry in current.ranked(topic_ids, ranking, limit, max(0, offset))]
+
+def list_topics_by_tags(tags, match_all=True, ranking="recency", limit=10, offset=0):
+    """
+    Topics carrying all (or any) of the given tags, best first by the given ranking.
+    Returns topic ids.
+    """
+    ensure_search_indexes_loaded()
+    limit = max(0, min(limit, settings.SEARCH_MAX_LIMIT))
+    with _index_lock:
+        current = indexes
+        return [
+            entry.id for entry in current.ranked(current.tags.match(tags, match_all), ranking, limit, max(0, offset))
+        ]
+
+def tag_facets(tags=None, match_all=True, query=None, mode="prefix", max_edits=1, limit=None):
+    """
+    Count the topics per tag among those passing the tag filter and, if a query
+    is given, matching it in the given search mode. Returns (tag name, count)
+    pairs, most used first.
+    """
+    ensure_search_indexes_loaded()
+    max_edits = max(1, min(max_edits, settings.SEARCH_MAX_EDITS))
+    with _index_lock:
+        current = indexes
+        within = _tag_matches(current, tags, match_all)
+        if query is not None:
+            if mode == "fuzzy":
+                matched = [entry.id for _, entry in current.trie.fuzzy(query, max_edits, "recency", len(current.entries))]
+            elif mode in ("word", "substring"):
+                matched = _title_matches(current, query, mode)
+            else:
+                matched = [entry.id for entry in current.trie.search(query)]
+            matched = Bitmap.from_ids(matched)
+            within = matched if within is None else within & matched
+        return current.tags.facets(within, limit)
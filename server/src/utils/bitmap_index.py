@@ -0,0 +1,173 @@
+from collections import defaultdict
+
+# Topic id sets as chunked bitmaps: ids are split into 65536-id ranges and each
+# non-empty range is one Python int used as a bit set, so intersections, unions
+# and counts are word-at-a-time integer operations. Ranges with no members are
+# not stored, but a stored one is as long as its highest set bit, up to 8 KiB:
+# a tag on a few scattered topics costs up to 8 KiB per range it touches, not
+# per topic. There is no sparse (sorted array) container for such ranges.
+
+CHUNK_BITS = 16
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+class Bitmap:
+    """
+    A set of non-negative integer ids.
+    """
+    __slots__ = ("chunks",)
+
+    def __init__(self, chunks=None):
+        self.chunks = chunks if chunks is not None else {}  # chunk number -> int bit set
+
+    @classmethod
+    def from_ids(cls, ids):
+        grouped = defaultdict(list)
+        for item in ids:
+            grouped[item >> CHUNK_BITS].append(item & CHUNK_MASK)
+        chunks = {}
+        for key, offsets in grouped.items():
+            # Setting bits in a bytearray is much cheaper than growing an int bit by bit
+            bits = bytearray((max(offsets) >> 3) + 1)
+            for offset in offsets:
+                bits[offset >> 3] |= 1 << (offset & 7)
+            chunks[key] = int.from_bytes(bits, "little")
+        return cls(chunks)
+
+    def add(self, item):
+        key = item >> CHUNK_BITS
+        self.chunks[key] = self.chunks.get(key, 0) | (1 << (item & CHUNK_MASK))
+
+    def discard(self, item):
+        key = item >> CHUNK_BITS
+        bits = self.chunks.get(key, 0) & ~(1 << (item & CHUNK_MASK))
+        if bits:
+            self.chunks[key] = bits
+        else:
+            self.chunks.pop(key, None)
+
+    def __contains__(self, item):
+        return (self.chunks.get(item >> CHUNK_BITS, 0) >> (item & CHUNK_MASK)) & 1 == 1
+
+    def __len__(self):
+        return sum(bits.bit_count() for bits in self.chunks.values())
+
+    def __bool__(self):
+        return bool(self.chunks)
+
+    def __iter__(self):
+        """
+        Yields ids in ascending order.
+        """
+        for key in sorted(self.chunks):
+            base = key << CHUNK_BITS
+            bits = self.chunks[key]
+            while bits:
+                low = bits & -bits
+                yield base + low.bit_length() - 1
+                bits ^= low
+
+    def __and__(self, other):
+        small, large = (self.chunks, other.chunks) if len(self.chunks) <= len(other.chunks) else (other.chunks, self.chunks)
+        chunks = {}
+        for key, bits in small.items():
+            both = bits & large.get(key, 0)
+            if both:
+                chunks[key] = both
+        return Bitmap(chunks)
+
+    def __or__(self, other):
+        chunks = dict(self.chunks)
+        for key, bits in other.chunks.items():
+            chunks[key] = chunks.get(key, 0) | bits
+        return Bitmap(chunks)
+
+    def intersection_count(self, other):
+        """
+        len(self & other) without building the intersection.
+        """
+        small, large = (self.chunks, other.chunks) if len(self.chunks) <= len(other.chunks) else (other.chunks, self.chunks)
+        return sum((bits & large.get(key, 0)).bit_count() for key, bits in small.items())
+
+def normalize_tag(name):
+    return name.strip().lower()
+
+class TagBitmapIndex:
+    """
+    Tag name -> Bitmap of the topic ids carrying that tag.
+    """
+    def __init__(self):
+        self.tags = {}
+        self.topic_tags = {}  # topic id -> frozenset of tag names, for updates and removal
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        """
+        Build from (topic_id, tag_name) pairs, e.g. the rows of the topic_tags join.
+        """
+        index = cls()
+        grouped = defaultdict(list)
+        topic_tags = defaultdict(set)
+        for topic_id, name in pairs:
+            name = normalize_tag(name)
+            grouped[name].append(topic_id)
+            topic_tags[topic_id].add(name)
+        index.tags = {name: Bitmap.from_ids(topic_ids) for name, topic_ids in grouped.items()}
+        index.topic_tags = {topic_id: frozenset(names) for topic_id, names in topic_tags.items()}
+        return index
+
+    def set_topic_tags(self, topic_id, names):
+        """
+        Replace the tags of a topic.
+        """
+        names = frozenset(normalize_tag(name) for name in names)
+        previous = self.topic_tags.get(topic_id, frozenset())
+        for name in previous - names:
+            bitmap = self.tags[name]
+            bitmap.discard(topic_id)
+            if not bitmap:
+                del self.tags[name]
+        for name in names - previous:
+            self.tags.setdefault(name, Bitmap()).add(topic_id)
+        if names:
+            self.topic_tags[topic_id] = names
+        else:
+            self.topic_tags.pop(topic_id, None)
+
+    def remove_topic(self, topic_id):
+        self.set_topic_tags(topic_id, ())
+
+    def match(self, names, match_all=True):
+        """
+        Bitmap of the topics carrying all (or, with match_all False, any) of the tags.
+        """
+        bitmaps = [self.tags.get(normalize_tag(name), Bitmap()) for name in names]
+        if not bitmaps:
+            return Bitmap()
+        if match_all:
+            # Intersect smallest first so the running result shrinks fastest
+            bitmaps.sort(key=lambda bitmap: len(bitmap.chunks))
+            # Copied so that callers never hold a bitmap the index goes on to update
+            result = Bitmap(dict(bitmaps[0].chunks))
+            for bitmap in bitmaps[1:]:
+                if not result:
+                    break
+                result = result & bitmap
+            return result
+        result = Bitmap()
+        for bitmap in bitmaps:
+            result = result | bitmap
+        return result
+
+    def facets(self, within=None, limit=None):
+        """
+        Returns (tag name, topic count) pairs, most used first, counting only
+        topics in the within Bitmap when one is given. Tags with no topics are omitted.
+        """
+        tags = list(self.tags.items())
+        if within is None:
+            counts = [(name, len(bitmap)) for name, bitmap in tags]
+        else:
+            counts = [(name, within.intersection_count(bitmap)) for name, bitmap in tags]
+        counts = [(name, count) for name, count in counts if count]
+        counts.sort(key=lambda item: (-item[1], item[0]))
+        return counts[:limit] if limit is not None else counts
@@ -0,0 +1,55 @@
+import hashlib
+import math
+import threading
+
+# Bloom filter over strings: a bit array and k hash positions per item. A clear
+# bit at any position proves the item was never added; all bits set means it
+# probably was, wrong with a probability that grows as the array fills. Positions
+# come from one 128-bit BLAKE2b digest split into two hashes, h1 + i * h2
+# (Kirsch-Mitzenmacher double hashing), so each lookup hashes the item once.
+
+class BloomFilter:
+    """
+    Probabilistic set of strings without false negatives. Items cannot be removed.
+    """
+    def __init__(self, capacity, false_positive_rate=0.01):
+        """
+        Size the filter so that false_positive_rate holds with capacity items added.
+        """
+        capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0  # Items added, duplicates included
+        self.lock = threading.Lock()  # Setting a bit is a read-modify-write of its byte
+
+    @classmethod
+    def from_items(cls, items, capacity, false_positive_rate=0.01):
+        bloom = cls(capacity, false_positive_rate)
+        for item in items:
+            bloom.add(item)
+        return bloom
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        positions = self._positions(item)
+        with self.lock:
+            for position in positions:
+                self.bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def estimated_false_positive_rate(self):
+        """
+        Expected false positive rate at the current fill, from the share of bits set.
+        """
+        set_bits = int.from_bytes(self.bits, "little").bit_count()
+        return (set_bits / self.size) ** self.hash_count
@@ -0,0 +1,296 @@
+from array import array
+from bisect import bisect_left
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Snapshot layout, columnar like the topic snapshot in server.src.search.snapshot
+# (little-endian). Loading memory-maps the file: postings stay zero-copy views
+# into the OS page cache, shared by every worker on the host, until a change to
+# their term copies them. Big-endian hosts load byte-swapped copies instead.
+#
+#   header    magic, format version, settings length, doc count, term count, posting count
+#   settings  JSON (BM25 parameters, total length, metadata), padded to 8 bytes
+#   docs      ids and weighted lengths as int64, count + 1 offsets into the doc
+#             terms as uint64, then the term numbers of each doc as uint32
+#   terms     count + 1 offsets into the term strings and count + 1 offsets
+#             into the postings as uint64
+#   postings  doc ids, then term frequencies, as uint32
+#   strings   UTF-8 blob of the terms, in term number order
+#
+# uint32 columns are padded to 8 bytes.
+
+SNAPSHOT_MAGIC = b"INVX"
+SNAPSHOT_HEADER = struct.Struct("<4sHIQQQ")
+
+def _pad(length):
+    return (-length) % 8
+
+def write_column(f, values):
+    """
+    Write an array to a snapshot file in little-endian byte order.
+    """
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    values.tofile(f)
+
+def read_column(view, position, typecode, count):
+    """
+    Read count little-endian values of an array typecode from a snapshot at
+    position: a zero-copy view on little-endian hosts, a byte-swapped copy otherwise.
+    """
+    values = view[position:position + struct.calcsize(typecode) * count]
+    if sys.byteorder == "little":
+        return values.cast(typecode)
+    with values:
+        values = array(typecode, values.tobytes())
+    values.byteswap()
+    return values
+
+def tokenize(text):
+    """
+    Split text into lowercase word tokens.
+    """
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+class InvertedIndex:
+    """
+    In-process full-text index over topic titles and content, ranked with BM25.
+
+    Each term maps to a postings list held as two parallel unsigned int arrays
+    (sorted document ids and term frequencies), which keeps the index a small
+    fraction of the size of the text it covers.
+    """
+    SNAPSHOT_VERSION = 2
+
+    def __init__(self, k1=1.2, b=0.75, title_weight=2):
+        self.k1 = k1
+        self.b = b
+        self.title_weight = title_weight  # Title tokens count this many times towards term frequency
+        self.postings = {}  # term -> (array of doc ids, array of term frequencies)
+        self.doc_lengths = {}  # doc id -> weighted token count
+        self.doc_terms = {}  # doc id -> distinct terms, needed to remove the document later
+        self.total_length = 0
+        self.metadata = {}
+        self._snapshot_doc_terms = None  # Terms of the docs loaded from a snapshot, read on removal
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.doc_lengths
+
+    def add(self, doc_id, title, content):
+        """
+        Index a document, replacing any previous version with the same id.
+        """
+        if doc_id in self.doc_lengths:
+            self.remove(doc_id)
+
+        frequencies = {}
+        for token in tokenize(title):
+            frequencies[token] = frequencies.get(token, 0) + self.title_weight
+        for token in tokenize(content):
+            frequencies[token] = frequencies.get(token, 0) + 1
+
+        for term, frequency in frequencies.items():
+            doc_ids, term_frequencies = self._writable_postings(term)
+            if not doc_ids or doc_ids[-1] < doc_id:
+                doc_ids.append(doc_id)
+                term_frequencies.append(frequency)
+            else:
+                position = bisect_left(doc_ids, doc_id)
+                doc_ids.insert(position, doc_id)
+                term_frequencies.insert(position, frequency)
+
+        length = sum(frequencies.values())
+        self.doc_lengths[doc_id] = length
+        self.doc_terms[doc_id] = tuple(frequencies)
+        self.total_length += length
+
+    def remove(self, doc_id):
+        """
+        Drop a document from the index. Returns True if it was indexed.
+        """
+        if doc_id not in self.doc_lengths:
+            return False
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            terms = self._snapshot_doc_terms(doc_id)
+        for term in terms:
+            doc_ids, term_frequencies = self._writable_postings(term)
+            position = bisect_left(doc_ids, doc_id)
+            del doc_ids[position]
+            del term_frequencies[position]
+            if not doc_ids:
+                del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(doc_id)
+        return True
+
+    def search(self, query, limit=10, offset=0, accept=None):
+        """
+        Returns (doc_id, score) pairs for documents matching any query term,
+        best BM25 score first. If accept is given, only doc ids for which it
+        returns true are considered.
+        """
+        if not self.doc_lengths or limit <= 0:
+            return []
+
+        doc_count = len(self.doc_lengths)
+        average_length = self.total_length / doc_count
+        scores = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            doc_ids, term_frequencies = postings
+            idf = math.log(1 + (doc_count - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            for doc_id, frequency in zip(doc_ids, term_frequencies):
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        candidates = scores.items()
+        if accept is not None:
+            candidates = [item for item in candidates if accept(item[0])]
+        ranked = heapq.nlargest(offset + limit, candidates, key=lambda item: (item[1], -item[0]))
+        return ranked[offset:]
+
+    def _writable_postings(self, term):
+        """
+        The postings of a term as arrays, copying them out of the snapshot map if needed.
+        """
+        postings = self.postings.get(term)
+        if postings is None:
+            postings = self.postings[term] = (array("I"), array("I"))
+        elif not isinstance(postings[0], array):
+            doc_ids, term_frequencies = array("I"), array("I")
+            doc_ids.frombytes(postings[0].tobytes())
+            term_frequencies.frombytes(postings[1].tobytes())
+            postings = self.postings[term] = (doc_ids, term_frequencies)
+        return postings
+
+    def save(self, path):
+        """
+        Write a snapshot of the index to disk. The file is replaced atomically,
+        so concurrent workers never observe a partial snapshot.
+        """
+        terms = sorted(self.postings)
+        term_numbers = {term: number for number, term in enumerate(terms)}
+        doc_ids = array("q", self.doc_lengths)
+        doc_lengths = array("q", self.doc_lengths.values())
+        doc_term_offsets = array("Q", [0])
+        doc_terms = array("I")
+        for doc_id in doc_ids:
+            doc_terms.extend(term_numbers[term] for term in self._terms_of(doc_id))
+            doc_term_offsets.append(len(doc_terms))
+        string_offsets = array("Q", [0])
+        posting_offsets = array("Q", [0])
+        posting_doc_ids = array("I")
+        posting_frequencies = array("I")
+        blob = bytearray()
+        for term in terms:
+            term_doc_ids, term_frequencies = self.postings[term]
+            posting_doc_ids.frombytes(term_doc_ids.tobytes())
+            posting_frequencies.frombytes(term_frequencies.tobytes())
+            posting_offsets.append(len(posting_doc_ids))
+            blob += term.encode("utf-8")
+            string_offsets.append(len(blob))
+
+        encoded_settings = json.dumps({
+            "k1": self.k1,
+            "b": self.b,
+            "title_weight": self.title_weight,
+            "total_length": self.total_length,
+            "metadata": self.metadata,
+        }).encode("utf-8")
+        padding = b"\0" * _pad(4 * len(posting_doc_ids))
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(SNAPSHOT_HEADER.pack(
+                SNAPSHOT_MAGIC, self.SNAPSHOT_VERSION, len(encoded_settings),
+                len(doc_ids), len(terms), len(posting_doc_ids)
+            ))
+            f.write(encoded_settings + b"\0" * _pad(SNAPSHOT_HEADER.size + len(encoded_settings)))
+            for values in (doc_ids, doc_lengths, doc_term_offsets, doc_terms):
+                write_column(f, values)
+            f.write(padding)
+            for values in (string_offsets, posting_offsets, posting_doc_ids):
+                write_column(f, values)
+            f.write(padding)
+            write_column(f, posting_frequencies)
+            f.write(padding)
+            f.write(blob)
+        os.replace(temp_path, path)
+
+    def _terms_of(self, doc_id):
+        terms = self.doc_terms.get(doc_id)
+        return terms if terms is not None else self._snapshot_doc_terms(doc_id)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory-map a snapshot written by save(). Returns None if the snapshot is
+        missing or was written in another format.
+        """
+        try:
+            with open(path, "rb") as f:
+                snapshot = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # mmap raises ValueError for empty files
+            return None
+        if len(snapshot) < SNAPSHOT_HEADER.size:
+            return None
+        magic, version, settings_length, doc_count, term_count, posting_count = SNAPSHOT_HEADER.unpack_from(snapshot, 0)
+        if magic != SNAPSHOT_MAGIC or version != cls.SNAPSHOT_VERSION:
+            return None
+
+        view = memoryview(snapshot)
+        position = SNAPSHOT_HEADER.size
+
+        def column(typecode, count):
+            nonlocal position
+            size = struct.calcsize(typecode) * count
+            values = read_column(view, position, typecode, count)
+            position += size + _pad(size)
+            return values
+
+        state = json.loads(bytes(view[position:position + settings_length]))
+        position += settings_length + _pad(SNAPSHOT_HEADER.size + settings_length)
+        doc_ids = column("q", doc_count)
+        doc_lengths = column("q", doc_count)
+        doc_term_offsets = column("Q", doc_count + 1)
+        doc_terms = column("I", posting_count)
+        string_offsets = column("Q", term_count + 1)
+        posting_offsets = column("Q", term_count + 1)
+        posting_doc_ids = column("I", posting_count)
+        posting_frequencies = column("I", posting_count)
+        strings = view[position:]
+
+        index = cls(k1=state["k1"], b=state["b"], title_weight=state["title_weight"])
+        terms = [str(strings[string_offsets[i]:string_offsets[i + 1]], "utf-8") for i in range(term_count)]
+        index.postings = {
+            term: (
+                posting_doc_ids[posting_offsets[i]:posting_offsets[i + 1]],
+                posting_frequencies[posting_offsets[i]:posting_offsets[i + 1]],
+            )
+            for i, term in enumerate(terms)
+        }
+        index.doc_lengths = dict(zip(doc_ids.tolist(), doc_lengths.tolist()))
+        index.total_length = state["total_length"]
+        index.metadata = state["metadata"]
+        rows = {doc_id: row for row, doc_id in enumerate(doc_ids.tolist())}
+
+        def snapshot_doc_terms(doc_id):
+            row = rows[doc_id]
+            return tuple(terms[number] for number in doc_terms[doc_term_offsets[row]:doc_term_offsets[row + 1]])
+
+        index._snapshot_doc_terms = snapshot_doc_terms
+        return index
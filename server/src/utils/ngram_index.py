@@ -0,0 +1,144 @@
+from array import array
+from bisect import bisect_left, insort
+from server.src.utils.inverted_index import tokenize
+
+def _add_posting(postings, key, doc_id):
+    doc_ids = postings.get(key)
+    if doc_ids is None:
+        postings[key] = array("I", [doc_id])
+    elif doc_ids[-1] < doc_id:
+        doc_ids.append(doc_id)
+    else:
+        position = bisect_left(doc_ids, doc_id)
+        if position == len(doc_ids) or doc_ids[position] != doc_id:
+            doc_ids.insert(position, doc_id)
+
+def _remove_posting(postings, key, doc_id):
+    doc_ids = postings.get(key)
+    if doc_ids is None:
+        return
+    position = bisect_left(doc_ids, doc_id)
+    if position < len(doc_ids) and doc_ids[position] == doc_id:
+        del doc_ids[position]
+        if not doc_ids:
+            del postings[key]
+
+def intersect(smaller, larger):
+    """
+    Intersect two sorted id arrays by galloping the smaller one through the larger.
+    """
+    if len(smaller) > len(larger):
+        smaller, larger = larger, smaller
+    result = array("I")
+    position = 0
+    for doc_id in smaller:
+        position = bisect_left(larger, doc_id, position)
+        if position == len(larger):
+            break
+        if larger[position] == doc_id:
+            result.append(doc_id)
+    return result
+
+class NGramIndex:
+    """
+    Substring and per-word prefix index over topic titles.
+
+    Every title contributes its character n-grams and its words to postings
+    lists of sorted topic ids. Substring queries intersect the postings of the
+    query's n-grams and verify the candidates; word queries match each query
+    term as a prefix of some title word and intersect across terms. Memory is
+    proportional to the total title length, one 4-byte id per n-gram.
+    """
+    def __init__(self, n=3):
+        self.n = n
+        self.grams = {}  # n-gram -> sorted array of ids
+        self.words = {}  # word -> sorted array of ids
+        self.vocabulary = []  # Sorted words, for prefix ranges
+        self.titles = {}  # id -> lowercased title, used to verify substring candidates and scan for short queries
+
+    def __len__(self):
+        return len(self.titles)
+
+    def _grams(self, text):
+        return {text[i:i + self.n] for i in range(len(text) - self.n + 1)}
+
+    def add(self, doc_id, title):
+        """
+        Index a title, replacing any previous title with the same id.
+        """
+        if doc_id in self.titles:
+            self.remove(doc_id)
+        title = title.lower()
+        self.titles[doc_id] = title
+        for gram in self._grams(title):
+            _add_posting(self.grams, gram, doc_id)
+        for word in set(tokenize(title)):
+            if word not in self.words:
+                insort(self.vocabulary, word)
+            _add_posting(self.words, word, doc_id)
+
+    def remove(self, doc_id):
+        """
+        Drop a title from the index. Returns True if it was indexed.
+        """
+        title = self.titles.pop(doc_id, None)
+        if title is None:
+            return False
+        for gram in self._grams(title):
+            _remove_posting(self.grams, gram, doc_id)
+        for word in set(tokenize(title)):
+            _remove_posting(self.words, word, doc_id)
+            if word not in self.words:
+                del self.vocabulary[bisect_left(self.vocabulary, word)]
+        return True
+
+    def substring(self, query):
+        """
+        Ids of titles containing query anywhere (case-insensitive). Queries
+        shorter than n characters have no n-grams to look up and scan every title.
+        """
+        query = query.lower()
+        if not query:
+            return array("I")
+        if len(query) < self.n:
+            # Copy the items first: a concurrent add or remove may resize the dict mid-scan
+            return array("I", sorted(doc_id for doc_id, title in list(self.titles.items()) if query in title))
+        postings = []
+        for gram in self._grams(query):
+            doc_ids = self.grams.get(gram)
+            if doc_ids is None:
+                return array("I")
+            postings.append(doc_ids)
+        postings.sort(key=len)
+        candidates = postings[0]
+        for doc_ids in postings[1:]:
+            candidates = intersect(candidates, doc_ids)
+            if not candidates:
+                break
+        return array("I", (doc_id for doc_id in candidates if query in self.titles[doc_id]))
+
+    def word_prefix(self, query):
+        """
+        Ids of titles where every query term is a prefix of some title word,
+        in any order.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return array("I")
+        postings = sorted((self._words_with_prefix(term) for term in terms), key=len)
+        result = postings[0]
+        for doc_ids in postings[1:]:
+            result = intersect(result, doc_ids)
+            if not result:
+                break
+        return result
+
+    def _words_with_prefix(self, prefix):
+        start = bisect_left(self.vocabulary, prefix)
+        end = bisect_left(self.vocabulary, prefix + "\U0010ffff", start)
+        if end - start == 1:
+            return self.words[self.vocabulary[start]]
+        doc_ids = set()
+        for word in self.vocabulary[start:end]:
+            doc_ids.update(self.words[word])
+        return array("I", sorted(doc_ids))
@@ -0,0 +1,66 @@
+import numpy as np
+
+# Trending scores for many windows at once, over plain arrays, with the same
+# formula as server.src.db.trending:
+#
+#   score = 2 * comments in the window
+#         + 1 * all comments
+#         + 3 * max(0, 1 - whole days since the topic was created / window)
+#
+# Comment activity comes in as (topic, time, count) rows sorted by time, so the
+# rows inside a window are a suffix found by binary search, and per-topic counts
+# are one bincount over that suffix. Times are seconds on any common clock.
+
+RECENT_COMMENT_WEIGHT = 2
+TOTAL_COMMENT_WEIGHT = 1
+RECENCY_WEIGHT = 3
+SECONDS_PER_DAY = 86400
+
+def top_k(scores, ids, k):
+    """
+    Positions of the k highest scores, best first, ties broken by the larger id.
+    """
+    if k <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.intp)
+    if k < len(scores):
+        # argpartition leaves the order among equal scores arbitrary, so every
+        # score tied with the k-th is kept for the tie-break below
+        threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.arange(len(scores))
+    order = np.lexsort((-ids[candidates], -scores[candidates]))
+    return candidates[order[:k]]
+
+def score_windows(topic_ids, topic_created, activity_topics, activity_times, activity_counts,
+                  now, windows, max_topics, window_starts=None):
+    """
+    The max_topics best topics per window as {window: (ids, scores)}, best first.
+
+    Args:
+        topic_ids (ndarray): Topic ids.
+        topic_created (ndarray): Creation time of each topic.
+        activity_topics (ndarray): Position in topic_ids of each activity row.
+        activity_times (ndarray): Time of each activity row, ascending.
+        activity_counts (ndarray): Comments in each activity row.
+        now (float): Time the windows end at.
+        windows (list[int]): Window lengths in days.
+        window_starts (dict): Optional start time per window, for callers that
+            round it; defaults to now minus the window.
+    """
+    topic_count = len(topic_ids)
+    counts = activity_counts.astype(np.float64)
+    total = np.bincount(activity_topics, weights=counts, minlength=topic_count)
+    base = total * TOTAL_COMMENT_WEIGHT
+    age_days = np.floor((now - topic_created) / SECONDS_PER_DAY)
+
+    results = {}
+    for window in windows:
+        start = (window_starts or {}).get(window, now - window * SECONDS_PER_DAY)
+        first = np.searchsorted(activity_times, start, side="left")
+        recent = np.bincount(activity_topics[first:], weights=counts[first:], minlength=topic_count)
+        recency = np.maximum(0.0, 1 - age_days / window)
+        scores = recent * RECENT_COMMENT_WEIGHT + base + recency * RECENCY_WEIGHT
+        best = top_k(scores, topic_ids, max_topics)
+        results[window] = (topic_ids[best], scores[best])
+    return results
@@ -1,3 +1,25 @@
+from bisect import bisect_left, bisect_right
+import heapq
+
+_ALL = object()
+
+def _negate(value):
+    # Sort key helper so that ties on distance are broken by the highest score,
+    # including string scores such as ISO timestamps
+    return -value if isinstance(value, (int, float)) else _Descending(value)
+
+class _Descending:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return self.value > other.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
 class TrieNode:
     def __init__(self):
         self.children = {}
@@ -17,6 +39,33 @@ class Trie:
         node.is_end_of_word = True
         node.topic_data = topic_data
 
+    def delete(self, title):
+        """
+        Remove a title from the Trie, pruning nodes that no longer lead to a word.
+        Returns True if the title was present.
+        """
+        node = self.root
+        path = []
+        for char in title.lower():
+            if char not in node.children:
+                return False
+            path.append((node, char))
+            node = node.children[char]
+
+        if not node.is_end_of_word:
+            return False
+
+        node.is_end_of_word = False
+        node.topic_data = None
+
+        # Walk back up and drop branches that became empty
+        for parent, char in reversed(path):
+            child = parent.children[char]
+            if child.is_end_of_word or child.children:
+                break
+            del parent.children[char]
+        return True
+
     def search(self, prefix):
         """
         Returns a list of topics that match the prefix.
@@ -29,11 +78,398 @@ class Trie:
 
         return self._collect_all_words(node)
 
-    def _collect_all_words(self, node, results=None):
-        if results is None:
-            results = []
-        if node.is_end_of_word:
-            results.append(node.topic_data)
-        for child in node.children.values():
-            self._collect_all_words(child, results)
+    def _collect_all_words(self, node):
+        # Iterative traversal so long titles cannot hit the recursion limit
+        results = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.is_end_of_word:
+                results.append(node.topic_data)
+            stack.extend(node.children.values())
         return results
+
+
+class RadixNode:
+    __slots__ = ("label", "children", "values", "count", "top")
+
+    def __init__(self, label=""):
+        self.label = label  # Edge label leading into this node
+        self.children = None  # Keyed by first character of the child label; None for leaves
+        self.values = ()  # Values stored under the key ending here
+        self.count = 0  # Number of values in this subtree
+        self.top = None  # Ranking name -> best values in this subtree, only kept for large subtrees
+
+class RadixTrie:
+    """
+    Compressed (Patricia) variant of Trie with the same insert/search API.
+    Chains of single-child nodes are collapsed into one edge label, so a title
+    costs a couple of nodes instead of one node and dict per character.
+
+    By default each title holds one value and inserting it again replaces it.
+    With an identity function, a title holds one value per identity, so
+    distinct topics can share a title.
+
+    When rankings are given (name -> function scoring a value, higher is
+    better), every node whose subtree holds more than top_k values keeps its
+    top_k best values per ranking, so ranked prefix queries within the first
+    top_k results never walk the subtree.
+    """
+    def __init__(self, rankings=None, top_k=20, identity=None):
+        self.root = RadixNode()
+        self.rankings = rankings or {}
+        self.top_k = top_k
+        self.identity = identity or (lambda value: None)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def insert(self, title, value, _refresh=True):
+        key = title.lower()
+        node = self.root
+        path = [node]
+        i = 0
+        while i < len(key):
+            child = node.children.get(key[i]) if node.children else None
+            if child is None:
+                leaf = RadixNode(key[i:])
+                if node.children is None:
+                    node.children = {}
+                node.children[key[i]] = leaf
+                node = leaf
+                path.append(node)
+                break
+
+            label = child.label
+            j = 1  # First character already matched via the children key
+            limit = min(len(label), len(key) - i)
+            while j < limit and label[j] == key[i + j]:
+                j += 1
+
+            if j < len(label):
+                # Split the edge at the first mismatch
+                mid = RadixNode(label[:j])
+                child.label = label[j:]
+                mid.children = {child.label[0]: child}
+                mid.count = child.count
+                mid.top = child.top
+                node.children[key[i]] = mid
+                child = mid
+            node = child
+            path.append(node)
+            i += j
+
+        value_id = self.identity(value)
+        kept = tuple(existing for existing in node.values if self.identity(existing) != value_id)
+        if len(kept) == len(node.values):
+            self.size += 1
+            for path_node in path:
+                path_node.count += 1
+        node.values = kept + (value,)
+        if _refresh:
+            self._refresh_path(path)
+
+    def insert_many(self, items):
+        """
+        Bulk insert (title, value) pairs, computing rankings once at the end.
+        """
+        for title, value in items:
+            self.insert(title, value, _refresh=False)
+        self.rebuild_rankings()
+
+    def get(self, title):
+        """
+        Return the values stored for an exact title (empty if none).
+        """
+        node = self._find_prefix_node(title.lower(), exact=True)
+        return node.values if node is not None else ()
+
+    def delete(self, title, value_id=_ALL):
+        """
+        Remove the values stored for a title, or only the one with the given
+        identity, re-merging edges that are left with a single child.
+        Returns True if anything was removed.
+        """
+        key = title.lower()
+        node = self.root
+        path = [node]
+        i = 0
+        while i < len(key):
+            child = node.children.get(key[i]) if node.children else None
+            if child is None or not key.startswith(child.label, i):
+                return False
+            node = child
+            path.append(node)
+            i += len(child.label)
+
+        if value_id is _ALL:
+            kept = ()
+        else:
+            kept = tuple(value for value in node.values if self.identity(value) != value_id)
+        removed = len(node.values) - len(kept)
+        if not removed:
+            return False
+
+        node.values = kept
+        self.size -= removed
+        for path_node in path:
+            path_node.count -= removed
+
+        # An empty title ends at the root, which stays in place with its values and candidates cleared
+        if not kept and node is not self.root:
+            if not node.children:
+                path.pop()
+                parent = path[-1]
+                del parent.children[node.label[0]]
+                if not parent.children:
+                    parent.children = None
+                self._merge_with_only_child(parent)
+            else:
+                self._merge_with_only_child(node)
+        self._refresh_path(path)
+        return True
+
+    def _merge_with_only_child(self, node):
+        if node is self.root or node.values or not node.children or len(node.children) != 1:
+            return
+        (child,) = node.children.values()
+        node.label += child.label
+        node.children = child.children
+        node.values = child.values
+        node.count = child.count
+        node.top = child.top
+
+    def search(self, prefix):
+        """
+        Returns a list of values whose title matches the prefix.
+        """
+        node = self._find_prefix_node(prefix.lower())
+        if node is None:
+            return []
+        return self._values(node)
+
+    def top(self, prefix, ranking, limit, offset=0, accept=None):
+        """
+        Returns up to limit values whose title matches the prefix, best first
+        by the named ranking, skipping the first offset results. If accept is
+        given, only values for which it returns true are considered.
+        """
+        node = self._find_prefix_node(prefix.lower())
+        if node is None or limit <= 0:
+            return []
+        end = offset + limit
+        ranked = None
+        if node.top is not None and end <= self.top_k:
+            ranked = node.top[ranking]
+            if accept is not None:
+                # The best accepted values are the accepted part of the best values, if there are enough of them
+                ranked = [value for value in ranked if accept(value)]
+                if len(ranked) < end:
+                    ranked = None
+        if ranked is None:
+            # Small subtree, a deep page or a selective filter: select from the whole subtree
+            values = self._values(node)
+            if accept is not None:
+                values = [value for value in values if accept(value)]
+            ranked = heapq.nlargest(end, values, key=self.rankings[ranking])
+        return ranked[offset:end]
+
+    def fuzzy(self, prefix, max_distance, ranking, limit, offset=0, accept=None):
+        """
+        Returns values whose title starts with something within max_distance
+        edits (Levenshtein) of prefix, closest first and then best by the named
+        ranking. Returns (distance, value) pairs. If accept is given, only
+        values for which it returns true are considered.
+        """
+        if limit <= 0:
+            return []
+        score = self.rankings[ranking]
+        end = offset + limit
+        matches = self._fuzzy_match_nodes(prefix.lower(), max_distance)
+
+        # Keyed by object identity: values need not be hashable
+        distances = {}
+        exhaustive = set()
+        for node, distance in matches:
+            if node.top is not None and end <= self.top_k:
+                values = node.top[ranking]
+            else:
+                values = self._values(node)
+                exhaustive.add(id(node))
+            for value in values:
+                if accept is not None and not accept(value):
+                    continue
+                if distances.get(id(value), (max_distance + 1,))[0] > distance:
+                    distances[id(value)] = (distance, value)
+
+        # A candidate list may have been filled with values that matched closer
+        # elsewhere; if so this node's own tier can be short and needs its full subtree.
+        for node, distance in matches:
+            if id(node) in exhaustive:
+                continue
+            own_tier = sum(
+                1 for value in node.top[ranking]
+                if id(value) in distances and distances[id(value)][0] == distance
+            )
+            if own_tier < end:
+                for value in self._values(node):
+                    if accept is not None and not accept(value):
+                        continue
+                    if distances.get(id(value), (max_distance + 1,))[0] > distance:
+                        distances[id(value)] = (distance, value)
+
+        ranked = heapq.nsmallest(
+            end, distances.values(), key=lambda item: (item[0], _negate(score(item[1])))
+        )
+        return ranked[offset:end]
+
+    def _fuzzy_match_nodes(self, query, max_distance):
+        """
+        Walk the trie carrying one banded Levenshtein DP row per path, returning
+        (node, distance) for every node where some prefix of the key first comes
+        within a new best distance of the query. Branches whose row minimum can
+        no longer beat the best distance on their path are pruned.
+        """
+        size = len(query)
+        cap = max_distance + 1
+        first_row = [min(j, cap) for j in range(size + 1)]
+        best = first_row[-1]
+        # A query no longer than max_distance matches every title via the empty prefix
+        matches = [(self.root, best)] if best <= max_distance else []
+        stack = [(child, first_row, 0, best) for child in (self.root.children or {}).values()]
+        while stack:
+            node, row, depth, best = stack.pop()
+            matched_here = None
+            for char in node.label:
+                depth += 1
+                low = max(1, depth - max_distance)
+                high = min(size, depth + max_distance)
+                new_row = [cap] * (size + 1)
+                new_row[0] = min(depth, cap)
+                for j in range(low, high + 1):
+                    cost = 0 if query[j - 1] == char else 1
+                    value = min(new_row[j - 1] + 1, row[j] + 1, row[j - 1] + cost)
+                    new_row[j] = value if value < cap else cap
+                row = new_row
+                if row[-1] < best:
+                    best = row[-1]
+                    matched_here = best
+                if min(row) >= best:
+                    break
+            if matched_here is not None:
+                matches.append((node, matched_here))
+            if min(row) < best and node.children:
+                stack.extend((child, row, depth, best) for child in node.children.values())
+        return matches
+
+    def _find_prefix_node(self, prefix, exact=False):
+        node = self.root
+        i = 0
+        while i < len(prefix):
+            child = node.children.get(prefix[i]) if node.children else None
+            if child is None:
+                return None
+            label = child.label
+            rest = len(prefix) - i
+            if rest < len(label) or (rest == len(label) and not exact):
+                # Prefix ends inside (or at the end of) this edge
+                if exact:
+                    return None
+                return child if label.startswith(prefix[i:]) else None
+            if not prefix.startswith(label, i):
+                return None
+            node = child
+            i += len(label)
+        return node
+
+    def _values(self, node):
+        # Iterative traversal so long titles cannot hit the recursion limit
+        results = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            results.extend(node.values)
+            if node.children:
+                stack.extend(node.children.values())
+        return results
+
+    def _refresh_path(self, path):
+        for node in reversed(path):
+            self._refresh_top(node)
+
+    def _refresh_top(self, node):
+        if not self.rankings or node.count <= self.top_k:
+            node.top = None
+            return
+        candidates = list(node.values)
+        ranked_children = []
+        for child in (node.children or {}).values():
+            if child.top is None:
+                candidates.extend(self._values(child))
+            else:
+                ranked_children.append(child.top)
+        top = {}
+        for name, score in self.rankings.items():
+            pool = candidates + [value for child_top in ranked_children for value in child_top[name]]
+            top[name] = heapq.nlargest(self.top_k, pool, key=score)
+        node.top = top
+
+    def rebuild_rankings(self):
+        """
+        Recompute the per-node candidate lists for the whole trie, children first.
+        """
+        order = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            if node.children:
+                stack.extend(node.children.values())
+        for node in reversed(order):
+            self._refresh_top(node)
+
+    def items(self):
+        """
+        Yield (key, value) pairs for every stored value.
+        """
+        stack = [(self.root, "")]
+        while stack:
+            node, key = stack.pop()
+            key += node.label
+            for value in node.values:
+                yield key, value
+            if node.children:
+                stack.extend((child, key) for child in node.children.values())
+
+    def freeze(self):
+        """
+        Return a read-only, array-backed copy of this trie.
+        """
+        return FrozenTrie(self.items())
+
+
+class FrozenTrie:
+    """
+    Immutable prefix index backed by two parallel sorted arrays.
+    Prefix search is two binary searches plus a slice, which makes it the
+    cheapest form for read-heavy use where titles are rebuilt in bulk.
+    """
+    _MAX_CHAR = "\U0010ffff"
+
+    def __init__(self, items=()):
+        pairs = sorted(((key.lower(), topic_data) for key, topic_data in items), key=lambda pair: pair[0])
+        self.keys = [key for key, _ in pairs]
+        self.values = [topic_data for _, topic_data in pairs]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def search(self, prefix):
+        """
+        Returns a list of topics that match the prefix.
+        """
+        prefix = prefix.lower()
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_right(self.keys, prefix + self._MAX_CHAR, lo)
+        return self.values[lo:hi]
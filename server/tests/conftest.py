@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from server.src.caching import (
+    cleanup, connector, invalidation, precompute, principal_cache, resolver_cache, search_cache, stampede, trending
+)
+from server.src.caching.resolver_cache import LocalCache
+from server.src.db import session as db_session
+from server.src.db.session import Base
+from server.src.search import topic_index
+from server.tests.fake_redis import FakeRedis
+
+# Every module that talks to Redis imports get_redis_connection by name
+REDIS_MODULES = (
+    cleanup, connector, invalidation, precompute, principal_cache, resolver_cache, search_cache, stampede, trending,
+    topic_index,
+)
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    """
+    A FakeRedis shared by all the caching modules, with empty in-process caches.
+    """
+    client = FakeRedis()
+    for module in REDIS_MODULES:
+        monkeypatch.setattr(module, "get_redis_connection", lambda: client)
+    monkeypatch.setattr(resolver_cache, "local_cache", LocalCache(16))
+    monkeypatch.setattr(principal_cache, "local_principals", LocalCache(16))
+    return client
+
+@pytest.fixture
+def database(monkeypatch):
+    """
+    An in-memory SQLite database behind get_db, shared by every session opened
+    from any thread, and empty search indexes. Returns a session on it.
+    """
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(db_session, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(topic_index, "indexes", topic_index.SearchIndexes())
+    monkeypatch.setattr(topic_index, "_indexes_loaded", False)
+    monkeypatch.setattr(topic_index, "_pending_index_ops", None)
+    session = db_session.SessionLocal()
+    yield session
+    session.close()
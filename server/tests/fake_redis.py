@@ -0,0 +1,220 @@
+import queue
+import threading
+import time
+from server.src.caching.cleanup import PURGE_USER_KEYS_SCRIPT
+from server.src.caching.precompute import RENEW_LEASE_SCRIPT
+from server.src.caching.principal_cache import STORE_PRINCIPAL_SCRIPT
+from server.src.caching.stampede import RELEASE_LOCK_SCRIPT
+
+class FakeRedis:
+    """
+    In-memory stand-in for the subset of redis.Redis used by the caching
+    modules, safe to share between threads. Values are stored as bytes like Redis returns them.
+    """
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+        self.lock = threading.RLock()
+        self.subscribers = {}  # channel -> set of FakePubSub
+
+    def _encode(self, value):
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode()
+
+    def _alive(self, key):
+        expires = self.expiry.get(key)
+        if expires is not None and expires <= time.time():
+            self.data.pop(key, None)
+            self.expiry.pop(key, None)
+        return key in self.data
+
+    def get(self, key):
+        with self.lock:
+            return self.data[key] if self._alive(key) else None
+
+    def set(self, key, value, ex=None, px=None, nx=False):
+        with self.lock:
+            if nx and self._alive(key):
+                return None
+            self.data[key] = self._encode(value)
+            self.expiry.pop(key, None)
+            if ex is not None:
+                self.expiry[key] = time.time() + ex
+            if px is not None:
+                self.expiry[key] = time.time() + px / 1000
+            return True
+
+    def mget(self, keys):
+        with self.lock:
+            return [self.get(key) for key in keys]
+
+    def setex(self, key, ttl, value):
+        return self.set(key, value, ex=ttl)
+
+    def delete(self, *keys):
+        with self.lock:
+            # Keys read back from sets arrive as bytes
+            keys = [key.decode() if isinstance(key, bytes) else key for key in keys]
+            removed = sum(1 for key in keys if self._alive(key))
+            for key in keys:
+                self.data.pop(key, None)
+                self.expiry.pop(key, None)
+            return removed
+
+    def unlink(self, *keys):
+        return self.delete(*keys)
+
+    def sadd(self, key, *members):
+        with self.lock:
+            existing = self.data.get(key) if self._alive(key) else None
+            if existing is None:
+                existing = self.data[key] = set()
+            added = {self._encode(member) for member in members} - existing
+            existing.update(added)
+            return len(added)
+
+    def smembers(self, key):
+        with self.lock:
+            return set(self.data[key]) if self._alive(key) else set()
+
+    def expire(self, key, seconds, nx=False, gt=False):
+        with self.lock:
+            if not self._alive(key):
+                return False
+            current = self.expiry.get(key)
+            expires = time.time() + seconds
+            if (nx and current is not None) or (gt and (current is None or expires <= current)):
+                return False
+            self.expiry[key] = expires
+            return True
+
+    def ttl(self, key):
+        with self.lock:
+            if not self._alive(key):
+                return -2
+            expires = self.expiry.get(key)
+            return -1 if expires is None else int(round(expires - time.time()))
+
+    def incr(self, key):
+        with self.lock:
+            value = int(self.data[key]) + 1 if self._alive(key) else 1
+            self.data[key] = self._encode(value)
+            return value
+
+    def hincrby(self, key, field, amount):
+        with self.lock:
+            fields = self.data.setdefault(key, {})
+            fields[field] = fields.get(field, 0) + amount
+            return fields[field]
+
+    def hgetall(self, key):
+        with self.lock:
+            fields = self.data.get(key, {}) if self._alive(key) else {}
+            return {self._encode(field): self._encode(value) for field, value in fields.items()}
+
+    def register_script(self, script):
+        # Only the lock scripts and the user cache scripts have stand-ins; the
+        # trending scripts run on fakeredis with Lua in test_trending_redis.py
+        def release(keys, args):
+            with self.lock:
+                if self.get(keys[0]) == self._encode(args[0]):
+                    return self.delete(keys[0])
+                return 0
+
+        def renew(keys, args):
+            with self.lock:
+                if self.get(keys[0]) == self._encode(args[0]):
+                    self.expiry[keys[0]] = time.time() + int(args[1]) / 1000
+                    return 1
+                return 0
+
+        def purge(keys, args):
+            with self.lock:
+                members = self.smembers(keys[0])
+                self.delete(*members, keys[0])
+                return len(members)
+
+        def store_principal(keys, args):
+            with self.lock:
+                if (self.get(keys[0]) or b"0") != self._encode(args[0]):
+                    return 0
+                ttl = int(args[2])
+                self.set(keys[1], args[1], ex=ttl)
+                self.sadd(keys[2], keys[1])
+                self.expire(keys[2], ttl, nx=True)
+                self.expire(keys[2], ttl, gt=True)
+                return 1
+
+        scripts = {
+            RELEASE_LOCK_SCRIPT: release, RENEW_LEASE_SCRIPT: renew, PURGE_USER_KEYS_SCRIPT: purge,
+            STORE_PRINCIPAL_SCRIPT: store_principal,
+        }
+        if script not in scripts:
+            raise NotImplementedError(f"FakeRedis cannot run script: {script.strip().splitlines()[0]}")
+        return scripts[script]
+
+    def publish(self, channel, message):
+        with self.lock:
+            receivers = list(self.subscribers.get(channel, ()))
+        for receiver in receivers:
+            receiver.messages.put({"type": "message", "channel": channel.encode(), "data": self._encode(message)})
+        return len(receivers)
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def close(self):
+        pass
+
+class FakePipeline:
+    """
+    Queues commands and runs them on execute, returning their results in order.
+    """
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        command = getattr(self.client, name)
+        def queue(*args, **kwargs):
+            self.commands.append((command, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        with self.client.lock:
+            results = [command(*args, **kwargs) for command, args, kwargs in self.commands]
+        self.commands = []
+        return results
+
+class FakePubSub:
+    """
+    Receives the messages published on its channels, in order, through get_message.
+    """
+    def __init__(self, client):
+        self.client = client
+        self.channels = set()
+        self.messages = queue.Queue()
+
+    def subscribe(self, *channels):
+        with self.client.lock:
+            for channel in channels:
+                self.client.subscribers.setdefault(channel, set()).add(self)
+                self.channels.add(channel)
+                self.messages.put({"type": "subscribe", "channel": channel.encode(), "data": len(self.channels)})
+
+    def get_message(self, timeout=0.0):
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        with self.client.lock:
+            for channel in self.channels:
+                self.client.subscribers.get(channel, set()).discard(self)
+            self.channels = set()
@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from server.src.api import login
+from server.src.db import availability
+from server.src.db.availability import (
+    get_availability_stats, is_available, load_availability_filters, record_invalidated_names, record_user_names
+)
+from server.src.db.models import User
+from server.src.db.session import Base
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+
+    def get_db():
+        yield session_factory()
+
+    monkeypatch.setattr(availability, "get_db", get_db)
+    monkeypatch.setattr(availability, "_filters", None)
+    monkeypatch.setattr(availability, "_stats", {
+        field: {"checks": 0, "filter_negatives": 0, "database_checks": 0, "false_positives": 0}
+        for field in availability.FIELDS
+    })
+    published = []
+    monkeypatch.setattr(availability, "publish_invalidation", lambda *tags: published.append(tags))
+    session = session_factory()
+    session.add_all([User(username=f"user{i}", email=f"user{i}@example.com", password_hash="x") for i in range(50)])
+    session.commit()
+    session.published = published
+    return session
+
+def test_taken_names_are_confirmed_in_the_database(db):
+    assert not is_available("username", "user7")
+    assert not is_available("email", "user7@example.com")
+    stats = get_availability_stats()
+    assert stats["username"]["database_checks"] == 1 and stats["username"]["false_positives"] == 0
+
+def test_free_names_are_answered_by_the_filter(db, monkeypatch):
+    load_availability_filters()
+    # Any database use would fail from here on
+    monkeypatch.setattr(availability, "get_db", None)
+    assert all(is_available("username", f"free{i}") for i in range(200))
+    stats = get_availability_stats()["username"]
+    assert stats["filter_negatives"] == stats["checks"] == 200
+    assert stats["observed_false_positive_rate"] == 0.0
+
+def test_recorded_names_are_taken_and_published(db):
+    load_availability_filters()
+    db.add(User(username="newbie", email="newbie@example.com", password_hash="x"))
+    db.commit()
+    record_user_names("newbie", "newbie@example.com")
+    assert not is_available("username", "newbie")
+    assert db.published == [("username:newbie", "email:newbie@example.com")]
+
+def test_names_from_other_workers_reach_the_filters(db):
+    load_availability_filters()
+    record_invalidated_names(["username:elsewhere", "topic:3", "email:elsewhere@example.com"])
+    assert "elsewhere" in availability._filters["username"]
+    assert "elsewhere@example.com" in availability._filters["email"]
+    # The database does not have them, so the checks count as false positives
+    assert is_available("username", "elsewhere")
+    assert get_availability_stats()["username"]["false_positives"] == 1
+
+def test_stats_require_a_signed_in_user():
+    [route] = [route for route in login.app.routes if getattr(route, "path", None) == "/availability/stats"]
+    assert "get_current_user" in [dependency.call.__name__ for dependency in route.dependant.dependencies]
@@ -0,0 +1,52 @@
+import random
+from server.src.utils.bitmap_index import Bitmap, TagBitmapIndex
+
+def test_bitmap_set_operations_match_python_sets():
+    rng = random.Random(11)
+    for _ in range(50):
+        left = {rng.randrange(300000) for _ in range(rng.randrange(60))}
+        right = {rng.randrange(300000) for _ in range(rng.randrange(60))}
+        a, b = Bitmap.from_ids(left), Bitmap.from_ids(right)
+        assert list(a) == sorted(left)
+        assert len(a) == len(left)
+        assert list(a & b) == sorted(left & right)
+        assert list(a | b) == sorted(left | right)
+        assert a.intersection_count(b) == len(left & right)
+
+def test_bitmap_add_and_discard():
+    bitmap = Bitmap()
+    bitmap.add(70000)
+    bitmap.add(3)
+    assert 70000 in bitmap and 3 in bitmap and 4 not in bitmap
+    bitmap.discard(70000)
+    bitmap.discard(12)
+    assert list(bitmap) == [3]
+    assert len(bitmap.chunks) == 1
+
+def make_index():
+    return TagBitmapIndex.from_pairs([
+        (1, "Python"), (1, "web"), (2, "python"), (3, "web"), (4, "rust"), (4, "web"),
+    ])
+
+def test_match_all_and_any():
+    index = make_index()
+    assert list(index.match(["python", "WEB"])) == [1]
+    assert list(index.match(["python", "rust"], match_all=False)) == [1, 2, 4]
+    assert list(index.match(["python", "missing"])) == []
+    assert list(index.match([])) == []
+
+def test_facets_within_filter():
+    index = make_index()
+    assert index.facets() == [("web", 3), ("python", 2), ("rust", 1)]
+    assert index.facets(index.match(["web"])) == [("web", 3), ("python", 1), ("rust", 1)]
+    assert index.facets(limit=1) == [("web", 3)]
+
+def test_set_topic_tags_keeps_index_in_sync():
+    index = make_index()
+    index.set_topic_tags(4, ["python"])
+    assert "rust" not in index.tags
+    assert list(index.match(["python"])) == [1, 2, 4]
+    assert list(index.match(["web"])) == [1, 3]
+    index.remove_topic(1)
+    assert list(index.match(["web"])) == [3]
+    assert 1 not in index.topic_tags
@@ -0,0 +1,18 @@
+from server.src.utils.bloom_filter import BloomFilter
+
+def test_added_items_are_always_found():
+    names = [f"user{i}@example.com" for i in range(5000)]
+    bloom = BloomFilter.from_items(names, capacity=5000)
+    assert all(name in bloom for name in names)
+    assert bloom.count == 5000
+
+def test_false_positive_rate_stays_near_the_target():
+    bloom = BloomFilter.from_items((f"user{i}" for i in range(10000)), capacity=10000, false_positive_rate=0.01)
+    false_positives = sum(f"other{i}" in bloom for i in range(20000))
+    assert false_positives / 20000 < 0.02
+    assert 0.005 < bloom.estimated_false_positive_rate() < 0.02
+
+def test_empty_filter_contains_nothing():
+    bloom = BloomFilter(100)
+    assert "alice" not in bloom
+    assert bloom.estimated_false_positive_rate() == 0.0
@@ -0,0 +1,52 @@
+import json
+import pytest
+from server.src.caching import codec
+from server.src.caching.codec import (
+    CACHE_SCHEMA_VERSION, COMPRESSED, JSON, MSGPACK, CacheFormatError, decode_cache_value, encode_cache_value
+)
+from server.src.core.config import settings
+
+PAGE = [
+    {"id": i, "title": f"topic {i}", "content": "some body text " * 40, "user_id": 1,
+     "created_at": "2025-03-10T12:00:00", "is_locked": False}
+    for i in range(20)
+]
+
+@pytest.mark.parametrize("name", ["msgpack", "json"])
+@pytest.mark.parametrize("threshold", [0, 1024])
+def test_round_trip(monkeypatch, name, threshold):
+    monkeypatch.setattr(settings, "CACHE_CODEC", name)
+    monkeypatch.setattr(settings, "CACHE_COMPRESS_MIN_BYTES", threshold)
+    for value in (PAGE, {"value": PAGE[:1], "refresh_at": 1.5}, [], "text", 3):
+        assert decode_cache_value(encode_cache_value(value)) == value
+
+def test_header_records_codec_and_compression(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_CODEC", "msgpack")
+    monkeypatch.setattr(settings, "CACHE_COMPRESS_MIN_BYTES", 1024)
+    assert encode_cache_value([1])[:2] == bytes((CACHE_SCHEMA_VERSION, MSGPACK))
+    large = encode_cache_value(PAGE)
+    assert large[:2] == bytes((CACHE_SCHEMA_VERSION, MSGPACK | COMPRESSED))
+    assert len(large) < len(json.dumps(PAGE)) / 4
+
+def test_values_from_other_codecs_are_still_read(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_CODEC", "json")
+    written = encode_cache_value(PAGE)
+    assert written[1] & ~COMPRESSED == JSON
+    monkeypatch.setattr(settings, "CACHE_CODEC", "msgpack")
+    assert decode_cache_value(written) == PAGE
+
+def test_json_is_used_without_msgpack(monkeypatch):
+    monkeypatch.setattr(codec, "msgpack", None)
+    monkeypatch.setattr(settings, "CACHE_CODEC", "msgpack")
+    assert encode_cache_value([1])[1] == JSON
+
+@pytest.mark.parametrize("raw", [
+    json.dumps(PAGE).encode(),  # Written before the codec existed
+    bytes((CACHE_SCHEMA_VERSION + 1, JSON)) + b"[]",
+    bytes((CACHE_SCHEMA_VERSION, 7)) + b"[]",
+    bytes((CACHE_SCHEMA_VERSION, JSON | COMPRESSED)) + b"not zlib",
+    b"",
+])
+def test_unreadable_values_raise(raw):
+    with pytest.raises(CacheFormatError):
+        decode_cache_value(raw)
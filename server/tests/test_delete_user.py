@@ -0,0 +1,46 @@
+from datetime import datetime
+import json
+import pytest
+from server.src.api.login import delete_user_me
+from server.src.core.config import settings
+from server.src.db.models import User, Topic, Comment, Tag
+from server.src.graphql import gql
+from server.src.search import topic_index
+
+@pytest.fixture
+def forum(database, redis_client, monkeypatch):
+    session = database
+    author = User(username="author", email="author@example.com", password_hash="x")
+    other = User(username="other", email="other@example.com", password_hash="x")
+    session.add_all([author, other])
+    session.flush()
+    python = Topic(title="Python tips", content="c", user_id=author.id, created_at=datetime(2025, 3, 1))
+    python.tags = [Tag(name="python")]
+    rust = Topic(title="Rust ownership", content="c", user_id=other.id, created_at=datetime(2025, 3, 2))
+    session.add_all([python, rust])
+    session.flush()
+    session.add(Comment(content="c", topic_id=rust.id, user_id=author.id, created_at=datetime(2025, 3, 3)))
+    session.commit()
+    topic_index.load_search_indexes()
+
+    trending = []
+    monkeypatch.setattr(gql, "forget_topic", lambda topic_id, tags=(): trending.append(("forget", topic_id, tags)))
+    monkeypatch.setattr(
+        gql, "record_comment_deleted", lambda topic_id, created_at, tags=(): trending.append(("comment", topic_id))
+    )
+    pubsub = redis_client.pubsub()
+    pubsub.subscribe(settings.CACHE_INVALIDATION_CHANNEL)
+    pubsub.get_message()
+    return session, author, python, rust, trending, pubsub
+
+def test_deleting_a_user_forgets_their_topics_and_comments(forum):
+    session, author, python, rust, trending, pubsub = forum
+    delete_user_me(db=session, current_user=author)
+
+    assert topic_index.search_topics("py") == []
+    assert topic_index.indexes.entries[rust.id].comment_count == 0
+    assert trending == [("forget", python.id, ["python"]), ("comment", rust.id)]
+    published = set()
+    while (message := pubsub.get_message()) is not None:
+        published.update(json.loads(message["data"])["tags"])
+    assert {"topics", f"topic:{python.id}", f"topic:{rust.id}", f"user:{author.id}"} <= published
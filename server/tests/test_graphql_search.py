@@ -0,0 +1,91 @@
+from datetime import datetime
+import pytest
+from server.src.caching.search_cache import bump_topics_version
+from server.src.core.config import settings
+from server.src.db.models import User, Topic
+from server.src.graphql.gql import schema
+from server.src.search import topic_index
+
+SEARCH = """
+query Search($prefix: String!, $mode: SearchMode!, $maxEdits: Int!) {
+    searchTopics(prefix: $prefix, mode: $mode, maxEdits: $maxEdits) { id title updatedAt viewCount }
+}
+"""
+
+@pytest.fixture
+def forum(database, redis_client):
+    session = database
+    user = User(username="u", email="u@example.com", password_hash="x")
+    session.add(user)
+    session.flush()
+    session.add_all([
+        Topic(title="Python tips", content="c", user_id=user.id, created_at=datetime(2025, 3, 1), view_count=4),
+        Topic(title="Rust ownership", content="c", user_id=user.id, created_at=datetime(2025, 3, 2)),
+    ])
+    session.commit()
+    topic_index.load_search_indexes()
+    return session
+
+def search(prefix, mode="PREFIX", max_edits=1):
+    result = schema.execute_sync(SEARCH, variable_values={"prefix": prefix, "mode": mode, "maxEdits": max_edits})
+    assert result.errors is None, result.errors
+    return result.data["searchTopics"]
+
+def test_search_topics_returns_matching_topics(forum):
+    [topic] = search("py")
+    assert topic["title"] == "Python tips" and topic["viewCount"] == 4
+
+def test_fuzzy_search_topics_returns_matching_topics(forum):
+    assert [topic["title"] for topic in search("pyhton", "FUZZY", max_edits=2)] == ["Python tips"]
+
+def test_cached_pages_are_served_the_same(forum):
+    assert search("py") == search("py")
+
+def test_search_topics_without_matches(forum):
+    assert search("zz") == []
+
+RANKED_SEARCH = """
+query Search($prefix: String!, $rankBy: SearchRanking!, $maxEdits: Int!) {
+    searchTopics(prefix: $prefix, mode: FUZZY, rankBy: $rankBy, maxEdits: $maxEdits) { id }
+}
+"""
+
+def levenshtein_less_equal(a, b, max_distance):
+    row = list(range(len(b) + 1))
+    for i, a_char in enumerate(a, 1):
+        previous, row[0] = row[0], i
+        for j, b_char in enumerate(b, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (a_char != b_char))
+    return min(row[-1], max_distance + 1)
+
+@pytest.fixture
+def sqlite_fuzzystrmatch(database):
+    """
+    Stand-ins on the SQLite test database for the Postgres functions the sql backend's fuzzy search calls.
+    """
+    connection = database.connection().connection.driver_connection
+    connection.create_function("levenshtein_less_equal", 3, levenshtein_less_equal)
+    connection.create_function("least", -1, min)
+
+@pytest.mark.parametrize("prefix, max_edits", [("pyhton", 2), ("pythn", 1), ("rsut", 2), ("resr", 1)])
+@pytest.mark.parametrize("rank_by", ["RECENCY", "VIEW_COUNT"])
+def test_fuzzy_search_backends_agree(forum, sqlite_fuzzystrmatch, monkeypatch, prefix, max_edits, rank_by):
+    user = forum.query(User).first()
+    forum.add_all([
+        Topic(title="Pythons in the wild", content="c", user_id=user.id, created_at=datetime(2025, 2, 1), view_count=9),
+        Topic(title="Pythn typos", content="c", user_id=user.id, created_at=datetime(2025, 1, 1)),
+        Topic(title="Rest APIs", content="c", user_id=user.id, created_at=datetime(2025, 3, 3), view_count=2),
+    ])
+    forum.commit()
+    topic_index.load_search_indexes()
+
+    pages = {}
+    for backend in ("trie", "sql"):
+        monkeypatch.setattr(settings, "SEARCH_BACKEND", backend)
+        bump_topics_version()
+        result = schema.execute_sync(
+            RANKED_SEARCH, variable_values={"prefix": prefix, "rankBy": rank_by, "maxEdits": max_edits}
+        )
+        assert result.errors is None, result.errors
+        pages[backend] = [topic["id"] for topic in result.data["searchTopics"]]
+    assert pages["sql"] == pages["trie"]
@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+import pytest
+from server.src.caching.trending import get_user_trending_tags
+from server.src.db.models import User, Topic, Tag, UserTopicSubscription
+from server.src.graphql.gql import schema
+from server.src.search import topic_index
+from server.src.utils.security import create_access_token
+
+SET_TOPIC_TAGS = """
+mutation SetTopicTags($topicId: Int!, $tags: [String!]!) {
+    setTopicTags(topicId: $topicId, tags: $tags)
+}
+"""
+
+@pytest.fixture
+def topic(database, redis_client):
+    session = database
+    user = User(username="u", email="u@example.com", password_hash="x")
+    session.add(user)
+    session.flush()
+    topic = Topic(title="Python tips", content="c", user_id=user.id)
+    # Stored before tag names were normalized
+    session.add_all([topic, Tag(name="Lang")])
+    session.commit()
+    topic_index.load_search_indexes()
+    return topic
+
+def set_topic_tags(topic_id, tags):
+    request = SimpleNamespace(headers={"Authorization": f"Bearer {create_access_token(data={'sub': 'u'})}"})
+    result = schema.execute_sync(
+        SET_TOPIC_TAGS, variable_values={"topicId": topic_id, "tags": tags}, context_value={"request": request}
+    )
+    assert result.errors is None, result.errors
+    return result.data["setTopicTags"]
+
+def test_set_topic_tags_reuses_tags_differing_in_case(topic, database):
+    assert set_topic_tags(topic.id, ["lang", "Python"]) == ["lang", "python"]
+    assert sorted(tag.name for tag in database.query(Tag)) == ["Lang", "python"]
+    assert sorted(tag.name for tag in database.get(Topic, topic.id).tags) == ["Lang", "python"]
+
+def test_set_topic_tags_refreshes_the_feed_tags_of_followers(topic, database):
+    subscriber = User(username="s", email="s@example.com", password_hash="x")
+    database.add(subscriber)
+    database.flush()
+    database.add(UserTopicSubscription(user_id=subscriber.id, topic_id=topic.id))
+    database.commit()
+    for user_id in (topic.user_id, subscriber.id):
+        get_user_trending_tags(user_id, lambda: [])
+
+    set_topic_tags(topic.id, ["python"])
+    for user_id in (topic.user_id, subscriber.id):
+        assert get_user_trending_tags(user_id, lambda: ["python"]) == ["python"]
@@ -0,0 +1,70 @@
+import json
+import threading
+import time
+import pytest
+from server.src.caching import invalidation
+from server.src.caching.invalidation import register_invalidation_handler, start_invalidation_listener
+from server.src.caching.resolver_cache import LocalCache, invalidate_tags
+from server.src.core.config import settings
+
+CHANNEL = settings.CACHE_INVALIDATION_CHANNEL
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+@pytest.fixture(autouse=True)
+def no_handlers(monkeypatch):
+    monkeypatch.setattr(invalidation, "_handlers", [])
+    monkeypatch.setattr(invalidation, "_listener", None)
+
+@pytest.fixture
+def listener(redis_client):
+    stop = threading.Event()
+    thread = start_invalidation_listener(stop)
+    assert wait_for(lambda: redis_client.subscribers.get(CHANNEL))
+    yield thread
+    stop.set()
+    thread.join(timeout=5)
+
+def publish_from_elsewhere(client, *tags):
+    client.publish(CHANNEL, json.dumps({"origin": "another-worker", "tags": list(tags)}))
+
+def test_events_from_other_processes_evict_local_entries(redis_client, listener):
+    cache = LocalCache(8)
+    register_invalidation_handler(cache.invalidate, cache.clear)
+    cache.set("topic", "a", ["topic:42"], ttl=60)
+    cache.set("user", "b", ["user:7"], ttl=60)
+    publish_from_elsewhere(redis_client, "topic:42")
+    assert wait_for(lambda: cache.get("topic") is None)
+    assert cache.get("user") is not None
+
+def test_own_events_are_not_applied_twice(redis_client, listener):
+    received = []
+    register_invalidation_handler(received.append)
+    invalidate_tags("user:7")
+    publish_from_elsewhere(redis_client, "user:8")
+    assert wait_for(lambda: received == [["user:8"]])
+
+def test_resubscribing_resets_local_caches(redis_client, listener):
+    resets = []
+    register_invalidation_handler(lambda tags: None, lambda: resets.append(True))
+    # The listener resubscribes after losing its connection, and events may have been missed meanwhile
+    pubsub = next(iter(redis_client.subscribers[CHANNEL]))
+    pubsub.messages.put({"type": "subscribe", "channel": CHANNEL.encode(), "data": 1})
+    assert wait_for(lambda: resets == [True])
+
+def test_handler_errors_do_not_stop_other_handlers(redis_client, listener):
+    received = []
+
+    def failing(tags):
+        raise RuntimeError("boom")
+
+    register_invalidation_handler(failing)
+    register_invalidation_handler(received.append)
+    publish_from_elsewhere(redis_client, "topics")
+    assert wait_for(lambda: received == [["topics"]])
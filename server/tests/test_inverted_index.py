@@ -0,0 +1,77 @@
+import sys
+import pytest
+from server.src.utils.inverted_index import InvertedIndex, tokenize
+
+@pytest.fixture
+def index():
+    index = InvertedIndex()
+    index.add(1, "Learning Python", "A gentle introduction to the language")
+    index.add(2, "Rust tips", "Ownership and borrowing, with a short python comparison")
+    index.add(3, "Cooking", "Recipes for pasta")
+    return index
+
+def test_tokenize():
+    assert tokenize("Hello, World! hello_2") == ["hello", "world", "hello_2"]
+    assert tokenize(None) == []
+
+def test_title_matches_rank_above_content_matches(index):
+    assert [doc_id for doc_id, _ in index.search("python")] == [1, 2]
+
+def test_search_matches_any_term(index):
+    assert {doc_id for doc_id, _ in index.search("pasta ownership")} == {2, 3}
+
+def test_search_pagination(index):
+    assert [doc_id for doc_id, _ in index.search("python", limit=1, offset=1)] == [2]
+
+def test_add_replaces_previous_version(index):
+    index.add(1, "Learning Go", "Goroutines")
+    assert [doc_id for doc_id, _ in index.search("python")] == [2]
+    assert [doc_id for doc_id, _ in index.search("goroutines")] == [1]
+
+def test_remove(index):
+    assert index.remove(3)
+    assert not index.remove(3)
+    assert index.search("pasta") == []
+    assert "pasta" not in index.postings
+    assert len(index) == 2
+
+def test_snapshot_round_trip(index, tmp_path):
+    path = tmp_path / "index.snapshot"
+    index.metadata["high_water_mark"] = "2025-01-01T00:00:00"
+    index.save(path)
+    restored = InvertedIndex.load(path)
+    assert restored.search("python") == index.search("python")
+    assert restored.metadata == index.metadata
+
+def test_snapshot_round_trip_on_a_big_endian_host(index, tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "byteorder", "big")
+    path = tmp_path / "index.snapshot"
+    index.save(path)
+    restored = InvertedIndex.load(path)
+    assert restored.search("python pasta") == index.search("python pasta")
+    assert restored.remove(2)
+    assert [doc_id for doc_id, _ in restored.search("python")] == [1]
+
+def test_load_missing_snapshot(tmp_path):
+    assert InvertedIndex.load(tmp_path / "missing") is None
+
+def test_snapshot_can_be_updated_after_loading(index, tmp_path):
+    path = tmp_path / "index.snapshot"
+    index.save(path)
+    restored = InvertedIndex.load(path)
+    assert restored.remove(2)
+    assert not restored.remove(2)
+    restored.add(4, "Python packaging", "Wheels")
+    restored.add(1, "Learning Go", "Goroutines")
+    assert [doc_id for doc_id, _ in restored.search("python")] == [4]
+    assert [doc_id for doc_id, _ in restored.search("goroutines")] == [1]
+    restored.save(path)
+    assert InvertedIndex.load(path).search("python wheels pasta") == restored.search("python wheels pasta")
+
+def test_load_rejects_files_in_other_formats(tmp_path):
+    path = tmp_path / "index.snapshot"
+    # Snapshots used to be pickles, which must never be loaded
+    path.write_bytes(b"\x80\x05\x95 not a snapshot")
+    assert InvertedIndex.load(path) is None
+    path.write_bytes(b"")
+    assert InvertedIndex.load(path) is None
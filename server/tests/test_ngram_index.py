@@ -0,0 +1,73 @@
+import sys
+import threading
+import pytest
+from server.src.utils.ngram_index import NGramIndex, intersect
+from array import array
+
+@pytest.fixture
+def index():
+    index = NGramIndex()
+    index.add(1, "Learning Python")
+    index.add(2, "Python tips and tricks")
+    index.add(3, "Rust for Pythonistas")
+    index.add(4, "Cooking pasta")
+    return index
+
+def test_substring_matches_inside_titles(index):
+    assert list(index.substring("ython")) == [1, 2, 3]
+    assert list(index.substring("ing p")) == [1, 4]
+    assert list(index.substring("java")) == []
+
+def test_short_substring_scans_titles(index):
+    assert list(index.substring("co")) == [4]
+    assert list(index.substring("th")) == [1, 2, 3]
+    assert list(index.substring("")) == []
+
+def test_short_substring_scans_while_titles_change(index):
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    stop = threading.Event()
+    errors = []
+
+    def update():
+        doc_id = 4
+        while not stop.is_set():
+            doc_id = doc_id % 500 + 5
+            index.add(doc_id, f"Pygments {doc_id}")
+            index.remove((doc_id * 7) % 500 + 5)
+
+    def scan():
+        while not stop.is_set():
+            try:
+                assert {1, 2, 3} <= set(index.substring("py"))
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+
+    threads = [threading.Thread(target=update), threading.Thread(target=scan)]
+    try:
+        for thread in threads:
+            thread.start()
+        stop.wait(0.5)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        sys.setswitchinterval(switch_interval)
+    assert errors == []
+
+def test_word_prefix_intersects_terms(index):
+    assert list(index.word_prefix("python")) == [1, 2, 3]
+    assert list(index.word_prefix("pyth learn")) == [1]
+    assert list(index.word_prefix("tri py")) == [2]
+    assert list(index.word_prefix("")) == []
+
+def test_remove_and_replace(index):
+    assert index.remove(3)
+    assert not index.remove(3)
+    assert "rust" not in index.vocabulary
+    index.add(1, "Learning Go")
+    assert list(index.word_prefix("python")) == [2]
+
+def test_intersect():
+    assert list(intersect(array("I", [1, 5, 9]), array("I", [2, 5, 7, 9, 11]))) == [5, 9]
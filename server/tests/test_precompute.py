@@ -0,0 +1,43 @@
+import time
+from server.src.caching import precompute
+from server.src.caching.precompute import LEADER_KEY, hold_leadership, precompute_once, trending_cache_key
+from server.src.caching.stampede import prime_cached_values
+from server.src.core.config import settings
+from server.src.graphql import gql
+
+def test_only_the_leader_runs_the_jobs(redis_client, monkeypatch):
+    runs = []
+    monkeypatch.setattr(precompute, "PRECOMPUTE_JOBS", (("job", lambda: runs.append(1)),))
+    assert precompute_once("a", lease_seconds=60)
+    assert not precompute_once("b", lease_seconds=60)
+    assert precompute_once("a", lease_seconds=60)
+    assert len(runs) == 2
+
+def test_leadership_passes_on_when_the_lease_expires(redis_client):
+    assert hold_leadership(redis_client, "a", 0.1)
+    assert not hold_leadership(redis_client, "b", 0.1)
+    time.sleep(0.15)
+    assert hold_leadership(redis_client, "b", 60)
+    assert not hold_leadership(redis_client, "a", 60)
+    assert redis_client.get(LEADER_KEY) == b"b"
+
+def test_failing_job_does_not_stop_the_others(redis_client, monkeypatch):
+    runs = []
+    def fail():
+        raise RuntimeError("boom")
+    monkeypatch.setattr(precompute, "PRECOMPUTE_JOBS", (("fail", fail), ("ok", lambda: runs.append(1))))
+    assert precompute_once("a", lease_seconds=60)
+    assert runs == [1]
+
+def test_precomputed_windows_are_served_from_the_cache(redis_client, monkeypatch):
+    monkeypatch.setattr(settings, "TRENDING_BATCH_WINDOWS_DAYS", [14])
+    monkeypatch.setattr(settings, "TRENDING_BATCH_MAX_TOPICS", [10])
+    page = [{"id": 1, "title": "t", "content": "c", "user_id": 1, "created_at": "2025-03-01T00:00:00", "is_locked": False}]
+    prime_cached_values({trending_cache_key(14, 10): page}, ttl=60)
+
+    def no_database():
+        raise AssertionError("the request path must not query the database")
+
+    monkeypatch.setattr(gql, "get_db", no_database)
+    monkeypatch.setattr(gql, "precompute_trending_pages", no_database)
+    assert [topic.id for topic in gql._trending_topic_page(None, 14, 10)] == [1]
@@ -0,0 +1,72 @@
+import fakeredis
+from server.src.caching import principal_cache
+from server.src.caching.cleanup import user_keys_key
+from server.src.caching.principal_cache import Principal, get_principal, invalidate_principal, principal_key
+from server.src.caching.resolver_cache import LocalCache
+
+class Loader:
+    def __init__(self, users):
+        self.users = users
+        self.calls = 0
+
+    def __call__(self, subject):
+        self.calls += 1
+        return self.users.get(subject)
+
+def test_repeated_lookups_load_the_user_once(redis_client):
+    load = Loader({"alice": Principal(7, "alice")})
+    for _ in range(10):
+        user = get_principal("alice", load)
+    assert (user.id, user.username) == (7, "alice")
+    assert load.calls == 1
+
+def test_other_processes_read_the_redis_entry(redis_client, monkeypatch):
+    get_principal("alice", Loader({"alice": Principal(7, "alice")}))
+    monkeypatch.setattr(principal_cache, "local_principals", LocalCache(16))
+    load = Loader({})
+    assert get_principal("alice", load).id == 7
+    assert load.calls == 0
+
+def test_invalidation_drops_both_tiers(redis_client):
+    load = Loader({"alice": Principal(7, "alice"), "bob": Principal(8, "bob")})
+    get_principal("alice", load)
+    get_principal("bob", load)
+    invalidate_principal(7)
+    assert redis_client.get(principal_key("alice")) is None
+    assert redis_client.get(principal_key("bob")) is not None
+    # Renamed since: the new name is loaded, the old one is gone
+    load.users = {"alicia": Principal(7, "alicia"), "bob": Principal(8, "bob")}
+    assert get_principal("alice", load) is None
+    assert get_principal("alicia", load).username == "alicia"
+    get_principal("bob", load)
+    assert load.calls == 4
+
+def test_unknown_subjects_are_not_cached(redis_client):
+    load = Loader({})
+    assert get_principal("ghost", load) is None
+    assert get_principal("ghost", load) is None
+    assert load.calls == 2
+
+def test_load_racing_an_invalidation_is_not_stored(redis_client):
+    # The user is renamed and invalidated while the old row is being loaded
+    def load(subject):
+        invalidate_principal(7)
+        return Principal(7, "alice")
+
+    assert get_principal("alice", load).username == "alice"
+    assert redis_client.get(principal_key("alice")) is None
+    load = Loader({"alicia": Principal(7, "alicia")})
+    assert get_principal("alice", load) is None
+    assert load.calls == 1
+
+def test_store_script_checks_the_generation(monkeypatch):
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(principal_cache, "get_redis_connection", lambda: client)
+    assert principal_cache._store(principal_key("alice"), Principal(7, "alice"), 0, 60) == 1
+    assert client.smembers(user_keys_key(7)) == {principal_key("alice").encode()}
+    assert 0 < client.ttl(user_keys_key(7)) <= 60
+
+    client.incr(principal_cache.PRINCIPAL_GENERATION_KEY)
+    assert principal_cache._store(principal_key("bob"), Principal(8, "bob"), 0, 60) == 0
+    assert client.get(principal_key("bob")) is None
+    assert principal_cache._read(principal_key("alice"))[1] == 1
@@ -0,0 +1,49 @@
+import os
+import pytest
+from redis.exceptions import ConnectionError
+from server.src.caching import connector
+from server.src.caching.connector import InstrumentedConnectionPool, get_many
+from server.tests.fake_redis import FakeRedis
+
+class StubConnection:
+    def __init__(self, **kwargs):
+        self.pid = os.getpid()
+
+    def connect(self):
+        pass
+
+    def can_read(self):
+        return False
+
+    def disconnect(self):
+        pass
+
+@pytest.fixture
+def pool():
+    return InstrumentedConnectionPool(connection_class=StubConnection, max_connections=2, timeout=0.05)
+
+def test_pool_reuses_connections_and_counts_them(pool):
+    first = pool.get_connection("GET")
+    pool.release(first)
+    assert pool.get_connection("GET") is first
+    stats = pool.stats()
+    assert stats["created"] == 1 and stats["in_use"] == 1 and stats["acquired"] == 2
+    assert stats["waits"] == 0 and stats["errors"] == 0
+
+def test_exhausted_pool_counts_waits_and_errors(pool):
+    held = [pool.get_connection("GET"), pool.get_connection("GET")]
+    with pytest.raises(ConnectionError):
+        pool.get_connection("GET")
+    stats = pool.stats()
+    assert stats["in_use"] == 2 and stats["waits"] == 1 and stats["errors"] == 1
+    for connection in held:
+        pool.release(connection)
+    assert pool.stats()["in_use"] == 0
+
+def test_get_many_reads_in_batches(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(connector, "get_redis_connection", lambda: client)
+    for number in range(5):
+        client.set(f"k{number}", number)
+    assert get_many([f"k{number}" for number in range(6)], batch_size=2) == [b"0", b"1", b"2", b"3", b"4", None]
+    assert get_many([]) == []
@@ -0,0 +1,86 @@
+import pytest
+from server.src.caching import connector, resolver_cache
+from server.src.caching.resolver_cache import LocalCache, cached_resolver, invalidate_tags
+
+class User:
+    def __init__(self, id):
+        self.id = id
+
+def make_resolver(calls, **options):
+    @cached_resolver(tags=lambda topic_id: [f"topic:{topic_id}"], dump=list, load=tuple, **options)
+    def comments(self, topic_id: int, info) -> list:
+        calls.append(topic_id)
+        return [topic_id, len(calls)]
+    return comments
+
+def test_results_are_cached_per_argument(redis_client):
+    calls = []
+    comments = make_resolver(calls)
+    assert comments(None, topic_id=1, info=None) == (1, 1)
+    assert comments(None, topic_id=1, info=None) == (1, 1)
+    assert comments(None, 2, None) == (2, 2)
+    assert calls == [1, 2]
+
+def test_redis_tier_is_shared_between_processes(redis_client, monkeypatch):
+    calls = []
+    comments = make_resolver(calls)
+    comments(None, topic_id=1, info=None)
+    # Another process: same Redis, empty local cache
+    monkeypatch.setattr(resolver_cache, "local_cache", LocalCache(16))
+    assert comments(None, topic_id=1, info=None) == (1, 1)
+    assert calls == [1]
+
+def test_invalidating_a_tag_drops_both_tiers(redis_client, monkeypatch):
+    calls = []
+    comments = make_resolver(calls)
+    comments(None, topic_id=1, info=None)
+    comments(None, topic_id=2, info=None)
+    invalidate_tags("topic:1")
+    assert comments(None, topic_id=1, info=None) == (1, 3)
+    assert comments(None, topic_id=2, info=None) == (2, 2)
+
+    # An invalidation made elsewhere is seen through the Redis tag versions
+    redis_client.incr(resolver_cache.tag_version_key("topic:2"))
+    monkeypatch.setattr(resolver_cache, "local_cache", LocalCache(16))
+    assert comments(None, topic_id=2, info=None) == (2, 4)
+
+def test_authenticate_runs_on_hits_and_keys_per_user(redis_client):
+    calls, seen = [], []
+    def authenticate(info):
+        seen.append(info)
+        if info is None:
+            raise PermissionError("not logged in")
+        return User(info)
+    comments = make_resolver(calls, authenticate=authenticate, per_user=True)
+    comments(None, topic_id=1, info=7)
+    comments(None, topic_id=1, info=7)
+    comments(None, topic_id=1, info=8)
+    assert seen == [7, 7, 8] and calls == [1, 1]
+    with pytest.raises(PermissionError):
+        comments(None, topic_id=1, info=None)
+
+def test_redis_down_computes_directly(monkeypatch):
+    def unavailable():
+        raise ConnectionError("redis is down")
+    monkeypatch.setattr(connector, "get_redis_connection", unavailable)
+    monkeypatch.setattr(resolver_cache, "get_redis_connection", unavailable)
+    monkeypatch.setattr(resolver_cache, "local_cache", LocalCache(16))
+    calls = []
+    comments = make_resolver(calls)
+    assert comments(None, topic_id=1, info=None) == (1, 1)
+    assert comments(None, topic_id=1, info=None) == (1, 2)
+
+def test_local_cache_evicts_least_recently_used_and_expired():
+    cache = LocalCache(2)
+    cache.set("a", 1, ["t"], ttl=60)
+    cache.set("b", 2, ["t"], ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ["u"], ttl=60)
+    assert cache.get("b") is None and cache.get("a")[2] == 1
+    cache.set("d", 4, ["u"], ttl=-1)
+    assert cache.get("d") is None
+    generation = cache.generation
+    cache.invalidate(["t"])
+    assert cache.get("a") is None and cache.get("c")[2] == 3
+    cache.set("e", 5, ["u"], ttl=60, generation=generation)
+    assert cache.get("e") is None
@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+from server.src.caching import search_cache
+from server.src.caching.search_cache import cached_search, bump_topics_version, search_cache_key
+from server.src.db.models import User
+from server.src.graphql.gql import schema
+from server.src.utils.security import create_access_token
+
+def test_key_normalizes_case_and_word_spacing():
+    assert search_cache_key(3, "PyThon", "prefix", "recency", 2, 10, 0) == search_cache_key(3, "python", "prefix", "recency", 1, 10, 0)
+    assert search_cache_key(3, " Py  tips", "word", "recency", 1, 10, 0) == search_cache_key(3, "py tips", "word", "recency", 1, 10, 0)
+    assert search_cache_key(3, "py  tips", "substring", "recency", 1, 10, 0) != search_cache_key(3, "py tips", "substring", "recency", 1, 10, 0)
+
+def test_hits_until_topics_version_changes(redis_client):
+    calls = []
+    def compute():
+        calls.append(1)
+        return [{"id": len(calls)}]
+
+    assert cached_search("py", "prefix", "recency", 1, 10, 0, compute) == [{"id": 1}]
+    assert cached_search("PY", "prefix", "recency", 1, 10, 0, compute) == [{"id": 1}]
+    bump_topics_version()
+    assert cached_search("py", "prefix", "recency", 1, 10, 0, compute) == [{"id": 2}]
+    assert redis_client.data[search_cache.SEARCH_CACHE_STATS_KEY] == {"hits": 1, "misses": 2}
+
+def test_falls_back_when_redis_is_down(monkeypatch):
+    def unavailable():
+        raise ConnectionError("redis is down")
+    monkeypatch.setattr(search_cache, "get_redis_connection", unavailable)
+    assert cached_search("py", "prefix", "recency", 1, 10, 0, lambda: [1]) == [1]
+    bump_topics_version()
+
+def test_key_includes_tag_filter():
+    plain = search_cache_key(1, "py", "prefix", "recency", 1, 10, 0)
+    tagged = search_cache_key(1, "py", "prefix", "recency", 1, 10, 0, ["Web", "api"])
+    assert plain != tagged
+    assert tagged == search_cache_key(1, "py", "prefix", "recency", 1, 10, 0, ["API", "web "])
+    assert tagged != search_cache_key(1, "py", "prefix", "recency", 1, 10, 0, ["api", "web"], match_all_tags=False)
+
+def test_stats_query_reports_the_hit_rate(redis_client, database):
+    database.add(User(username="u", email="u@example.com", password_hash="x"))
+    database.commit()
+    for _ in range(4):
+        cached_search("py", "prefix", "recency", 1, 10, 0, lambda: [1])
+
+    query = "{ getSearchCacheStats { hits misses hitRate } }"
+    request = SimpleNamespace(headers={"Authorization": f"Bearer {create_access_token(data={'sub': 'u'})}"})
+    result = schema.execute_sync(query, context_value={"request": request})
+    assert result.errors is None, result.errors
+    assert result.data["getSearchCacheStats"] == {"hits": 3, "misses": 1, "hitRate": 0.75}
+    assert schema.execute_sync(query, context_value={"request": SimpleNamespace(headers={})}).errors
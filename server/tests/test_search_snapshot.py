@@ -0,0 +1,52 @@
+import json
+import struct
+import sys
+import pytest
+from server.src.search.snapshot import HEADER, TopicSnapshot, write_topic_snapshot
+
+def make_record(topic_id):
+    return {
+        "id": topic_id,
+        "title": f"Tópico {topic_id}" * topic_id,
+        "created_at": 1735787045.678901 + topic_id,
+        "view_count": topic_id * 10,
+        "comment_count": topic_id,
+    }
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "topics.snapshot"
+    records = [make_record(i) for i in range(1, 6)]
+    write_topic_snapshot(path, records, {"max_topic_id": 5})
+    with TopicSnapshot(path) as snapshot:
+        assert snapshot.metadata == {"max_topic_id": 5}
+        assert len(snapshot) == 5
+        assert list(snapshot) == records
+
+def test_file_is_little_endian(tmp_path):
+    path = tmp_path / "topics.snapshot"
+    write_topic_snapshot(path, [make_record(i) for i in range(1, 3)], {})
+    data = path.read_bytes()
+    assert struct.unpack_from("<4sHIQ", data) == (b"TPCS", 2, len(json.dumps({})), 2)
+    ids = HEADER.size + len(json.dumps({}))
+    ids += -ids % 8
+    assert struct.unpack_from("<2q", data, ids) == (1, 2)
+
+def test_round_trip_on_a_big_endian_host(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "byteorder", "big")
+    path = tmp_path / "topics.snapshot"
+    records = [make_record(i) for i in range(1, 6)]
+    write_topic_snapshot(path, records, {})
+    with TopicSnapshot(path) as snapshot:
+        assert list(snapshot) == records
+
+def test_empty_snapshot(tmp_path):
+    path = tmp_path / "topics.snapshot"
+    write_topic_snapshot(path, [], {})
+    with TopicSnapshot(path) as snapshot:
+        assert list(snapshot) == []
+
+def test_rejects_foreign_file(tmp_path):
+    path = tmp_path / "topics.snapshot"
+    path.write_bytes(b"not a snapshot at all, just some bytes")
+    with pytest.raises(ValueError):
+        TopicSnapshot(path)
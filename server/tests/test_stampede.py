@@ -0,0 +1,55 @@
+import json
+import threading
+import time
+from server.src.caching import stampede
+from server.src.caching.stampede import cached_compute
+from server.src.caching.codec import decode_cache_value, encode_cache_value
+
+def test_cold_key_is_computed_once(redis_client):
+    calls = []
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"answer": 42}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cached_compute("k", compute, ttl=60))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == [{"answer": 42}] * 8
+
+def test_stale_value_served_while_one_refresh_runs(redis_client):
+    redis_client.set("k", encode_cache_value({"value": "old", "refresh_at": time.time() - 1}), ex=60)
+    refreshed = threading.Event()
+    calls = []
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        refreshed.set()
+        return "new"
+
+    assert [cached_compute("k", compute, ttl=60) for _ in range(5)] == ["old"] * 5
+    assert refreshed.wait(2)
+    deadline = time.time() + 2
+    while redis_client.get("k:lock") is not None and time.time() < deadline:
+        time.sleep(0.01)
+    assert cached_compute("k", compute, ttl=60) == "new"
+    assert len(calls) == 1
+
+def test_refresh_is_scheduled_ahead_of_expiry(redis_client):
+    cached_compute("k", lambda: 1, ttl=100, refresh_ahead=0.2)
+    entry = decode_cache_value(redis_client.get("k"))
+    assert time.time() + 79 <= entry["refresh_at"] <= time.time() + 100
+
+def test_plain_cached_values_are_replaced(redis_client):
+    redis_client.set("k", json.dumps([1, 2]))
+    assert cached_compute("k", lambda: [3], ttl=60) == [3]
+
+def test_redis_down_computes_directly(monkeypatch):
+    def unavailable():
+        raise ConnectionError("redis is down")
+    monkeypatch.setattr(stampede, "get_redis_connection", unavailable)
+    assert cached_compute("k", lambda: "value", ttl=60) == "value"
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from server.src.db.session import Base
+from server.src.db.models import User, Topic, Comment, TopicActivityHourly
+from server.src.db.activity import backfill_topic_activity, compact_topic_activity, delete_topic_activity
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    user = User(username="u", email="u@example.com", password_hash="x")
+    topic = Topic(title="t", content="c", user=user)
+    session.add_all([user, topic])
+    session.commit()
+    yield session
+    session.close()
+
+def buckets(db):
+    return sorted((row.topic_id, row.bucket, row.comment_count) for row in db.query(TopicActivityHourly))
+
+def add_comments(db, *times):
+    comments = [Comment(topic_id=1, user_id=1, content="c", created_at=at) for at in times]
+    db.add_all(comments)
+    db.commit()
+    return comments
+
+def test_comments_are_counted_per_hour(db):
+    hour = datetime(2025, 5, 1, 9)
+    comments = add_comments(db, hour + timedelta(minutes=5), hour + timedelta(minutes=50), hour + timedelta(hours=1))
+    assert buckets(db) == [(1, hour, 2), (1, hour + timedelta(hours=1), 1)]
+
+    db.delete(comments[2])
+    db.commit()
+    assert buckets(db) == [(1, hour, 2)]
+
+def test_backfill_matches_incremental_counts(db):
+    start = datetime(2025, 5, 1)
+    add_comments(db, *(start + timedelta(minutes=37 * i) for i in range(50)))
+    incremental = buckets(db)
+    backfill_topic_activity(db)
+    assert buckets(db) == incremental
+
+def test_backfill_if_empty_leaves_a_built_rollup_alone(db):
+    hour = datetime(2025, 5, 1, 9)
+    add_comments(db, hour)
+    db.query(TopicActivityHourly).update({"comment_count": 5})
+    db.commit()
+    backfill_topic_activity(db, if_empty=True)
+    assert buckets(db) == [(1, hour, 5)]
+
+    db.query(TopicActivityHourly).delete()
+    db.commit()
+    backfill_topic_activity(db, if_empty=True)
+    assert buckets(db) == [(1, hour, 1)]
+
+def test_compaction_merges_old_hours_into_days(db):
+    old = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=20)
+    recent = datetime.now() - timedelta(hours=2)
+    comments = add_comments(db, old, old + timedelta(hours=3), old + timedelta(hours=3, minutes=1), recent)
+
+    compact_topic_activity(db, older_than_days=8)
+    day = old.replace(hour=0)
+    assert buckets(db) == [(1, day, 3), (1, recent.replace(minute=0, second=0, microsecond=0), 1)]
+    compact_topic_activity(db, older_than_days=8)
+    assert buckets(db)[0] == (1, day, 3)
+
+    # Deleting a comment from a compacted hour takes it off its day
+    db.delete(comments[1])
+    db.commit()
+    assert buckets(db)[0] == (1, day, 2)
+
+def test_delete_topic_activity(db):
+    add_comments(db, datetime(2025, 5, 1, 9))
+    delete_topic_activity(db, 1)
+    db.commit()
+    assert buckets(db) == []
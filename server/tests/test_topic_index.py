@@ -0,0 +1,196 @@
+from datetime import datetime
+from types import SimpleNamespace
+import sys
+import threading
+import time
+from server.src.core.config import settings
+from server.src.db.models import User, Topic, Comment, Tag
+from server.src.search import topic_index
+from server.src.search.topic_index import (
+    ensure_search_indexes_loaded, fuzzy_search_topics, list_topics_by_tags, load_search_indexes,
+    reconcile_search_indexes, refresh_invalidated_topics, search_topic_text, search_topic_titles, search_topics,
+    tag_facets
+)
+from server.src.caching.search_cache import SEARCH_INDEX_TAG
+
+def add_topics(session, *titles):
+    user = session.query(User).first()
+    if user is None:
+        user = User(username="u", email="u@example.com", password_hash="x")
+        session.add(user)
+        session.flush()
+    topics = [Topic(title=title, content="c", user_id=user.id, created_at=datetime(2025, 3, 1)) for title in titles]
+    session.add_all(topics)
+    session.commit()
+    return topics
+
+def test_concurrent_first_loads_build_once(database, monkeypatch):
+    add_topics(database, "Python tips")
+    builds = []
+    build = topic_index._build_from_database
+
+    def slow_build(db):
+        builds.append(1)
+        time.sleep(0.1)
+        return build(db)
+
+    monkeypatch.setattr(topic_index, "_build_from_database", slow_build)
+    errors = []
+
+    def first_request():
+        try:
+            ensure_search_indexes_loaded()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=first_request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == [] and builds == [1]
+    assert search_topics("py") == [database.query(Topic).first().id]
+
+def test_reconcile_racing_a_lazy_load_keeps_index_updates(database, monkeypatch):
+    add_topics(database, "Python tips")
+    build = topic_index._build_from_database
+    started = threading.Event()
+
+    def slow_build(db):
+        started.set()
+        time.sleep(0.1)
+        return build(db)
+
+    monkeypatch.setattr(topic_index, "_build_from_database", slow_build)
+    reconcile = threading.Thread(target=load_search_indexes)
+    reconcile.start()
+    started.wait()
+    lazy = threading.Thread(target=ensure_search_indexes_loaded)
+    lazy.start()
+    # Committed while the reconciler's build is in flight
+    [topic] = add_topics(database, "Pythonic idioms")
+    topic_index.index_topic(topic)
+    reconcile.join()
+    lazy.join()
+    assert topic.id in search_topics("pythonic")
+
+def test_snapshot_load_recounts_deleted_comments(database, redis_client, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "SEARCH_SNAPSHOT_DIR", str(tmp_path))
+    topic, latest = add_topics(database, "Python tips", "Rust ownership")
+    topic.updated_at, latest.updated_at = datetime(2025, 3, 1), datetime(2025, 3, 2)
+    database.add_all([Comment(content="c", topic_id=topic.id, user_id=topic.user_id) for _ in range(3)])
+    database.commit()
+    load_search_indexes()
+    assert topic_index.indexes.entries[topic.id].comment_count == 3
+
+    database.delete(database.query(Comment).first())
+    database.commit()
+    monkeypatch.setattr(topic_index, "_build_from_database", None)
+    load_search_indexes(use_snapshot=True)
+    assert topic_index.indexes.entries[topic.id].comment_count == 2
+    assert search_topic_text("tips") == [topic.id]
+
+def test_searches_racing_index_updates_do_not_fail(database):
+    # Switch threads often so that reads interleave with the updates
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    load_search_indexes()
+    stop = threading.Event()
+    errors = []
+
+    def update():
+        topic_id = 0
+        while not stop.is_set():
+            topic_id = topic_id % 200 + 1
+            topic = SimpleNamespace(
+                id=topic_id, title=f"Python {topic_id}", content=f"python snake {topic_id}",
+                created_at=datetime(2025, 3, 1), view_count=topic_id,
+            )
+            topic_index.index_topic(topic)
+            topic_index.retag_topic(topic_id, ["python", f"tag{topic_id % 7}"])
+            topic_index.unindex_topic((topic_id * 7) % 200 + 1)
+
+    def read():
+        while not stop.is_set():
+            try:
+                search_topics("py")
+                fuzzy_search_topics("pyton")
+                search_topic_text("python snake")
+                search_topic_titles("py", "substring")
+                search_topic_titles("pyth", "word")
+                list_topics_by_tags(["python"], match_all=False)
+                tag_facets(["python"], query="py")
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+
+    threads = [threading.Thread(target=update)] + [threading.Thread(target=read) for _ in range(3)]
+    try:
+        for thread in threads:
+            thread.start()
+        time.sleep(1)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        sys.setswitchinterval(switch_interval)
+    assert errors == []
+
+def test_reconcile_reads_only_changed_topics(database, redis_client, monkeypatch):
+    kept, deleted, commented = add_topics(database, "Python tips", "Rust ownership", "Go channels")
+    kept.updated_at = commented.updated_at = datetime(2025, 3, 1)
+    # The latest update is the watermark, which is always read again
+    deleted.updated_at = datetime(2025, 3, 2)
+    database.commit()
+    load_search_indexes()
+
+    # Committed by another worker whose invalidation events were lost
+    [added] = add_topics(database, "Pythonic idioms")
+    database.delete(deleted)
+    database.add(Comment(content="c", topic_id=commented.id, user_id=commented.user_id))
+    kept.tags = [Tag(name="python")]
+    database.commit()
+    indexed = []
+    add = topic_index.InvertedIndex.add
+    monkeypatch.setattr(
+        topic_index.InvertedIndex, "add", lambda self, doc_id, *text: indexed.append(doc_id) or add(self, doc_id, *text)
+    )
+    reconcile_search_indexes()
+
+    assert indexed == [added.id]
+    assert sorted(search_topics("py")) == [kept.id, added.id]
+    assert search_topics("rust") == []
+    assert topic_index.indexes.entries[commented.id].comment_count == 1
+    assert list_topics_by_tags(["python"]) == [kept.id]
+
+def test_one_worker_writes_snapshots_per_interval(database, redis_client, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "SEARCH_SNAPSHOT_DIR", str(tmp_path))
+    writes = []
+    write = topic_index.write_topic_snapshot
+    monkeypatch.setattr(
+        topic_index, "write_topic_snapshot", lambda *args: writes.append(1) or write(*args)
+    )
+    add_topics(database, "Python tips")
+    load_search_indexes()
+    # Another worker's reconcile within the same interval
+    reconcile_search_indexes()
+    assert writes == [1]
+
+    redis_client.delete(topic_index.SNAPSHOT_WRITER_KEY)
+    reconcile_search_indexes()
+    assert writes == [1, 1]
+
+def test_search_pages_are_retired_after_a_remote_change_is_applied(database, monkeypatch):
+    [topic] = add_topics(database, "Python tips")
+    load_search_indexes()
+    topic.title = "Rust tips"
+    database.commit()
+    # What a search page cached at the moment of the bump would contain
+    seen = []
+    monkeypatch.setattr(topic_index, "bump_topics_version", lambda: seen.append(search_topics("rust")))
+
+    refresh_invalidated_topics([SEARCH_INDEX_TAG, f"topic:{topic.id}"])
+    assert seen == [[topic.id]]
+    # Comment events leave the search pages alone
+    refresh_invalidated_topics([f"topic:{topic.id}"])
+    assert len(seen) == 1
@@ -0,0 +1,49 @@
+from datetime import timedelta
+import math
+import pytest
+from server.src.caching.trending import (
+    SCORE_EPOCH, forget_user_trending_tags, get_personalized_trending_topic_ids, get_trending_topic_ids,
+    get_user_trending_tags, log_contribution, _logaddexp
+)
+
+def test_contribution_doubles_every_window():
+    later = SCORE_EPOCH + timedelta(days=7)
+    assert math.isclose(log_contribution(2, later, 7) - log_contribution(2, SCORE_EPOCH, 7), math.log(2))
+    assert math.isclose(log_contribution(3, SCORE_EPOCH, 1), math.log(3))
+
+def test_logaddexp_sums_scores_without_overflow():
+    assert math.isclose(_logaddexp(math.log(2), math.log(3)), math.log(5))
+    assert _logaddexp(None, 4.0) == 4.0
+    # Far in the future the scores themselves would overflow a float
+    far = log_contribution(2, SCORE_EPOCH + timedelta(days=365 * 50), 1)
+    assert math.isclose(_logaddexp(far, far), far + math.log(2))
+
+def test_old_activity_ranks_below_recent_activity():
+    busy_last_month = _logaddexp(
+        log_contribution(3, SCORE_EPOCH, 7),
+        math.log(5) + log_contribution(2, SCORE_EPOCH + timedelta(days=1), 7),
+    )
+    quiet_today = log_contribution(2, SCORE_EPOCH + timedelta(days=30), 7)
+    assert quiet_today > busy_last_month
+
+def test_empty_pages_do_not_read_the_whole_set(redis_client):
+    # FakeRedis has no sorted sets: reaching Redis would fail
+    assert get_trending_topic_ids(7, 0) == []
+    assert get_trending_topic_ids(7, -1, tag="python") == []
+    assert get_personalized_trending_topic_ids(7, 0, ["python"]) == []
+
+def test_user_trending_tags_are_cached_until_forgotten(redis_client):
+    assert get_user_trending_tags(7, lambda: ["python"]) == ["python"]
+    assert get_user_trending_tags(7, lambda: pytest.fail("aggregated again")) == ["python"]
+    forget_user_trending_tags(7)
+    assert get_user_trending_tags(7, lambda: ["rust"]) == ["rust"]
+    assert get_user_trending_tags(8, lambda: []) == []
+
+def test_user_trending_tags_read_before_a_change_are_not_reused(redis_client):
+    def load_racing_a_retag():
+        # The retag commits and invalidates while the old tags are being read
+        forget_user_trending_tags(7)
+        return ["python"]
+
+    assert get_user_trending_tags(7, load_racing_a_retag) == ["python"]
+    assert get_user_trending_tags(7, lambda: ["rust"]) == ["rust"]
@@ -0,0 +1,96 @@
+from datetime import timedelta
+from types import SimpleNamespace
+import math
+import fakeredis
+import pytest
+from server.src.caching import trending
+from server.src.caching.trending import (
+    SCORE_EPOCH, TRENDING_TAGS_KEY, get_personalized_trending_topic_ids, get_trending_topic_ids, log_contribution,
+    rebuild_trending_scores, record_comment_created, record_comment_deleted, record_topic_created,
+    record_topic_retagged, trending_key, _logaddexp
+)
+from server.src.core.config import settings
+from server.src.db.models import User, Topic, Comment, Tag
+
+# The sorted set scripts run for real here, on fakeredis with its Lua runtime
+
+START = SCORE_EPOCH + timedelta(days=10)
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(trending, "get_redis_connection", lambda: client)
+    return client
+
+def scores(client, key):
+    return {int(member): score for member, score in client.zrange(key, 0, -1, withscores=True)}
+
+def test_events_add_up_and_later_events_weigh_more(redis_server):
+    record_topic_created(SimpleNamespace(id=1, created_at=START))
+    record_comment_created(1, START + timedelta(days=1), ["python"])
+    record_topic_created(SimpleNamespace(id=2, created_at=START + timedelta(days=2)))
+
+    for days in settings.TRENDING_WINDOWS_DAYS:
+        expected = _logaddexp(log_contribution(3, START, days), log_contribution(2, START + timedelta(days=1), days))
+        assert math.isclose(scores(redis_server, trending_key(days))[1], expected)
+    # Topic 1's head start is worth less the shorter the window
+    assert get_trending_topic_ids(30, 10) == [1, 2]
+    assert get_trending_topic_ids(1, 10) == [2, 1]
+    comment_score = log_contribution(2, START + timedelta(days=1), 7)
+    assert scores(redis_server, trending_key(7, "python")) == {1: pytest.approx(comment_score)}
+
+    record_comment_deleted(1, START + timedelta(days=1), ["python"])
+    assert math.isclose(scores(redis_server, trending_key(7))[1], log_contribution(3, START, 7))
+    assert not redis_server.exists(trending_key(7, "python"))
+
+def test_sets_are_trimmed_to_the_best_topics(redis_server, monkeypatch):
+    monkeypatch.setattr(settings, "TRENDING_MAX_TOPICS", 2)
+    for topic_id in range(1, 4):
+        record_topic_created(SimpleNamespace(id=topic_id, created_at=START + timedelta(days=topic_id)))
+    assert get_trending_topic_ids(7, 10) == [3, 2]
+
+def test_retagging_moves_scores_between_tag_sets(redis_server):
+    record_topic_created(SimpleNamespace(id=1, created_at=START))
+    record_comment_created(1, START, ["python"])
+    record_topic_retagged(1, ["python"], ["Rust"])
+
+    assert not redis_server.exists(trending_key(7, "python"))
+    assert scores(redis_server, trending_key(7, "rust")) == scores(redis_server, trending_key(7))
+    assert b"rust" in redis_server.smembers(TRENDING_TAGS_KEY)
+
+def test_rebuild_matches_the_events(redis_server, database):
+    user = User(username="u", email="u@example.com", password_hash="x")
+    first = Topic(title="a", content="c", user=user, created_at=START, tags=[Tag(name="python")])
+    second = Topic(title="b", content="c", user=user, created_at=START + timedelta(days=3))
+    database.add_all([user, first, second])
+    database.flush()
+    comment_times = [START + timedelta(days=1), START + timedelta(days=2, hours=5)]
+    database.add_all([Comment(content="c", topic_id=first.id, user_id=user.id, created_at=at) for at in comment_times])
+    database.commit()
+
+    for topic in (first, second):
+        record_topic_created(topic)
+    for at in comment_times:
+        record_comment_created(first.id, at)
+    incremental = {days: scores(redis_server, trending_key(days)) for days in settings.TRENDING_WINDOWS_DAYS}
+    # Left over from a tag no topic carries any more
+    redis_server.zadd(trending_key(7, "old"), {first.id: 1.0})
+    redis_server.sadd(TRENDING_TAGS_KEY, "old")
+
+    rebuild_trending_scores(database)
+    for days in settings.TRENDING_WINDOWS_DAYS:
+        rebuilt = scores(redis_server, trending_key(days))
+        assert rebuilt == {topic_id: pytest.approx(score) for topic_id, score in incremental[days].items()}
+        assert scores(redis_server, trending_key(days, "python")) == {first.id: pytest.approx(rebuilt[first.id])}
+    assert not redis_server.exists(trending_key(7, "old"))
+    assert redis_server.smembers(TRENDING_TAGS_KEY) == {b"python"}
+
+def test_personalized_feed_boosts_the_users_tags(redis_server):
+    boost = math.log(settings.TRENDING_PERSONAL_TAG_BOOST)
+    redis_server.zadd(trending_key(7), {1: 10.0, 2: 9.5, 3: 9.0})
+    # Topic 4 is below the global top 2 but carries the user's tag
+    redis_server.zadd(trending_key(7, "python"), {2: 9.5, 4: 10.0 - boost / 2})
+
+    assert get_personalized_trending_topic_ids(7, 3, ["python"]) == [4, 2, 1]
+    assert get_personalized_trending_topic_ids(7, 3, []) == [1, 2, 3]
+    assert get_personalized_trending_topic_ids(3, 3, ["python"]) is None
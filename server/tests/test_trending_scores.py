@@ -0,0 +1,25 @@
+import numpy as np
+from server.src.utils.trending_scores import score_windows, top_k
+
+def test_top_k_breaks_ties_by_larger_id():
+    scores = np.array([5.0, 7.0, 5.0, 5.0, 1.0])
+    ids = np.array([10, 11, 12, 13, 14])
+    assert ids[top_k(scores, ids, 3)].tolist() == [11, 13, 12]
+    assert ids[top_k(scores, ids, 10)].tolist() == [11, 13, 12, 10, 14]
+    assert top_k(scores, ids, 0).tolist() == []
+
+def test_score_windows_counts_only_activity_inside_each_window():
+    day = 86400
+    now = 100 * day
+    topic_ids = np.array([1, 2])
+    topic_created = np.array([now - 50 * day, now])
+    # Topic 1: three comments 20 days ago and one just now; topic 2 has none
+    activity_topics = np.array([0, 0])
+    activity_times = np.array([now - 20 * day, now])
+    activity_counts = np.array([3, 1])
+    results = score_windows(topic_ids, topic_created, activity_topics, activity_times, activity_counts,
+                            now, [7, 30], 2)
+    ids, scores = results[7]
+    assert ids.tolist() == [1, 2] and scores.tolist() == [1 * 2 + 4, 3]
+    ids, scores = results[30]
+    assert ids.tolist() == [1, 2] and scores.tolist() == [4 * 2 + 4, 3]
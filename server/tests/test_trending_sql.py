@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+import heapq
+import math
+import random
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from server.src.db.session import Base
+from server.src.db.models import User, Topic, Comment, Tag, UserTopicSubscription
+from server.src.db.trending import get_trending_topics, get_trending_topics_batch, get_user_trending_tags
+
+# On the hour, so the window start falls on a rollup bucket boundary and counts are exact
+NOW = datetime(2025, 3, 10, 12)
+
+def reference_scores(topics, comments, time_window, now):
+    """
+    The original in-Python trending formula, with now fixed.
+    """
+    time_threshold = now - timedelta(days=time_window)
+    scores = {}
+    for topic in topics:
+        recent_comments = sum(1 for c in comments if c.topic_id == topic.id and c.created_at >= time_threshold)
+        total_comments = sum(1 for c in comments if c.topic_id == topic.id)
+        recency_weight = max(0, 1 - (now - topic.created_at).days / time_window)
+        scores[topic.id] = recent_comments * 2 + total_comments * 1 + recency_weight * 3
+    return scores
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    rng = random.Random(3)
+    user = User(username="u", email="u@example.com", password_hash="x")
+    session.add(user)
+    session.flush()
+    topics = [
+        Topic(title=f"t{i}", content="c", user_id=user.id, created_at=NOW - timedelta(hours=rng.randrange(0, 24 * 40)))
+        for i in range(40)
+    ]
+    session.add_all(topics)
+    session.flush()
+    for _ in range(150):
+        topic = rng.choice(topics)
+        age = timedelta(minutes=rng.randrange(0, int((NOW - topic.created_at).total_seconds() // 60) + 1))
+        session.add(Comment(topic_id=topic.id, content="c", user_id=user.id, created_at=NOW - age))
+    session.commit()
+    yield session
+    session.close()
+
+@pytest.mark.parametrize("time_window", [1, 7, 30])
+def test_sql_scores_match_reference_formula(db, time_window):
+    expected = reference_scores(db.query(Topic).all(), db.query(Comment).all(), time_window, NOW)
+    rows = get_trending_topics(db, time_window, 10, now=NOW)
+    assert len(rows) == 10
+    for topic, score in rows:
+        assert math.isclose(score, expected[topic.id], abs_tol=1e-9)
+    best = heapq.nlargest(10, expected.items(), key=lambda item: (item[1], item[0]))
+    assert [topic.id for topic, _ in rows] == [topic_id for topic_id, _ in best]
+
+def test_topics_without_comments_are_ranked(db):
+    topic = Topic(title="fresh", content="c", user_id=1, created_at=NOW)
+    db.add(topic)
+    db.commit()
+    rows = get_trending_topics(db, 7, 100, now=NOW)
+    assert (topic.id, 3) in [(t.id, score) for t, score in rows]
+
+def test_batch_scores_match_sql(db):
+    batch = get_trending_topics_batch(db, [1, 7, 30], 15, now=NOW)
+    for time_window in (1, 7, 30):
+        rows = get_trending_topics(db, time_window, 15, now=NOW)
+        assert [topic_id for topic_id, _ in batch[time_window]] == [topic.id for topic, _ in rows]
+        for (_, batch_score), (_, score) in zip(batch[time_window], rows):
+            assert math.isclose(batch_score, score, abs_tol=1e-9)
+
+def test_tag_restricts_trending_topics(db):
+    topics = db.query(Topic).order_by(Topic.id).all()
+    web = Tag(name="Web")
+    for topic in topics[::3]:
+        topic.tags.append(web)
+    db.commit()
+    tagged = {topic.id for topic in topics[::3]}
+    rows = get_trending_topics(db, 7, 100, now=NOW, tag="web")
+    assert {topic.id for topic, _ in rows} == tagged
+    overall = [topic.id for topic, _ in get_trending_topics(db, 7, 100, now=NOW)]
+    assert [topic.id for topic, _ in rows] == [topic_id for topic_id in overall if topic_id in tagged]
+
+def test_user_tags_come_from_subscriptions_and_own_topics(db):
+    other = User(username="v", email="v@example.com", password_hash="x")
+    db.add(other)
+    db.flush()
+    python, rust, go = Tag(name="Python"), Tag(name="rust"), Tag(name="go")
+    own = Topic(title="own", content="c", user_id=other.id, created_at=NOW, tags=[python, rust])
+    followed = Topic(title="followed", content="c", user_id=1, created_at=NOW, tags=[python])
+    unrelated = Topic(title="unrelated", content="c", user_id=1, created_at=NOW, tags=[go])
+    db.add_all([own, followed, unrelated])
+    db.flush()
+    db.add(UserTopicSubscription(user_id=other.id, topic_id=followed.id))
+    db.commit()
+    assert get_user_trending_tags(db, other.id, 5) == ["python", "rust"]
+    assert get_user_trending_tags(db, other.id, 1) == ["python"]
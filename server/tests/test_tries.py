@@ -0,0 +1,128 @@
+import pytest
+from server.src.utils.tries import Trie, RadixTrie
+
+@pytest.fixture(params=[Trie, RadixTrie])
+def trie(request):
+    trie = request.param()
+    trie.insert("Python", {"id": 1, "title": "Python"})
+    trie.insert("Python Tips", {"id": 2, "title": "Python Tips"})
+    trie.insert("Rust", {"id": 3, "title": "Rust"})
+    return trie
+
+def test_search_prefix(trie):
+    results = trie.search("py")
+    assert sorted(t["id"] for t in results) == [1, 2]
+
+def test_search_is_case_insensitive(trie):
+    assert [t["id"] for t in trie.search("RU")] == [3]
+
+def test_search_no_match(trie):
+    assert trie.search("go") == []
+    assert trie.search("pythonx") == []
+
+def test_delete_keeps_longer_titles(trie):
+    assert trie.delete("python")
+    assert [t["id"] for t in trie.search("py")] == [2]
+
+def test_delete_prunes_branch(trie):
+    assert trie.delete("Rust")
+    assert trie.search("r") == []
+    assert "r" not in trie.root.children
+
+def test_delete_missing_title(trie):
+    assert not trie.delete("Go")
+    assert not trie.delete("Pyth")
+
+def test_radix_splits_and_merges_edges():
+    trie = RadixTrie()
+    trie.insert("team", 1)
+    trie.insert("tea", 2)
+    trie.insert("ten", 3)
+    assert sorted(trie.search("te")) == [1, 2, 3]
+    assert trie.root.children["t"].label == "te"
+
+    assert trie.delete("tea")
+    assert trie.delete("ten")
+    assert trie.root.children["t"].label == "team"
+    assert len(trie) == 1
+
+def test_delete_empty_title():
+    trie = RadixTrie(rankings={"views": lambda t: t["views"]}, top_k=1, identity=lambda t: t["id"])
+    trie.insert("", {"id": 1, "views": 10})
+    trie.insert("", {"id": 2, "views": 20})
+    trie.insert("go", {"id": 3, "views": 5})
+
+    assert trie.delete("", 2)
+    assert sorted(t["id"] for t in trie.search("")) == [1, 3]
+    assert [t["id"] for t in trie.top("", "views", 1)] == [1]
+    assert trie.delete("")
+    assert not trie.delete("")
+    assert [t["id"] for t in trie.search("")] == [3]
+    assert len(trie) == 1
+
+def test_frozen_trie_matches_radix():
+    trie = RadixTrie()
+    for topic_id, title in enumerate(["Alpha", "alpine", "Beta", "al"]):
+        trie.insert(title, topic_id)
+    frozen = trie.freeze()
+    for prefix in ["", "al", "alp", "b", "z"]:
+        assert sorted(frozen.search(prefix)) == sorted(trie.search(prefix))
+
+@pytest.fixture
+def ranked_trie():
+    trie = RadixTrie(rankings={"views": lambda t: t["views"]}, top_k=3)
+    trie.insert_many(
+        (f"topic {i}", {"id": i, "views": i * 10 % 70}) for i in range(10)
+    )
+    return trie
+
+def test_top_uses_precomputed_candidates(ranked_trie):
+    assert ranked_trie.root.top is not None
+    assert [t["views"] for t in ranked_trie.top("topic", "views", 3)] == [60, 50, 40]
+
+def test_top_paginates_past_candidates(ranked_trie):
+    assert [t["views"] for t in ranked_trie.top("topic", "views", 3, offset=2)] == [40, 30, 20]
+
+def test_top_tracks_updates_and_deletes(ranked_trie):
+    ranked_trie.insert("topic 1", {"id": 1, "views": 100})
+    assert ranked_trie.top("t", "views", 1)[0]["id"] == 1
+    ranked_trie.delete("topic 1")
+    assert [t["views"] for t in ranked_trie.top("t", "views", 2)] == [60, 50]
+
+def test_fuzzy_ranks_by_distance_then_score():
+    trie = RadixTrie(rankings={"views": lambda t: t["views"]}, top_k=2)
+    trie.insert_many([
+        ("python tips", {"id": 1, "views": 5}),
+        ("python", {"id": 2, "views": 50}),
+        ("pithon jokes", {"id": 3, "views": 100}),
+        ("rust", {"id": 4, "views": 1000}),
+    ])
+    results = trie.fuzzy("pyhton", 2, "views", 10)
+    assert [(distance, t["id"]) for distance, t in results] == [(2, 2), (2, 1)]
+    results = trie.fuzzy("pithon", 1, "views", 10)
+    assert [(distance, t["id"]) for distance, t in results] == [(0, 3), (1, 2), (1, 1)]
+
+def test_fuzzy_no_match():
+    trie = RadixTrie(rankings={"views": lambda t: t["views"]})
+    trie.insert("rust", {"id": 1, "views": 0})
+    assert trie.fuzzy("python", 2, "views", 10) == []
+
+def test_titles_shared_by_several_topics():
+    trie = RadixTrie(rankings={"views": lambda t: t["views"]}, top_k=2, identity=lambda t: t["id"])
+    trie.insert("Help", {"id": 1, "views": 10})
+    trie.insert("help", {"id": 2, "views": 20})
+    trie.insert("Help", {"id": 1, "views": 30})
+    assert sorted(t["views"] for t in trie.get("help")) == [20, 30]
+    assert [t["id"] for t in trie.top("he", "views", 2)] == [1, 2]
+
+    assert trie.delete("help", 1)
+    assert [t["id"] for t in trie.get("help")] == [2]
+    assert not trie.delete("help", 1)
+
+def test_top_and_fuzzy_with_filter(ranked_trie):
+    even = lambda t: t["id"] % 2 == 0
+    assert [t["id"] for t in ranked_trie.top("topic", "views", 2, accept=even)] == [6, 4]
+    # Only one accepted value is among the precomputed candidates, so this needs the full subtree
+    assert [t["id"] for t in ranked_trie.top("topic", "views", 3, accept=lambda t: t["id"] < 3)] == [2, 1, 0]
+    results = ranked_trie.fuzzy("tpic", 1, "views", 3, accept=even)
+    assert [t["id"] for _, t in results] == [6, 4, 2]
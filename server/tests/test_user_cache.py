@@ -0,0 +1,33 @@
+from server.src.caching.cleanup import cache_user_value, clear_user_cache, user_keys_key
+from server.src.caching.resolver_cache import cached_resolver
+
+def test_clearing_a_user_deletes_only_their_tracked_keys(redis_client):
+    cache_user_value(7, "principal:7", "alice", ttl=60)
+    cache_user_value(7, "feed:7", "items", ttl=600)
+    cache_user_value(8, "principal:8", "bob", ttl=60)
+    redis_client.set("topics:version", 3)
+    clear_user_cache(7)
+    assert redis_client.get("principal:7") is None and redis_client.get("feed:7") is None
+    assert redis_client.get(user_keys_key(7)) is None
+    assert redis_client.get("principal:8") == b"bob" and redis_client.get("topics:version") == b"3"
+
+def test_index_lives_as_long_as_its_longest_key(redis_client):
+    cache_user_value(7, "a", 1, ttl=600)
+    cache_user_value(7, "b", 2, ttl=60)
+    assert redis_client.ttl(user_keys_key(7)) == 600
+    cache_user_value(7, "c", 3, ttl=900)
+    assert redis_client.ttl(user_keys_key(7)) == 900
+
+def test_per_user_resolver_results_are_tracked(redis_client):
+    class User:
+        id = 7
+
+    @cached_resolver(tags=lambda: ["feed"], dump=list, load=list, authenticate=lambda info: User(), per_user=True)
+    def feed(self, info):
+        return [1, 2]
+
+    feed(None, info=None)
+    tracked = redis_client.smembers(user_keys_key(7))
+    assert len(tracked) == 1
+    clear_user_cache(7)
+    assert redis_client.get(next(iter(tracked)).decode()) is None